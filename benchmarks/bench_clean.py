@@ -0,0 +1,92 @@
+''' Benchmark da limpeza dos dados: clean_code original x clean_code vetorizado.
+
+    O train.csv é replicado N vezes para simular bases maiores e as duas versões da
+    limpeza são medidas em linhas por segundo.
+
+    Uso (a partir da raiz do projeto):
+        python benchmarks/bench_clean.py --path train.csv --scales 10 100
+'''
+#==============================
+# Bibliotecas
+#==============================
+import argparse
+import os
+import sys
+import time
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.pipeline import clean_code
+#----------------------------------------------------------------------------------
+
+#==============================
+# Funções
+#==============================
+
+def clean_code_legacy(df1):
+  ''' Versão original da limpeza (uma máscara e uma cópia por coluna e apply linha a linha),
+      mantida aqui apenas como referência para o benchmark.
+  '''
+  linhas_selecionadas = (df1['Delivery_person_Age'] != 'NaN ')
+  df1 = df1.loc[linhas_selecionadas, :].copy()
+  linhas_selecionadas = (df1['multiple_deliveries'] != 'NaN ')
+  df1 = df1.loc[linhas_selecionadas, :].copy()
+  linhas_selecionadas = (df1['Road_traffic_density'] != 'NaN ')
+  df1 = df1.loc[linhas_selecionadas, :].copy()
+  linhas_selecionadas = (df1['City'] != 'NaN ')
+  df1 = df1.loc[linhas_selecionadas, :].copy()
+  linhas_selecionadas = (df1['Festival'] != 'NaN ')
+  df1 = df1.loc[linhas_selecionadas, :].copy()
+
+  df1['Delivery_person_Age'] = df1['Delivery_person_Age'].astype(int)
+  df1['multiple_deliveries'] = df1['multiple_deliveries'].astype(int)
+  df1['Delivery_person_Ratings'] = df1['Delivery_person_Ratings'].astype(float)
+  df1['Order_Date'] = pd.to_datetime(df1['Order_Date'], format='%d-%m-%Y')
+
+  df1.loc[:, 'ID'] = df1.loc[:, 'ID'].str.strip()
+  df1.loc[:, 'Road_traffic_density'] = df1.loc[:, 'Road_traffic_density'].str.strip()
+  df1.loc[:, 'Type_of_order'] = df1.loc[:, 'Type_of_order'].str.strip()
+  df1.loc[:, 'Type_of_vehicle'] = df1.loc[:, 'Type_of_vehicle'].str.strip()
+  df1.loc[:, 'City'] = df1.loc[:, 'City'].str.strip()
+  df1.loc[:, 'Festival'] = df1.loc[:, 'Festival'].str.strip()
+
+  df1['Time_taken(min)'] = df1['Time_taken(min)'].apply(lambda x: x.split('(min) ')[1])
+  df1['Time_taken(min)'] = df1['Time_taken(min)'].astype(int)
+
+  return df1
+
+
+def measure(func, df, repeat):
+    ''' Executa a função `repeat` vezes sobre o DataFrame e retorna o melhor tempo (s) e o resultado. '''
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(df)
+        best = min(best, time.perf_counter() - start)
+
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--path', default='train.csv', help='arquivo CSV de origem')
+    parser.add_argument('--scales', type=int, nargs='+', default=[10, 100], help='quantas vezes replicar o CSV')
+    parser.add_argument('--repeat', type=int, default=3, help='repetições por medida (vale o melhor tempo)')
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.path)
+    print(f'{"escala":>7} {"linhas":>10} {"original (linhas/s)":>20} {"vetorizado (linhas/s)":>22} {"ganho":>7}')
+
+    for scale in args.scales:
+        df_big = pd.concat([df] * scale, ignore_index=True)
+        t_old, old = measure(clean_code_legacy, df_big, args.repeat)
+        t_new, new = measure(clean_code, df_big, args.repeat)
+        # as duas versões precisam produzir exatamente o mesmo DataFrame
+        pd.testing.assert_frame_equal(old, new)
+
+        rows = len(df_big)
+        print(f'{scale:>6}x {rows:>10} {rows / t_old:>20,.0f} {rows / t_new:>22,.0f} {t_old / t_new:>6.1f}x')
+
+
+if __name__ == '__main__':
+    main()
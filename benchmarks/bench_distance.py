@@ -0,0 +1,66 @@
+''' Benchmark e validação da distância: apply linha a linha com o pacote haversine x haversine_np vetorizado.
+
+    Antes de medir, confere que a versão vetorizada bate com o pacote haversine
+    (tolerância relativa de 1e-9 em float64 e 1e-6 na coluna float32 armazenada).
+
+    Uso (a partir da raiz do projeto):
+        python benchmarks/bench_distance.py --path train.csv --scales 1 10
+'''
+#==============================
+# Bibliotecas
+#==============================
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from haversine import haversine
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.pipeline import clean_code
+from utils.geo import COLUNAS_COORDENADAS, haversine_np
+#----------------------------------------------------------------------------------
+
+#==============================
+# Funções
+#==============================
+
+def distance_apply(df1):
+    ''' Versão original: uma chamada do pacote haversine por linha. '''
+    return df1.loc[:, COLUNAS_COORDENADAS].apply(lambda x: haversine((x['Restaurant_latitude'], x['Restaurant_longitude']), (x['Delivery_location_latitude'], x['Delivery_location_longitude'])), axis=1).to_numpy()
+
+
+def distance_vectorized(df1):
+    ''' Versão vetorizada usada no carregamento dos dados. '''
+    return haversine_np(*(df1[coluna] for coluna in COLUNAS_COORDENADAS))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--path', default='train.csv', help='arquivo CSV de origem')
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10], help='quantas vezes replicar o CSV')
+    args = parser.parse_args()
+
+    df1 = clean_code(pd.read_csv(args.path))
+    print(f'{"escala":>7} {"linhas":>10} {"apply (s)":>10} {"vetorizado (s)":>15} {"ganho":>8}')
+
+    for scale in args.scales:
+        df_big = pd.concat([df1] * scale, ignore_index=True)
+
+        start = time.perf_counter()
+        esperado = distance_apply(df_big)
+        t_apply = time.perf_counter() - start
+
+        start = time.perf_counter()
+        obtido = distance_vectorized(df_big)
+        t_vec = time.perf_counter() - start
+
+        np.testing.assert_allclose(obtido, esperado, rtol=1e-9)
+        np.testing.assert_allclose(obtido.astype(np.float32), esperado, rtol=1e-6)
+
+        print(f'{scale:>6}x {len(df_big):>10} {t_apply:>10.3f} {t_vec:>15.4f} {t_apply / t_vec:>7.0f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+''' Benchmark das funções de dados das três páginas, sem o Streamlit (benchmarks/headless.py).
+
+    Para cada tamanho gera pedidos sintéticos no formato do train.csv (benchmarks/synthetic.py),
+    monta o dataset como o app (limpeza, índices, cubo e sketches), aplica os filtros da barra
+    lateral e executa cada função das páginas `--repeat` vezes.
+
+    Por função são mostrados os percentis da latência (p50, p90, p99), a vazão (linhas do
+    dataset filtrado por segundo, na mediana) e o pico de memória alocada em uma chamada
+    (tracemalloc). Com --output o resultado é gravado em JSON; com --baseline as medianas são
+    comparadas com as de uma execução anterior, para acompanhar regressões.
+
+    Uso (a partir da raiz do projeto):
+        python benchmarks/bench_pages.py --rows 100000 1000000 10000000 --repeat 20
+        python benchmarks/bench_pages.py --rows 1000000 --output antes.json
+        python benchmarks/bench_pages.py --rows 1000000 --baseline antes.json --skip mapa
+        python benchmarks/bench_pages.py --rows 1000000 --days 7 --only 'filtros|traffic|avg_std'
+'''
+#==============================
+# Bibliotecas
+#==============================
+import argparse
+import json
+import platform
+import re
+import resource
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+import numpy as np
+
+from headless import build_state, load_pages
+from utils.cube import distinct_couriers, filter_cube, rating_rollup, rollup
+from utils.hll import estimate_distinct, weekly_distinct
+from utils.bitmap import active_filters, select_rows
+from utils.index import date_bounds, date_range_rows, filter_rows
+from utils.kpi import courier_kpis, restaurant_kpis
+from utils.prefix import range_totals
+from utils.topk import top_k
+#----------------------------------------------------------------------------------
+
+# condições de tráfego da barra lateral (todas selecionadas por padrão)
+TRAFEGO = ['Low', 'Medium', 'High', 'Jam']
+
+# filtros cruzados medidos à parte: índice bitmap (filter_rows) x máscaras isin empilhadas sobre o DataFrame
+CRUZADOS = {'City': ['Metropolitian', 'Urban'], 'Weatherconditions': ['conditions Fog', 'conditions Sunny', 'conditions Cloudy'],
+            'Type_of_vehicle': ['motorcycle', 'scooter'], 'Festival': ['No']}
+
+# percentis da latência mostrados e gravados
+PERCENTIS = (50, 90, 99)
+
+#==============================
+# Funções
+#==============================
+
+def masked_rows(df1, date_range, traffic_options, filters):
+    ''' Referência dos filtros cruzados sem índice: uma máscara isin por coluna sobre o DataFrame inteiro. '''
+    selecao = (df1['Order_Date'] >= date_range[0]) & (df1['Order_Date'] < date_range[1]) & df1['Road_traffic_density'].isin(traffic_options)
+    for coluna, valores in filters.items():
+        selecao &= df1[coluna].isin(valores)
+
+    return df1[selecao]
+
+
+def scenarios(pages, state, date_range, traffic_options):
+    ''' Esta função monta a lista do que é medido, com os mesmos argumentos que as páginas usam.
+
+        Ações realizadas:
+        1 - Aplica os filtros da barra lateral no DataFrame, no cubo e nas somas acumuladas (uma vez, como cada página)
+        2 - Lista as funções de cada página e os cálculos feitos direto no script delas
+
+        Input: páginas carregadas (headless.load_pages), DatasetState, período (início, fim) e condições de tráfego
+        Output: lista de (página, nome, função sem argumentos) e a quantidade de linhas filtradas
+    '''
+    empresa, entregadores, restaurantes = pages['Visão Empresa'], pages['Visão Entregadores'], pages['Visão Restaurantes']
+    df1 = filter_rows(state.frame, state.row_index, date_range, traffic_options)
+    cube = filter_cube(state.cube, date_range, traffic_options)
+    totals = range_totals(state.prefix, date_range, traffic_options)
+    couriers = tuple(weekly_distinct(state.sketches, date_range, traffic_options).items())
+
+    lista = [
+        ('filtros', 'filter_rows', lambda: filter_rows(state.frame, state.row_index, date_range, traffic_options)),
+        ('filtros', 'filter_cube', lambda: filter_cube(state.cube, date_range, traffic_options)),
+        ('filtros', 'range_totals', lambda: range_totals(state.prefix, date_range, traffic_options)),
+        ('filtros', 'select_rows (filtros cruzados, só o índice)',
+         lambda: select_rows(state.row_index.bitmaps, *date_range_rows(state.row_index, date_range),
+                             active_filters(state.row_index.bitmaps, {'Road_traffic_density': traffic_options, **CRUZADOS}))),
+        ('filtros', 'filter_rows (filtros cruzados, bitmaps)',
+         lambda: filter_rows(state.frame, state.row_index, date_range, traffic_options, CRUZADOS)),
+        ('filtros', 'máscaras isin (filtros cruzados, referência)', lambda: masked_rows(state.frame, date_range, traffic_options, CRUZADOS)),
+        ('filtros', 'filter_cube (filtros cruzados)', lambda: filter_cube(state.cube, date_range, traffic_options, CRUZADOS)),
+
+        ('Visão Empresa', 'order_metrics', lambda: empresa.order_metrics(cube)),
+        ('Visão Empresa', 'traffic_order_share', lambda: empresa.traffic_order_share(totals)),
+        ('Visão Empresa', 'traffic_order_city', lambda: empresa.traffic_order_city(totals)),
+        ('Visão Empresa', 'order_by_week', lambda: empresa.order_by_week(cube)),
+        ('Visão Empresa', 'order_share_by_week (exata)', lambda: empresa.order_share_by_week(cube)),
+        ('Visão Empresa', 'weekly_distinct (HyperLogLog)', lambda: weekly_distinct(state.sketches, date_range, traffic_options)),
+        ('Visão Empresa', 'order_share_by_week (estimada)', lambda: empresa.order_share_by_week(cube, couriers)),
+        ('Visão Empresa', 'country_maps (mapa Cidades)', lambda: empresa.country_maps(df1, 'Cidades')),
+        ('Visão Empresa', 'country_maps (mapa Restaurantes)', lambda: empresa.country_maps(df1, 'Restaurantes')),
+        ('Visão Empresa', 'country_maps (mapa Entregas)', lambda: empresa.country_maps(df1, 'Entregas')),
+
+        ('Visão Entregadores', 'courier_kpis (idade e condição dos veículos)', lambda: courier_kpis(df1)),
+        ('Visão Entregadores', 'avaliação por entregador',
+         lambda: df1.loc[:, ['Delivery_person_Ratings', 'Delivery_person_ID']].groupby(['Delivery_person_ID'], observed=True).mean().round(2).reset_index()),
+        ('Visão Entregadores', 'rating_rollup (tráfego e clima)',
+         lambda: [rating_rollup(totals, ['Road_traffic_density']), rating_rollup(cube, ['Weatherconditions'])]),
+        ('Visão Entregadores', 'top_delivers', lambda: entregadores.top_delivers(df1)),
+        ('Visão Entregadores', 'top_k (maior tempo mantido, sem filtros)', lambda: top_k(state.courier_max)),
+
+        ('Visão Restaurantes', 'distinct_couriers (exata)', lambda: distinct_couriers(cube)),
+        ('Visão Restaurantes', 'estimate_distinct (HyperLogLog)', lambda: estimate_distinct(state.sketches, date_range, traffic_options)),
+        ('Visão Restaurantes', 'restaurant_kpis (6 métricas, contagem exata)', lambda: restaurant_kpis(cube, df1)),
+        ('Visão Restaurantes', 'restaurant_kpis (5 métricas, sem a contagem)', lambda: restaurant_kpis(cube, df1, exact_couriers=False)),
+        ('Visão Restaurantes', 'avg_std_time_graph', lambda: restaurantes.avg_std_time_graph(totals)),
+        ('Visão Restaurantes', 'rollup (cidade e tipo de pedido)', lambda: rollup(cube, ['City', 'Type_of_order'])),
+        ('Visão Restaurantes', 'distância média por cidade',
+         lambda: df1.loc[:, ['City', 'distance']].groupby('City', observed=True).mean().reset_index()),
+        ('Visão Restaurantes', 'avg_std_time_on_traffic', lambda: restaurantes.avg_std_time_on_traffic(totals)),
+    ]
+
+    return lista, len(df1)
+
+
+def measure(func, repeat):
+    ''' Esta função mede uma função: `repeat` chamadas cronometradas (depois de uma de aquecimento)
+        e uma chamada extra com o tracemalloc para o pico de memória alocada.
+
+        Input: função sem argumentos e quantidade de chamadas
+        Output: (lista com os segundos de cada chamada, pico de memória em bytes)
+    '''
+    func()
+    tempos = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        tempos.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return tempos, pico
+
+
+def run_size(pages, n_rows, args):
+    ''' Monta o dataset de um tamanho e mede todas as funções selecionadas.
+
+        Output: dicionário com o tamanho, as linhas válidas e filtradas, o tempo de montagem e os resultados
+    '''
+    start = time.perf_counter()
+    state = build_state(n_rows, seed=args.seed)
+    montagem = time.perf_counter() - start
+
+    inicio, fim = date_bounds(state.row_index)
+    if args.days:
+        fim = min(fim, inicio + timedelta(days=args.days))
+    lista, filtradas = scenarios(pages, state, (inicio, fim), args.traffic)
+
+    resultados = []
+    for pagina, nome, func in lista:
+        rotulo = f'{pagina}: {nome}'
+        if (args.only and not re.search(args.only, rotulo, re.I)) or (args.skip and re.search(args.skip, rotulo, re.I)):
+            continue
+        tempos, pico = measure(func, args.repeat)
+        ms = np.array(tempos) * 1000
+        resultados.append({'page': pagina, 'function': nome,
+                           **{f'p{p}_ms': round(float(np.percentile(ms, p)), 3) for p in PERCENTIS},
+                           'rows_per_s': round(filtradas / float(np.median(tempos))) if np.median(tempos) > 0 else None,
+                           'peak_mb': round(pico / 1024 ** 2, 2)})
+
+    return {'rows': n_rows, 'valid_rows': len(state.frame), 'filtered_rows': filtradas,
+            'build_s': round(montagem, 2), 'results': resultados}
+
+
+def print_size(execucao, baseline):
+    ''' Mostra a tabela de um tamanho; com baseline, a variação da mediana em relação à execução anterior. '''
+    anteriores = {}
+    for anterior in (baseline or {}).get('sizes', []):
+        if anterior['rows'] == execucao['rows']:
+            anteriores = {(r['page'], r['function']): r for r in anterior['results']}
+
+    print(f'\n{execucao["rows"]:,} linhas geradas, {execucao["valid_rows"]:,} válidas, {execucao["filtered_rows"]:,} após os filtros '
+          f'(montagem do dataset: {execucao["build_s"]:.2f} s)')
+    print(f'{"função":<58} {"p50 (ms)":>9} {"p90 (ms)":>9} {"p99 (ms)":>9} {"linhas/s":>14} {"pico (MB)":>10}' + (f' {"Δ p50":>8}' if baseline else ''))
+    for r in execucao['results']:
+        linha = (f'{r["page"] + ": " + r["function"]:<58} {r["p50_ms"]:>9.2f} {r["p90_ms"]:>9.2f} {r["p99_ms"]:>9.2f} '
+                 f'{r["rows_per_s"] or 0:>14,} {r["peak_mb"]:>10.2f}')
+        anterior = anteriores.get((r['page'], r['function']))
+        if anterior and anterior['p50_ms'] > 0:
+            linha += f' {(r["p50_ms"] / anterior["p50_ms"] - 1) * 100:>+7.1f}%'
+        print(linha)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000], help='quantidades de linhas geradas')
+    parser.add_argument('--repeat', type=int, default=20, help='chamadas cronometradas por função')
+    parser.add_argument('--seed', type=int, default=0, help='semente do gerador de dados')
+    parser.add_argument('--traffic', nargs='+', default=TRAFEGO, help='condições de tráfego selecionadas na barra lateral')
+    parser.add_argument('--days', type=int, help='período da barra lateral: só os primeiros DAYS dias (padrão: todo o intervalo do slider)')
+    parser.add_argument('--only', help='mede só as funções cujo "página: função" contém esta expressão regular')
+    parser.add_argument('--skip', help='não mede as funções cujo "página: função" contém esta expressão regular')
+    parser.add_argument('--output', help='grava o resultado em JSON')
+    parser.add_argument('--baseline', help='JSON de uma execução anterior para comparar as medianas')
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as arquivo:
+            baseline = json.load(arquivo)
+
+    pages = load_pages()
+    tamanhos = []
+    for n_rows in args.rows:
+        tamanhos.append(run_size(pages, n_rows, args))
+        print_size(tamanhos[-1], baseline)
+
+    # ru_maxrss em KB no Linux
+    pico_processo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f'\npico de memória residente do processo: {pico_processo:,.0f} MB')
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as arquivo:
+            json.dump({'ts': datetime.now().isoformat(timespec='seconds'), 'python': platform.python_version(),
+                       'machine': platform.machine(), 'repeat': args.repeat, 'seed': args.seed, 'traffic': args.traffic, 'days': args.days,
+                       'peak_rss_mb': round(pico_processo, 1), 'sizes': tamanhos}, arquivo, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+''' Benchmark da limpeza e das agregações em paralelo (utils.parallel) com 1, 2, 4 e 8 processos.
+
+    O train.csv é replicado em um arquivo temporário. Para cada quantidade de processos são medidos
+    parallel_aggregate (partições por cidade e por faixa de datas) e parallel_clean, e os resultados
+    são comparados com os de 1 processo. O ganho só aparece em máquinas com vários núcleos.
+    Fora do app o pool pode usar fork (--start-method fork, o padrão aqui): as partições são herdadas
+    pelos processos, sem pickle. forkserver e spawn são os métodos usados dentro do app.
+
+    Uso (a partir da raiz do projeto):
+        python benchmarks/bench_parallel.py --path train.csv --scale 20 --workers 1 2 4 8
+        python benchmarks/bench_parallel.py --start-method forkserver
+'''
+#==============================
+# Bibliotecas
+#==============================
+import argparse
+import os
+import sys
+import tempfile
+import time
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_streaming import replicate_csv
+from utils.cube import CUBE_DIMENSIONS
+from utils.parallel import START_METHODS, parallel_aggregate, parallel_clean
+from utils.streaming import COURIER_KEYS
+#----------------------------------------------------------------------------------
+
+#==============================
+# Funções
+#==============================
+
+def best_time(func, repeat):
+    ''' Executa func `repeat` vezes e devolve (melhor tempo em segundos, resultado da última execução). '''
+    tempos = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        resultado = func()
+        tempos.append(time.perf_counter() - start)
+
+    return min(tempos), resultado
+
+
+def same_aggregates(a, b):
+    ''' Confere se duas agregações (StreamAggregates) têm as mesmas células e estatísticas por entregador. '''
+    def ordenado(df, chaves):
+        return df.astype({chave: str for chave in chaves if chave != 'Order_Date'}).sort_values(chaves, ignore_index=True)
+
+    try:
+        pd.testing.assert_frame_equal(ordenado(a.cells, CUBE_DIMENSIONS), ordenado(b.cells, CUBE_DIMENSIONS), check_dtype=False)
+        pd.testing.assert_frame_equal(ordenado(a.couriers, COURIER_KEYS), ordenado(b.couriers, COURIER_KEYS), check_dtype=False)
+    except AssertionError:
+        return False
+
+    return a.rows == b.rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--path', default='train.csv', help='arquivo CSV de origem')
+    parser.add_argument('--scale', type=int, default=20, help='quantas vezes replicar o CSV')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8], help='quantidades de processos testadas')
+    parser.add_argument('--repeat', type=int, default=3, help='execuções por medição (vale a melhor)')
+    parser.add_argument('--start-method', default='fork', choices=START_METHODS, help='como os processos do pool são iniciados')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        arquivo = os.path.join(pasta, 'train_big.csv')
+        replicate_csv(args.path, args.scale, arquivo)
+        raw = pd.read_csv(arquivo)
+
+        print(f'linhas: {len(raw):,} ({args.scale}x {args.path}) | núcleos disponíveis: {os.cpu_count()}')
+        print(f'{"etapa":>22} {"processos":>10} {"tempo (s)":>10} {"ganho":>7} {"igual a 1":>10}')
+
+        metodo = args.start_method
+        etapas = {'agregação por cidade': lambda w: parallel_aggregate(arquivo, w, by='City', start_method=metodo),
+                  'agregação por data': lambda w: parallel_aggregate(arquivo, w, by='date', start_method=metodo),
+                  'limpeza por data': lambda w: parallel_clean(raw, w, start_method=metodo)}
+
+        for nome, func in etapas.items():
+            base_tempo, base = None, None
+            for workers in args.workers:
+                segundos, resultado = best_time(lambda: func(workers), args.repeat)
+                if base is None:
+                    base_tempo, base = segundos, resultado
+                if isinstance(resultado, pd.DataFrame):
+                    igual = resultado.equals(base)
+                else:
+                    igual = same_aggregates(resultado, base)
+                print(f'{nome:>22} {workers:>10} {segundos:>10.2f} {base_tempo / segundos:>6.2f}x {str(igual):>10}')
+
+
+if __name__ == '__main__':
+    main()
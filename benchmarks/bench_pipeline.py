@@ -0,0 +1,66 @@
+''' Benchmark das etapas da limpeza (utils.pipeline) em dados sintéticos.
+
+    Gera pedidos no formato do train.csv (benchmarks/synthetic.py), executa run_pipeline com um hook
+    que mede cada etapa e mostra a mediana do tempo de cada uma, o total e a vazão (linhas/s).
+
+    Uso (a partir da raiz do projeto):
+        python benchmarks/bench_pipeline.py --rows 100000 1000000 --repeat 5
+'''
+#==============================
+# Bibliotecas
+#==============================
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from synthetic import generate_orders
+from utils.data import apply_schema
+from utils.pipeline import PIPELINE_STAGES, run_pipeline
+#----------------------------------------------------------------------------------
+
+#==============================
+# Funções
+#==============================
+
+def measure_stages(raw, repeat):
+    ''' Executa a limpeza `repeat` vezes e devolve {etapa: [segundos de cada execução]} e as linhas válidas. '''
+    tempos = {nome: [] for nome, _ in PIPELINE_STAGES}
+    tempos['schema'] = []
+
+    def hook(nome, segundos, df1):
+        tempos[nome].append(segundos)
+
+    for _ in range(repeat):
+        df1 = run_pipeline(raw.copy(), hook=hook)
+        start = time.perf_counter()
+        df1 = apply_schema(df1)
+        tempos['schema'].append(time.perf_counter() - start)
+
+    return tempos, len(df1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000], help='quantidades de linhas geradas')
+    parser.add_argument('--repeat', type=int, default=5, help='execuções por tamanho')
+    parser.add_argument('--seed', type=int, default=0, help='semente do gerador de dados')
+    args = parser.parse_args()
+
+    for n_rows in args.rows:
+        raw = generate_orders(n_rows, seed=args.seed)
+        tempos, validas = measure_stages(raw, args.repeat)
+        total = np.sum([np.median(valores) for valores in tempos.values()])
+
+        print(f'\n{n_rows:,} linhas geradas, {validas:,} válidas ({args.repeat} execuções, mediana)')
+        print(f'{"etapa":>10} {"tempo (ms)":>11} {"% do total":>11}')
+        for nome, valores in tempos.items():
+            mediana = np.median(valores)
+            print(f'{nome:>10} {mediana * 1000:>11.1f} {mediana / total:>11.1%}')
+        print(f'{"total":>10} {total * 1000:>11.1f} {"":>11} {n_rows / total:,.0f} linhas/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+''' Benchmark da leitura do CSV: pd.read_csv('train.csv') x utils.data.read_orders (pyarrow, só as colunas usadas).
+
+    Para cada tamanho grava um CSV sintético (benchmarks/synthetic.py) em uma pasta temporária e mede,
+    cada leitura em um processo novo (para o pico de memória não misturar as execuções):
+    - tempo da leitura e da leitura + limpeza (run_pipeline + SCHEMA), mediana de --repeat execuções
+    - memória do DataFrame lido (memory_usage deep)
+    - pico de memória residente do processo durante a leitura, acima do que ele já usava
+
+    Uso (a partir da raiz do projeto):
+        python benchmarks/bench_read.py --rows 100000 1000000 --repeat 3
+        python benchmarks/bench_read.py --path train.csv
+'''
+#==============================
+# Bibliotecas
+#==============================
+import argparse
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+from headless import RAIZ
+from synthetic import generate_orders
+from utils.data import LOAD_COLUMNS, apply_schema, read_orders
+from utils.pipeline import run_pipeline
+#----------------------------------------------------------------------------------
+
+# leituras comparadas
+LEITORES = {
+    'pd.read_csv (todas as colunas)': pd.read_csv,
+    'read_orders (pyarrow, projeção)': read_orders,
+}
+
+#==============================
+# Funções
+#==============================
+
+def _rss_mb():
+    ''' Memória residente atual do processo em MB. '''
+    with open('/proc/self/statm') as arquivo:
+        return int(arquivo.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+
+
+def run_reader(nome, path, limpar):
+    ''' Executado em um processo novo: lê (e opcionalmente limpa) o CSV e mede tempo e memória. '''
+    antes = _rss_mb()
+    start = time.perf_counter()
+    df1 = LEITORES[nome](path)
+    if limpar:
+        df1 = apply_schema(run_pipeline(df1))
+    segundos = time.perf_counter() - start
+
+    # ru_maxrss em KB no Linux: pico do processo inteiro, descontado o que ele usava antes da leitura
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 - antes
+
+    return segundos, df1.memory_usage(deep=True).sum() / 1024 ** 2, pico, df1.shape[1]
+
+
+def measure(nome, path, limpar, repeat):
+    ''' Mediana do tempo e da memória de `repeat` leituras, cada uma em um processo novo. '''
+    contexto = multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn')
+    resultados = []
+    for _ in range(repeat):
+        with ProcessPoolExecutor(1, mp_context=contexto) as pool:
+            resultados.append(pool.submit(run_reader, nome, path, limpar).result())
+
+    segundos, frame_mb, pico_mb, colunas = np.median(np.array(resultados), axis=0)
+
+    return segundos, frame_mb, pico_mb, int(colunas)
+
+
+def report(path, repeat):
+    ''' Mostra a tabela de comparação de um CSV. '''
+    print(f'\n{path}: {os.path.getsize(path) / 1024 ** 2:,.1f} MB, {len(LOAD_COLUMNS)} colunas lidas pelo read_orders')
+    print(f'{"leitura":<34} {"etapa":<18} {"tempo (s)":>10} {"DataFrame (MB)":>15} {"pico RSS (MB)":>14} {"colunas":>8}')
+    for limpar in (False, True):
+        for nome in LEITORES:
+            segundos, frame_mb, pico_mb, colunas = measure(nome, path, limpar, repeat)
+            print(f'{nome:<34} {"leitura + limpeza" if limpar else "leitura":<18} {segundos:>10.3f} {frame_mb:>15.1f} {pico_mb:>14.1f} {colunas:>8}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000], help='quantidades de linhas geradas')
+    parser.add_argument('--path', help='CSV existente (ex.: train.csv) no lugar dos dados sintéticos')
+    parser.add_argument('--repeat', type=int, default=3, help='execuções por leitura')
+    parser.add_argument('--seed', type=int, default=0, help='semente do gerador de dados')
+    args = parser.parse_args()
+
+    if args.path:
+        report(os.path.join(RAIZ, args.path) if not os.path.isabs(args.path) else args.path, args.repeat)
+        return
+
+    with tempfile.TemporaryDirectory() as pasta:
+        for n_rows in args.rows:
+            caminho = os.path.join(pasta, f'train_{n_rows}.csv')
+            generate_orders(n_rows, seed=args.seed).to_csv(caminho, index=False)
+            report(caminho, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+''' Benchmark do backend de consultas: cubo/DataFrame em memória (pandas) x banco embutido (SQLite / DuckDB).
+
+    Para cada tamanho gera pedidos sintéticos (benchmarks/synthetic.py), monta o dataset como o app
+    e grava o banco embutido em uma pasta temporária (utils.sqldb.open_store). Cada agregação das
+    páginas é medida nos dois caminhos, já com os filtros da barra lateral: no pandas o tempo inclui
+    filtrar o cubo (ou o DataFrame), no banco os filtros vão no WHERE da consulta.
+
+    Dois cenários de filtro: 'completo' (todas as datas e condições de tráfego) e 'estreito'
+    (primeiro quarto das datas, tráfego Low e Jam). O DuckDB só é medido se estiver instalado.
+    Antes de medir, o resultado de cada agregação no banco é comparado com o do pandas
+    (assert_same): o benchmark para com AssertionError se os dois caminhos divergirem.
+
+    Uso (a partir da raiz do projeto):
+        python benchmarks/bench_sql.py --rows 1000000 --repeat 10
+        python benchmarks/bench_sql.py --rows 1000000 5000000 --engines sqlite duckdb
+'''
+#==============================
+# Bibliotecas
+#==============================
+import argparse
+import importlib.util
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+from headless import build_state
+from bench_pages import measure
+from utils import queries
+from utils.cube import filter_cube
+from utils.index import date_bounds, filter_rows
+from utils.sqldb import DB_SUFFIXES, SqlView, open_store
+from utils.topk import top_k
+#----------------------------------------------------------------------------------
+
+# agregações comparadas: (nome, função que recebe o cubo filtrado ou o SqlView, usa o DataFrame filtrado no pandas)
+AGREGACOES = [
+    ('order_metrics', lambda fonte: queries.counts(fonte, ['Order_Date']), False),
+    ('traffic_order_city', lambda fonte: queries.counts(fonte, ['City', 'Road_traffic_density']), False),
+    ('order_share_by_week', lambda fonte: (queries.counts(fonte, ['week_of_year']), queries.weekly_couriers(fonte)), False),
+    ('avg_std_time_on_traffic', lambda fonte: queries.rollup(fonte, ['City', 'Road_traffic_density']), False),
+    ('avaliações (tráfego e clima)', lambda fonte: [queries.rating_rollup(fonte, [coluna]) for coluna in ('Road_traffic_density', 'Weatherconditions')], False),
+    ('top_delivers', lambda fonte: top_k(queries.courier_max(fonte)), True),
+]
+
+# tolerância relativa na comparação: médias e desvios do banco saem de somas em float64, os do cubo de Welford
+RTOL = 1e-9
+
+#==============================
+# Funções
+#==============================
+
+def _normalized(df):
+    ''' DataFrame comparável entre os backends: categorias viram texto e o índice vira coluna, se tiver nome. '''
+    df = df.reset_index() if df.index.name is not None else df.reset_index(drop=True)
+
+    return df.astype({coluna: object for coluna in df.columns if isinstance(df[coluna].dtype, pd.CategoricalDtype)})
+
+
+def assert_same(esperado, obtido, nome):
+    ''' Confere que o resultado do banco é igual ao do pandas (DataFrames, Series e tuplas/listas deles).
+
+        Os tipos das colunas podem mudar entre os backends (categoria x texto, int32 x int64); os valores
+        e a ordem das linhas não. Médias e desvios são comparados com a tolerância RTOL.
+    '''
+    if isinstance(esperado, (tuple, list)):
+        assert len(esperado) == len(obtido), f'{nome}: {len(esperado)} resultados no pandas, {len(obtido)} no banco'
+        for i, (parte_esperada, parte_obtida) in enumerate(zip(esperado, obtido)):
+            assert_same(parte_esperada, parte_obtida, f'{nome}[{i}]')
+        return
+
+    if isinstance(esperado, pd.Series):
+        esperado, obtido = esperado.to_frame(), obtido.to_frame()
+    try:
+        pd.testing.assert_frame_equal(_normalized(esperado), _normalized(obtido), check_dtype=False, check_index_type=False, rtol=RTOL)
+    except AssertionError as erro:
+        raise AssertionError(f'{nome}: resultados diferentes entre o pandas e o banco\n{erro}') from None
+
+
+def filters(state):
+    ''' Cenários de filtro: {nome: (período (início, fim), condições de tráfego)}. '''
+    dias = [pd.Timestamp(dia).to_pydatetime() for dia in state.row_index.days]
+
+    return {'completo': (date_bounds(state.row_index), ['Low', 'Medium', 'High', 'Jam']),
+            'estreito': ((dias[0], dias[len(dias) // 4]), ['Low', 'Jam'])}
+
+
+def pandas_call(state, date_range, traffic_options, func, usa_linhas):
+    ''' Chamada do caminho em memória: filtra o cubo (ou o DataFrame) e agrega. '''
+    if usa_linhas:
+        return lambda: func(filter_rows(state.frame, state.row_index, date_range, traffic_options))
+
+    return lambda: func(filter_cube(state.cube, date_range, traffic_options))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000_000], help='quantidades de linhas geradas')
+    parser.add_argument('--repeat', type=int, default=10, help='chamadas cronometradas por agregação')
+    parser.add_argument('--seed', type=int, default=0, help='semente do gerador de dados')
+    parser.add_argument('--engines', nargs='+', default=['sqlite', 'duckdb'], choices=sorted(DB_SUFFIXES), help='bancos comparados com o pandas')
+    args = parser.parse_args()
+
+    engines = [engine for engine in args.engines if engine != 'duckdb' or importlib.util.find_spec('duckdb')]
+    if len(engines) < len(args.engines):
+        print('duckdb não instalado: medindo só', engines)
+
+    for n_rows in args.rows:
+        state = build_state(n_rows, seed=args.seed)
+        with tempfile.TemporaryDirectory() as pasta:
+            stores = {}
+            for engine in engines:
+                start = time.perf_counter()
+                stores[engine] = open_store(state.frame, (os.path.join(pasta, 'train.csv'), n_rows, args.seed, 0), engine)
+                print(f'\n{n_rows:,} linhas: banco {engine} montado em {time.perf_counter() - start:.2f} s '
+                      f'({os.path.getsize(stores[engine].path) / 1024 ** 2:.1f} MB)')
+
+            cabecalho = ''.join(f' {engine + " p50":>12} {"x pandas":>9}' for engine in engines)
+            print(f'\n{n_rows:,} linhas ({len(state.frame):,} válidas), mediana de {args.repeat} chamadas em ms')
+            print(f'{"agregação":<42} {"pandas p50":>11}' + cabecalho)
+            for cenario, (date_range, traffic_options) in filters(state).items():
+                for nome, func, usa_linhas in AGREGACOES:
+                    chamada = pandas_call(state, date_range, traffic_options, func, usa_linhas)
+                    esperado = chamada()
+                    base = np.median(measure(chamada, args.repeat)[0]) * 1000
+                    linha = f'{cenario + ": " + nome:<42} {base:>11.2f}'
+                    for engine in engines:
+                        view = SqlView(stores[engine], date_range, tuple(traffic_options))
+                        assert_same(esperado, func(view), f'{cenario}: {nome} ({engine})')
+                        tempo = np.median(measure(lambda: func(view), args.repeat)[0]) * 1000
+                        linha += f' {tempo:>12.2f} {base / tempo:>8.2f}x'
+                    print(linha)
+
+            for store in stores.values():
+                store.con.close()
+
+
+if __name__ == '__main__':
+    main()
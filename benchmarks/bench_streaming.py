@@ -0,0 +1,95 @@
+''' Benchmark da leitura em lotes (utils.streaming.ingest_csv) x leitura completa (read_csv + clean_code).
+
+    O train.csv é replicado em um arquivo temporário e cada modo roda em um processo separado,
+    para que o pico de memória (RSS máximo do processo) de um não contamine o do outro.
+
+    Uso (a partir da raiz do projeto):
+        python benchmarks/bench_streaming.py --path train.csv --scale 20 --chunksizes 50000 200000
+'''
+#==============================
+# Bibliotecas
+#==============================
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.pipeline import clean_code
+from utils.streaming import ingest_csv
+#----------------------------------------------------------------------------------
+
+#==============================
+# Funções
+#==============================
+
+def replicate_csv(path, scale, destino):
+    ''' Grava em destino o CSV de origem repetido `scale` vezes, sem montar o arquivo inteiro na memória. '''
+    df = pd.read_csv(path)
+    df.to_csv(destino, index=False)
+    for _ in range(scale - 1):
+        df.to_csv(destino, index=False, header=False, mode='a')
+
+    return None
+
+
+def peak_rss_mb():
+    ''' Pico de memória residente do processo atual em MB (ru_maxrss é em KB no Linux). '''
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def worker(mode, arquivo, chunksize):
+    ''' Executa um modo de leitura e imprime um JSON com tempo, linhas e pico de memória. '''
+    inicio_rss = peak_rss_mb()
+    start = time.perf_counter()
+    if mode == 'full':
+        rows = len(clean_code(pd.read_csv(arquivo)))
+    else:
+        rows = ingest_csv(arquivo, chunksize=chunksize).rows
+    segundos = time.perf_counter() - start
+
+    print(json.dumps({'seconds': segundos, 'rows': rows, 'peak_rss_mb': peak_rss_mb(), 'import_rss_mb': inicio_rss}))
+
+
+def run(mode, arquivo, chunksize=0):
+    ''' Roda o worker em um processo novo e devolve o JSON medido. '''
+    saida = subprocess.run([sys.executable, __file__, '--worker', mode, '--file', arquivo, '--chunksize', str(chunksize)],
+                           check=True, capture_output=True, text=True).stdout
+
+    return json.loads(saida.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--path', default='train.csv', help='arquivo CSV de origem')
+    parser.add_argument('--scale', type=int, default=20, help='quantas vezes replicar o CSV')
+    parser.add_argument('--chunksizes', type=int, nargs='+', default=[50_000, 200_000], help='tamanhos de lote testados')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    parser.add_argument('--file', help=argparse.SUPPRESS)
+    parser.add_argument('--chunksize', type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        return worker(args.worker, args.file, args.chunksize)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        arquivo = os.path.join(pasta, 'train_big.csv')
+        replicate_csv(args.path, args.scale, arquivo)
+        tamanho = os.path.getsize(arquivo) / 1024 ** 2
+
+        print(f'arquivo: {tamanho:,.0f} MB ({args.scale}x {args.path})')
+        print(f'{"modo":>16} {"linhas":>10} {"tempo (s)":>10} {"linhas/s":>12} {"pico RSS (MB)":>14}')
+
+        resultados = [('completo', run('full', arquivo))]
+        resultados += [(f'lotes {chunksize:,}', run('stream', arquivo, chunksize)) for chunksize in args.chunksizes]
+        for nome, r in resultados:
+            print(f'{nome:>16} {r["rows"]:>10} {r["seconds"]:>10.2f} {r["rows"] / r["seconds"]:>12,.0f} {r["peak_rss_mb"]:>14,.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+''' Execução das funções das páginas fora do Streamlit, para os benchmarks.
+
+    O módulo streamlit é trocado por um substituto que não desenha nada (os caches viram
+    chamadas diretas e session_state é um dicionário). As páginas são carregadas só com os
+    imports e as funções delas, sem executar o script (barra lateral e layout).
+
+    Ao ser importado, este módulo já registra o substituto e coloca a raiz do projeto no
+    sys.path: deve vir antes de qualquer import de utils.
+'''
+#==============================
+# Bibliotecas
+#==============================
+import ast
+import os
+import sys
+import types
+#----------------------------------------------------------------------------------
+
+# raiz do projeto (pasta acima de benchmarks/)
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# páginas do dashboard, na ordem do menu
+PAGINAS = {
+    'Visão Empresa': os.path.join(RAIZ, 'pages', '1_Visão_Empresa.py'),
+    'Visão Entregadores': os.path.join(RAIZ, 'pages', '2_Visão_Entregadores.py'),
+    'Visão Restaurantes': os.path.join(RAIZ, 'pages', '3_Visão_Restaurantes.py'),
+}
+
+#==============================
+# Funções
+#==============================
+
+def _noop(*args, **kwargs):
+    ''' Qualquer chamada do streamlit substituto: não faz nada. '''
+    return None
+
+
+def _passthrough(func=None, **kwargs):
+    ''' Substituto de st.cache_resource / st.cache_data, com ou sem argumentos: a função fica sem cache. '''
+    if func is None:
+        return lambda f: f
+
+    return func
+
+
+def stub_streamlit():
+    ''' Esta função registra em sys.modules um módulo streamlit que não desenha nada.
+
+        Os atributos que não existem no substituto (st.metric, st.plotly_chart, ...) viram
+        uma função que não faz nada, então os helpers de utils funcionam sem servidor.
+
+        Output: o módulo substituto
+    '''
+    if getattr(sys.modules.get('streamlit'), '__headless__', False):
+        return sys.modules['streamlit']
+
+    st = types.ModuleType('streamlit')
+    st.__headless__ = True
+    st.__getattr__ = lambda nome: _noop
+    st.cache_resource = st.cache_data = _passthrough
+    st.session_state = {}
+    st.query_params = {}
+
+    # import streamlit.components.v1 as components (Visão Empresa)
+    components = types.ModuleType('streamlit.components')
+    components.v1 = types.ModuleType('streamlit.components.v1')
+    components.v1.html = _noop
+    st.components = components
+
+    sys.modules.update({'streamlit': st, 'streamlit.components': components, 'streamlit.components.v1': components.v1})
+
+    return st
+
+
+def load_page(path):
+    ''' Esta função carrega as funções de uma página sem executar o script dela.
+
+        Ações realizadas:
+        1 - Lê o código da página
+        2 - Mantém só os imports e as definições de funções (com os decoradores)
+        3 - Executa esse código em um módulo novo
+
+        Input: caminho do arquivo da página
+        Output: módulo com as funções da página (ex.: module.order_metrics)
+    '''
+    with open(path, encoding='utf-8') as arquivo:
+        codigo = ast.parse(arquivo.read(), filename=path)
+
+    codigo.body = [no for no in codigo.body if isinstance(no, (ast.Import, ast.ImportFrom, ast.FunctionDef))]
+
+    modulo = types.ModuleType(os.path.splitext(os.path.basename(path))[0])
+    modulo.__file__ = path
+    exec(compile(codigo, path, 'exec'), modulo.__dict__)
+
+    return modulo
+
+
+def load_pages():
+    ''' Carrega todas as páginas do dashboard: {nome da página: módulo com as funções}. '''
+    return {nome: load_page(caminho) for nome, caminho in PAGINAS.items()}
+
+
+def build_state(n_rows, seed=0):
+    ''' Esta função monta o retrato do dataset (DatasetState) a partir de pedidos sintéticos.
+
+        Mesmo caminho do carregamento do app (limpeza, SCHEMA, ordenação por data, índices,
+        cubo e sketches), só que sem CSV e sem o cache em disco.
+
+        Input: quantidade de linhas geradas e semente do gerador
+        Output: DatasetState
+    '''
+    from synthetic import generate_orders
+    from utils.data import LiveDataset, apply_schema
+    from utils.index import sort_by_date
+    from utils.pipeline import run_pipeline
+
+    df1 = sort_by_date(apply_schema(run_pipeline(generate_orders(n_rows, seed=seed))))
+
+    return LiveDataset(df1, ('synthetic', n_rows, seed)).state
+
+
+# o substituto precisa estar em sys.modules antes de utils.data / utils.instrument importarem o streamlit
+stub_streamlit()
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
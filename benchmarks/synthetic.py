@@ -0,0 +1,97 @@
+''' Gerador de pedidos sintéticos no mesmo formato do train.csv (textos com espaços, 'NaN ', '(min) 24', ...).
+
+    As distribuições de cidade, tráfego, clima, festival, veículo e as faixas de latitude/longitude
+    seguem as do dataset original, então a limpeza e os gráficos trabalham como nos dados reais.
+'''
+#==============================
+# Bibliotecas
+#==============================
+import numpy as np
+import pandas as pd
+#----------------------------------------------------------------------------------
+
+# valores (como aparecem no CSV) e proporções de cada coluna categórica
+CIDADES = {'Metropolitian ': 0.746, 'Urban ': 0.224, 'Semi-Urban ': 0.004, 'NaN ': 0.026}
+TRAFEGO = {'Low ': 0.34, 'Jam ': 0.31, 'Medium ': 0.24, 'High ': 0.10, 'NaN ': 0.01}
+CLIMA = {'conditions Fog': 0.17, 'conditions Stormy': 0.165, 'conditions Cloudy': 0.165, 'conditions Sandstorms': 0.165,
+         'conditions Windy': 0.165, 'conditions Sunny': 0.157, 'conditions NaN': 0.013}
+FESTIVAL = {'No ': 0.975, 'Yes ': 0.02, 'NaN ': 0.005}
+PEDIDOS = {'Snack ': 0.25, 'Meal ': 0.25, 'Drinks ': 0.25, 'Buffet ': 0.25}
+VEICULOS = {'motorcycle ': 0.584, 'scooter ': 0.334, 'electric_scooter ': 0.081, 'bicycle ': 0.001}
+
+# minutos a mais no tempo de entrega por condição de tráfego
+ATRASO_TRAFEGO = {'Low ': 0, 'Medium ': 5, 'High ': 6, 'Jam ': 10, 'NaN ': 0}
+
+# período dos pedidos e faixa das coordenadas dos restaurantes (Índia)
+DATA_INICIO, DIAS = pd.Timestamp('2022-02-11'), 55
+LATITUDES, LONGITUDES = (9.0, 31.0), (72.0, 88.5)
+
+# fração de linhas com 'NaN ' nas colunas numéricas em texto
+FRACAO_NAN = 0.04
+
+#==============================
+# Funções
+#==============================
+
+def _pick(rng, opcoes, n):
+    ''' Sorteia n valores de um dicionário {valor: proporção}. '''
+    valores = np.array(list(opcoes), dtype=object)
+    pesos = np.array(list(opcoes.values()))
+
+    return valores[rng.choice(len(valores), n, p=pesos / pesos.sum())]
+
+
+def _with_nan(rng, valores, fracao):
+    ''' Texto dos valores, trocando uma fração deles por 'NaN ' como no CSV original. '''
+    texto = valores.astype(str).astype(object)
+    texto[rng.random(len(texto)) < fracao] = 'NaN '
+
+    return texto
+
+
+def generate_orders(n_rows, seed=0, n_couriers=1300):
+    ''' Esta função gera um DataFrame de pedidos sintéticos com as colunas e os formatos do train.csv.
+
+        Input: quantidade de linhas, semente do gerador e quantidade de entregadores distintos
+        Output: DataFrame "sujo", pronto para passar pela limpeza (utils.pipeline)
+    '''
+    rng = np.random.default_rng(seed)
+    n = n_rows
+
+    trafego = _pick(rng, TRAFEGO, n)
+    atraso = pd.Series(trafego).map(ATRASO_TRAFEGO).to_numpy()
+    tempo = np.clip(rng.normal(24, 8, n).round() + atraso, 10, 54).astype(int)
+
+    lat = rng.uniform(*LATITUDES, n).round(6)
+    lon = rng.uniform(*LONGITUDES, n).round(6)
+    entregadores = np.array([f'CITY{i // 60:02d}RES{i % 20:02d}DEL{i % 3 + 1:02d} ' for i in range(n_couriers)], dtype=object)
+    minuto = rng.integers(8 * 60, 23 * 60, n)
+    coleta = minuto + rng.choice([5, 10, 15], n)
+
+    # textos formatados uma vez por valor distinto (dias, minutos do dia, tempos)
+    datas = pd.date_range(DATA_INICIO, periods=DIAS).strftime('%d-%m-%Y').to_numpy(dtype=object)
+    horarios = np.array([f'{m // 60 % 24:02d}:{m % 60:02d}:00' for m in range(24 * 60 + 15)], dtype=object)
+    tempos = np.array([f'(min) {t}' for t in range(55)], dtype=object)
+
+    return pd.DataFrame({
+        'ID': np.array([f'0x{i:x} ' for i in range(n)], dtype=object),
+        'Delivery_person_ID': entregadores[rng.integers(0, n_couriers, n)],
+        'Delivery_person_Age': _with_nan(rng, rng.integers(20, 40, n), FRACAO_NAN),
+        'Delivery_person_Ratings': _with_nan(rng, np.clip(rng.normal(4.63, 0.33, n), 1, 5).round(1), FRACAO_NAN),
+        'Restaurant_latitude': lat,
+        'Restaurant_longitude': lon,
+        'Delivery_location_latitude': (lat + rng.uniform(0.01, 0.15, n)).round(6),
+        'Delivery_location_longitude': (lon + rng.uniform(0.01, 0.15, n)).round(6),
+        'Order_Date': datas[rng.integers(0, DIAS, n)],
+        'Time_Orderd': horarios[minuto],
+        'Time_Order_picked': horarios[coleta],
+        'Weatherconditions': _pick(rng, CLIMA, n),
+        'Road_traffic_density': trafego,
+        'Vehicle_condition': rng.integers(0, 4, n),
+        'Type_of_order': _pick(rng, PEDIDOS, n),
+        'Type_of_vehicle': _pick(rng, VEICULOS, n),
+        'multiple_deliveries': _with_nan(rng, rng.choice([0, 1, 2, 3], n, p=[0.31, 0.62, 0.05, 0.02]), 0.02),
+        'Festival': _pick(rng, FESTIVAL, n),
+        'City': _pick(rng, CIDADES, n),
+        'Time_taken(min)': tempos[tempo],
+    })
@@ -4,10 +4,21 @@
 import pandas as pd
 import plotly.express as px
 import streamlit as st
-from datetime import datetime
 from PIL import Image
+from utils.cube import filter_cube
+from utils.data import PAGE_COLUMNS, load_dataset
+from utils.hll import error_bound, weekly_distinct
+from utils.bitmap import CROSS_FILTERS, active_filters, column_values
+from utils.index import date_bounds, filter_rows
+from utils.diagnostics import diagnostics_panel
+from utils.instrument import plotly_chart, timer
+from utils.memo import cached_chart, filter_state
+from utils.prefix import range_totals
+from utils.queries import counts, sql_view, weekly_couriers
 import folium
-from streamlit_folium import folium_static
+from folium.plugins import FastMarkerCluster, HeatMap
+import numpy as np
+import streamlit.components.v1 as components
 #----------------------------------------------------------------------------------
 
 # Configuração da página
@@ -17,41 +28,61 @@ st.set_page_config(page_title='Visão Empresa', layout='wide')
 # Funções
 #==============================
 
-def country_maps(df1):
-  ''' Esta função tem como objetivo criar um mapa e marcar com pontos a localização central de cada cidade por tipo de tráfego.
+def country_maps(df1, mode):
+  ''' Esta função tem como objetivo criar um mapa com a localização das entregas e devolver o HTML dele.
+
+      Modos:
+      - 'Cidades': ponto central de cada cidade por tipo de tráfego (mediana), todos os marcadores
+                   em uma única camada GeoJSON com popup
+      - 'Restaurantes': localização de cada restaurante, agrupada em clusters no navegador (FastMarkerCluster)
+      - 'Entregas': mapa de calor dos locais de entrega, com os pontos próximos somados em um peso
 
       Ações realizadas:
-      1 - Seleciona as coluna do DataFrame as erem utilizadas
-          - dados de latitude, longitude, cidade e condições de tráfego
-      2 - Agrupa estes dados por cidade e por condição de tráfego
-      3 - Calcula a localização central em cada cidade para cada condição de tráfego utilizando a mediana
-      4 - Cria o mapa e este vai iniciar centralizado no ponto médio dos dados de latitude e longitude do DataFrame
-      5 - Cria os marcadores e adiciona eles no mapa
-      6 - Retorna o mapa com os pontos marcados
-  
-      Input: DataFrame
-      Output: Mapa com pontos marcados
+      1 - Agrega as coordenadas de acordo com o modo (mediana, restaurantes distintos ou grade de entregas)
+      2 - Cria o mapa centralizado no ponto médio dos dados de latitude e longitude agregados
+      3 - Adiciona todos os pontos de uma vez em uma única camada
+      4 - Retorna o HTML do mapa, pronto para ser exibido (e guardado em cache)
+
+      Input: DataFrame e modo do mapa
+      Output: HTML do mapa, ou None se os filtros não deixarem entregas (não há ponto para centralizar o mapa)
   '''
-  df_aux = df1.loc[:, ['Delivery_location_latitude', 'Delivery_location_longitude', 'City', 'Road_traffic_density']].groupby(['City', 'Road_traffic_density']).median().reset_index()
-  
+  if mode == 'Cidades':
+    df_aux = df1.loc[:, ['Delivery_location_latitude', 'Delivery_location_longitude', 'City', 'Road_traffic_density']].groupby(['City', 'Road_traffic_density'], observed=True).median().reset_index()
+    lat, lon = df_aux['Delivery_location_latitude'], df_aux['Delivery_location_longitude']
+  elif mode == 'Restaurantes':
+    # restaurantes distintos (coordenadas com 4 casas, ~10 m)
+    df_aux = df1.loc[:, ['Restaurant_latitude', 'Restaurant_longitude']].round(4).drop_duplicates()
+    lat, lon = df_aux['Restaurant_latitude'], df_aux['Restaurant_longitude']
+  else:
+    # entregas somadas em uma grade de 3 casas decimais (~100 m): o peso é a quantidade de entregas
+    df_aux = df1.loc[:, ['Delivery_location_latitude', 'Delivery_location_longitude']].round(3).value_counts().reset_index()
+    lat, lon = df_aux['Delivery_location_latitude'], df_aux['Delivery_location_longitude']
+
+  if df_aux.empty:
+    return None
+
   # desenhando o mapa
-  # inicia centralizado no ponto médio dos dados de latitude e longitude dados pelo DataFrame
+  # inicia centralizado no ponto médio dos dados de latitude e longitude agregados
   # zoom_start = 7 para mostrar todos os pontos na tela á inicialmente
-  map = folium.Map([df_aux['Delivery_location_latitude'].median(), df_aux['Delivery_location_longitude'].median()], zoom_start=7)
-
-  for index, location_info in df_aux.iterrows():
+  map = folium.Map([float(lat.median()), float(lon.median())], zoom_start=7)
 
-    popup_text = '<b> City: </b>' + location_info['City'] + '<br>' + '<b> Traffic: </b>' + location_info['Road_traffic_density']
-    
-    folium.Marker([location_info['Delivery_location_latitude'],
-                    location_info['Delivery_location_longitude']],
-                    popup=folium.Popup(popup_text, max_width=100)).add_to(map)
+  if mode == 'Cidades':
+    # todos os marcadores em uma única camada GeoJSON, com o popup montado pelo próprio Leaflet
+    features = [{'type': 'Feature',
+                 'geometry': {'type': 'Point', 'coordinates': [float(x), float(y)]},
+                 'properties': {'City': str(city), 'Road_traffic_density': str(traffic)}}
+                for y, x, city, traffic in zip(lat, lon, df_aux['City'], df_aux['Road_traffic_density'])]
+    folium.GeoJson({'type': 'FeatureCollection', 'features': features},
+                   popup=folium.GeoJsonPopup(fields=['City', 'Road_traffic_density'], aliases=['City:', 'Traffic:'])).add_to(map)
+  elif mode == 'Restaurantes':
+    FastMarkerCluster(np.column_stack([lat, lon]).tolist()).add_to(map)
+  else:
+    HeatMap(np.column_stack([lat, lon, df_aux['count']]).tolist(), radius=12).add_to(map)
 
-  folium_static(map, width=1024, height=600)
-  return None
+  return folium.Figure().add_child(map).render()
 
 
-def order_share_by_week(df1):
+def order_share_by_week(cube, couriers=None):
   ''' Esta função tem como objetivo a contsrução de um gráfioco de linhas que mostre o número de entregas feitas por cada entregador por semana.
 
       Ações realizadas:
@@ -61,14 +92,21 @@ def order_share_by_week(df1):
       4 - Faz o cálculo da quantidad de entregas por entregador e armazena em uma nova coluna
       5 - Faz um gráfico de linhas com os dados obtidos
 
-      Input: DataFrame
+      Input:
+        - cube: Cubo diário (DailyCube) já filtrado, ou SqlView
+        - couriers: pares (semana, entregadores) estimados pelos sketches HyperLogLog;
+                    None para contar os entregadores únicos de forma exata (pares do cubo ou COUNT DISTINCT no banco)
       Output: Gráfico de linhas
   '''
+  # as células do cubo já trazem a semana do ano (week_of_year, inteiro)
   # será preciso fazer em dois passos
   # 1 - calcular a quantidade de pedidos por semana
-  df_aux1 = df1.loc[:, ['ID', 'week_of_year']].groupby(['week_of_year']).count().reset_index()
+  df_aux1 = counts(cube, ['week_of_year'])
   # 2 - calcular a quantidade de entregadores únicos por semana
-  df_aux2 = df1.loc[:, ['Delivery_person_ID', 'week_of_year']].groupby(['week_of_year']).nunique().reset_index()
+  if couriers is None:
+    df_aux2 = weekly_couriers(cube).reset_index()
+  else:
+    df_aux2 = pd.DataFrame(list(couriers), columns=['week_of_year', 'entregadores'])
   # 3 - juntando od DataFrames criados
   df_aux = pd.merge(df_aux1, df_aux2, how='inner')
   df_aux.columns = ['semana', 'qnt_entregas', 'entregadores']
@@ -81,23 +119,21 @@ def order_share_by_week(df1):
   return fig
 
 
-def order_by_week(df1):
+def order_by_week(cube):
   ''' Esta função tem como objetivo a contrução de um gráfico de linhas que mostre a quantidade de entregas realizadas por semana.
 
       Ações realizadas:
-      1 - Cria a coluna Semana no DataFrame
-      2 - Seleciona as colunas que contém as informações de ID de entrega e Semana
-      3 - Agrupa as entregas por semana e conta a quantidade em cada semana
-      4 - Renomeia as colunas do DataFrame resultantes
-      5 - Cria um gráfico de linhas com os dados obtidos
+      1 - Usa a semana do ano (week_of_year) das células do cubo
+      2 - Agrupa as células por semana e soma a quantidade de entregas de cada semana
+      3 - Renomeia as colunas do DataFrame resultantes
+      4 - Cria um gráfico de linhas com os dados obtidos
 
-      Input: DataFrame
+      Input: Cubo diário (DailyCube) já filtrado, ou SqlView
       Output: Gráfico de linhas
   '''
 
-  # criando coluna das semanas
-  df1['week_of_year'] = df1['Order_Date'].dt.strftime('%U')
-  df_aux = df1.loc[:, ['ID', 'week_of_year']].groupby(['week_of_year']).count().reset_index()
+  # contagens semanais a partir das células diárias: o custo depende das células, não dos pedidos
+  df_aux = counts(cube, ['week_of_year'])
   # renomeando as colunas
   df_aux.columns = ['week_of_year', 'qnt_entregas_semana']
   # criando o gráfico de barras
@@ -106,23 +142,23 @@ def order_by_week(df1):
   return fig
 
 
-def traffic_order_city( df1 ):
+def traffic_order_city( totals ):
   ''' Esta função tem como objetivo a construção de um gráfico de barras agrupadas que mostre a porcentagem das entregas feitas em cada condição de tráfego em cad cidade.
 
       Ações realizadas:
-      1 - Seleciona as colunas do DataFrame que contém as informações a serem utilizadas
-          - ID das entregas, City e condições de tráfego
-      2 - Agrupa as infomações por cidade e por condição de tráfego e conta
+      1 - Seleciona as colunas dos totais do período que contém as informações a serem utilizadas
+          - quantidade de entregas, City e condições de tráfego
+      2 - Agrupa as infomações por cidade e por condição de tráfego e soma as quantidades
       3 - Renomeia as colunas do DataFrame obtido
       4 - Calcula a porcentagem das entregas em cada situação
       5 - Cria um gráfico de coluna agrupadas com os dados obtidos
       
-      Input: DataFrame
+      Input: Totais do período por cidade e tráfego (RangeTotals), ou SqlView
       Output: Gráfico de barras agrupadas
   
   '''
   # seleção de linhas
-  df_aux = df1.loc[:, ['ID', 'City', 'Road_traffic_density']].groupby(['City', 'Road_traffic_density']).count().reset_index()
+  df_aux = counts(totals, ['City', 'Road_traffic_density'])
   # mudando nome das colunas
   df_aux.columns = ['City', 'Road_traffic_density', 'qnt_entregas']
   # encontrando as % de cada situação
@@ -133,21 +169,21 @@ def traffic_order_city( df1 ):
   return fig
 
 
-def traffic_order_share(df1):
+def traffic_order_share(totals):
   ''' Esta função tem como objetivo montar um gráfico de pizza com as porcentegens das entregas que foram realizadas em cada condição de tráfego
 
       Ações realizadas:
-      1 - Seleciona as colunas com as informações necessárias
-          - ID da entregas e condições de tráfego
-      2 - Agrupa os dados por condição de tráfego e conta quantas entregas foram feitas em cada situação
+      1 - Seleciona as colunas dos totais do período com as informações necessárias
+          - quantidade de entregas e condições de tráfego
+      2 - Agrupa os dados por condição de tráfego e soma quantas entregas foram feitas em cada situação
       3 - Calcula a porcentagem de entregas em cada situação
       4 - Monta o gráfico com os dados obtidos
 
-      Input: DataFrame
+      Input: Totais do período por cidade e tráfego (RangeTotals), ou SqlView
       Output: Gráfico de pizza
   '''
   # seleção de linhas
-  df_aux = df1.loc[:, ['ID', 'Road_traffic_density']].groupby(['Road_traffic_density']).count().reset_index()
+  df_aux = counts(totals, ['Road_traffic_density'])
   # trocando nomes das colunas
   df_aux.columns = ['condicao_trafego', 'qnt_entregas']
   # craindo a nova coluna
@@ -158,21 +194,21 @@ def traffic_order_share(df1):
   return fig
 
 
-def order_metrics( df1 ):
+def order_metrics( cube ):
   ''' Esta função tem como objetivo construir um gráfico de barras que mostre a quantidade de entregas realizadas por dia
 
       Ações realizadas:
-      1 - Seleciona as colunas do DatFrame com os dados necessários
-          - ID da entrega e data
-      2 - Agrupa os dados por data e conta quantas entregas foram feitas em cada data
+      1 - Seleciona as colunas do cubo com os dados necessários
+          - quantidade de entregas e data
+      2 - Agrupa os dados por data e soma quantas entregas foram feitas em cada data
       3 - Renomeia as coluna do DataFrame obtido
       4 - Monta o gráfico de barras com os dados obtidos
 
-      Input: DataFrame
+      Input: Cubo diário (DailyCube) já filtrado, ou SqlView
       Output: Gráfico de barras
   '''
   # seleção de linhas
-  df_aux = df1.loc[:, ['ID', 'Order_Date']].groupby(['Order_Date']).count().reset_index()
+  df_aux = counts(cube, ['Order_Date'])
   # nomeando as colunas do DataFrame resultante para ficar melhor de interpretar o resultado
   df_aux.columns = ['order_date', 'qtd_entregas']
   # criando o gráfico de barras
@@ -182,70 +218,15 @@ def order_metrics( df1 ):
   return fig
 
 
-# limpeza dos dados
-def clean_code(df1):
-  """ Esta função tem a responsabilidade de limpar o dataframe
-  
-      Tipos de limpeza:
-      1. Remoção dos dados NaN
-      2. Mudança do tipo da coluna de dados
-      3. Remoção dos espaços das variáveis de texto
-      4. Formatação coluna de datas
-      5. Limpeza da colun ade tempo (remoção do texto da varoável numérica)
-
-      Input: DataFrame
-      Output: DataFrame
-
-  """
-  # 1 - removendo linhas com NaN
-  linhas_selecionadas = (df1['Delivery_person_Age'] != 'NaN ')
-  df1 = df1.loc[linhas_selecionadas, :].copy()
-  linhas_selecionadas = (df1['multiple_deliveries'] != 'NaN ')
-  df1 = df1.loc[linhas_selecionadas, :].copy()
-  linhas_selecionadas = (df1['Road_traffic_density'] != 'NaN ')
-  df1 = df1.loc[linhas_selecionadas, :].copy()
-  linhas_selecionadas = (df1['City'] != 'NaN ')
-  df1 = df1.loc[linhas_selecionadas, :].copy()
-  linhas_selecionadas = (df1['Festival'] != 'NaN ')
-  df1 = df1.loc[linhas_selecionadas, :].copy()
-
-  # 2 - convertendo o tipo de texto para numero
-  df1['Delivery_person_Age'] = df1['Delivery_person_Age'].astype(int)
-  df1['multiple_deliveries'] = df1['multiple_deliveries'].astype(int)  
-
-  # 3 - convertendo a coluna Ratings de texto para numero decimal (float)
-  df1['Delivery_person_Ratings'] = df1['Delivery_person_Ratings'].astype(float)  
-
-  # 4 - convertendo a coluna order_date de texto para data
-  df1['Order_Date'] = pd.to_datetime(df1['Order_Date'], format='%d-%m-%Y')  
-
-  # 5 - removendo os espaços dentro de strings/texto/object
-  df1.loc[:, 'ID'] = df1.loc[:, 'ID'].str.strip()
-  df1.loc[:, 'Road_traffic_density'] = df1.loc[:, 'Road_traffic_density'].str.strip()
-  df1.loc[:, 'Type_of_order'] = df1.loc[:, 'Type_of_order'].str.strip()
-  df1.loc[:, 'Type_of_vehicle'] = df1.loc[:, 'Type_of_vehicle'].str.strip()
-  df1.loc[:, 'City'] = df1.loc[:, 'City'].str.strip()
-  df1.loc[:, 'Festival'] = df1.loc[:, 'Festival'].str.strip() 
-
-  # 6 - limpando a coluna de Time_taken
-  df1['Time_taken(min)'] = df1['Time_taken(min)'].apply(lambda x: x.split('(min) ')[1])
-  # transformando em numero interiro
-  df1['Time_taken(min)'] = df1['Time_taken(min)'].astype(int)
-
-  return df1
-
 #==================================================================================
 
 #------------------------- Início da Estrutura Lógica do código -------------------
 
-# import dataset
-df = pd.read_csv('train.csv')
-
-# fazendo uma cópia do DataFrame
-df1 = df.copy()
-
-# Limpando os dados
-df1 = clean_code(df1)
+# import dataset: DataFrame limpo (só com as colunas da página), índices de data/tráfego e cubo diário,
+# todos da mesma versão dos dados (em cache e compartilhados entre as sessões)
+with timer('carregamento dos dados'):
+    dataset = load_dataset(columns=PAGE_COLUMNS['Visão Empresa'])
+df1, row_index, cube = dataset.frame, dataset.row_index, dataset.cube
 
 #----------------------------------------------------------------------------------
 
@@ -266,13 +247,17 @@ st.sidebar.markdown('## Fastest Delivery in Town')
 st.sidebar.divider()
 
 # slide de seleção de datas
-st.sidebar.markdown('Selecione uma data limite')
+st.sidebar.markdown('Selecione o período')
+
+# limites vêm dos dados, então acompanham os pedidos acrescentados
+data_inicio, data_fim = date_bounds(row_index)
 
-date_slider = st.sidebar.slider(
-    'Até qual valor?',
-    value=datetime(2022, 4, 6),
-    min_value=datetime(2022, 2, 11),
-    max_value=datetime(2022, 4, 6),
+# período: do início (inclusive) até o fim (exclusive)
+date_range = st.sidebar.slider(
+    'Qual período?',
+    value=(data_inicio, data_fim),
+    min_value=data_inicio,
+    max_value=data_fim,
     format='DD-MM-YYYY')
 st.sidebar.divider()
 
@@ -281,6 +266,26 @@ traffic_options = st.sidebar.multiselect(
     'Quais as condições do trânsito',
     ['Low', 'Medium', 'High', 'Jam'],
     default=['Low', 'Medium', 'High', 'Jam'])
+
+# filtros cruzados (cidade, clima, veículo, tipo de pedido e festival): opções vêm dos dados, resolvidas no índice bitmap
+with st.sidebar.expander('Mais filtros'):
+    selecoes = {}
+    for coluna, rotulo in CROSS_FILTERS.items():
+        valores = column_values(row_index.bitmaps, coluna)
+        selecoes[coluna] = st.multiselect(rotulo, valores, default=valores)
+
+# só os filtros que restringem as linhas (nem todos os valores selecionados)
+filters = active_filters(row_index.bitmaps, selecoes)
+st.sidebar.divider()
+
+# entregadores únicos: contagem exata ou estimada pelos sketches HyperLogLog
+exact_couriers = st.sidebar.toggle('Contagem exata de entregadores', value=True,
+                                   help=f'Desligado: estimativa por HyperLogLog, erro padrão de ±{error_bound():.1%}')
+if not exact_couriers and filters:
+    # os sketches só separam dia e condição de tráfego
+    st.sidebar.caption('Com os filtros cruzados a contagem de entregadores é exata')
+elif not exact_couriers:
+    st.sidebar.caption(f'Entregadores estimados (HyperLogLog): erro padrão de ±{error_bound():.1%}')
 st.sidebar.divider()
 
 # rodapé
@@ -292,13 +297,30 @@ st.sidebar.markdown('Matheus Maranho Baumguertner')
 # Filtros
 #========================
 
-# slider de data
-linhas_selecionadas = df1['Order_Date'] < date_slider
-df1 = df1.loc[linhas_selecionadas, :]
+# período e filtros: busca binária nas datas + AND/OR dos bitmaps dos valores selecionados
+with timer('filtro das linhas'):
+    df1 = filter_rows(df1, row_index, date_range, traffic_options, filters)
+
+# mesmos filtros no cubo
+with timer('filtro do cubo'):
+    cube = filter_cube(cube, date_range, traffic_options, filters)
 
-# filtro de trânsito
-linhas_selecionadas = df1['Road_traffic_density'].isin(traffic_options)
-df1 = df1.loc[linhas_selecionadas, :]
+# totais do período por cidade e condição de tráfego: diferença de duas posições das somas acumuladas por dia
+# (as somas não separam as colunas dos filtros cruzados: com eles, os totais saem do cubo filtrado)
+with timer('totais do período'):
+    if filters:
+        totals = cube
+    else:
+        totals = range_totals(dataset.prefix, date_range, traffic_options)
+
+# backend opcional (QUERY_BACKEND=sqlite ou duckdb): as agregações do cubo e dos totais viram consultas
+# no banco embutido, com os mesmos filtros no WHERE
+view = sql_view(dataset, date_range, traffic_options, filters)
+if view is not None:
+    cube = totals = view
+
+# estado dos filtros: chave do cache dos gráficos, compartilhado entre as sessões
+state = filter_state(dataset.version, date_range, traffic_options, filters)
 
 
 #=================================================================================
@@ -307,16 +329,18 @@ df1 = df1.loc[linhas_selecionadas, :]
 # Layout Streamlit
 #========================
 
-# criação das abas (tabs)
-tab1, tab2, tab3 = st.tabs(['Visão Gerencial', 'Visão Tática', 'Visão Geográfica'])
+# seleção da visão no lugar das abas (tabs): o st.tabs executa o conteúdo de todas as abas
+# a cada interação, aqui só a visão escolhida tem os gráficos calculados e desenhados
+visao = st.radio('Visão', ['Visão Gerencial', 'Visão Tática', 'Visão Geográfica'], horizontal=True, label_visibility='collapsed', key='empresa_view')
 
-# criando conteúdo da tab1
-with tab1:
+# criando conteúdo da visão gerencial
+if visao == 'Visão Gerencial':
+  with timer('visão gerencial'):
     with st.container():
       # Order Metrics
       st.markdown('# Orders by Day')
-      fig = order_metrics( df1 )
-      st.plotly_chart(fig, use_container_width=True)
+      fig = cached_chart(order_metrics, state, cube)
+      plotly_chart(fig, use_container_width=True)
 
     #criando conteiner para as colunas
     with st.container():
@@ -326,36 +350,56 @@ with tab1:
       # conteúdo coluna 1
       with col1:
         st.header('Traffic Order Share')
-        fig = traffic_order_share (df1)
+        fig = cached_chart(traffic_order_share, state, totals)
         # mostrando o gráfico
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(fig, use_container_width=True)
         
       # conteúdo coluna 2
       with col2:
         st.header('Traffic Order City')
-        fig = traffic_order_city( df1 )
+        fig = cached_chart(traffic_order_city, state, totals)
         # mostrando o gráfico
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(fig, use_container_width=True)
 
 
-# criando conteúdo da tab2
-with tab2:
+# criando conteúdo da visão tática
+elif visao == 'Visão Tática':
+  with timer('visão tática'):
     with st.container():
       st.markdown('# Order by Week')
-      fig = order_by_week(df1)
+      fig = cached_chart(order_by_week, state, cube)
       # mostrando o grafico
-      st.plotly_chart(fig, use_container_width=True)
+      plotly_chart(fig, use_container_width=True)
 
 
     with st.container():
       st.markdown('# Order Share by Week')
-      fig = order_share_by_week(df1)
+      if exact_couriers or filters:
+        fig = cached_chart(order_share_by_week, state, cube)
+      else:
+        # os sketches das semanas são combinados em microssegundos; o resultado (hashable) entra na chave do cache
+        couriers = tuple(weekly_distinct(dataset.sketches, date_range, traffic_options).items())
+        fig = cached_chart(order_share_by_week, state, cube, couriers)
       # mostrando o grafico
-      st.plotly_chart(fig, use_container_width=True)    
+      plotly_chart(fig, use_container_width=True)    
+
 
+# criando conteúdo da visão geográfica
+elif visao == 'Visão Geográfica':
+  # modo do mapa: centros das cidades (padrão) ou pontos individuais agrupados / mapa de calor
+  mode = st.radio('Mapa', ['Cidades', 'Restaurantes', 'Entregas'], horizontal=True, key='empresa_map_mode',
+                  captions=['Mediana por cidade e tráfego', 'Restaurantes agrupados', 'Mapa de calor das entregas'])
 
-# criando conteúdo da tab3
-with tab3:
-    country_maps(df1)
+  with timer('visão geográfica'):
+    # o HTML do mapa fica em cache por estado dos filtros e modo
+    html = cached_chart(country_maps, state, df1, mode)
+    if html is None:
+      st.info('Nenhuma entrega no período e nos filtros selecionados.')
+    else:
+      with timer('folium (render)'):
+        components.html(html, width=1024, height=610)
+
+#=================================================================================
 
-#=================================================================================
\ No newline at end of file
+# painel de diagnóstico (escondido, aparece com ?diagnostics=1 na URL)
+diagnostics_panel('Visão Empresa')
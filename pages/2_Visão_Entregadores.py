@@ -1,10 +1,19 @@
 #===============================
 # Bibliotecas
 #===============================
-import pandas as pd
 import streamlit as st
-from datetime import datetime
 from PIL import Image
+from utils.cube import filter_cube
+from utils.data import PAGE_COLUMNS, load_dataset
+from utils.bitmap import CROSS_FILTERS, active_filters, column_values
+from utils.index import date_bounds, filter_rows, selects_all
+from utils.diagnostics import diagnostics_panel
+from utils.instrument import timer
+from utils.kpi import courier_kpis
+from utils.memo import cached_chart, filter_state
+from utils.prefix import range_totals
+from utils.queries import courier_max, rating_rollup, sql_view
+from utils.topk import top_k
 #----------------------------------------------------------------------------------
 
 # Configuração da página
@@ -15,94 +24,28 @@ st.set_page_config(page_title='Visão Entregadores', layout='wide')
 #==============================
 
 
-def top_delivers(df1, top_asc):
-    ''' Esta função tem como obejtivo encontrar os entregadores mais rápidos e os mais lentos
+def top_delivers(df1):
+    ''' Esta função tem como obejtivo encontrar os entregadores mais rápidos e os mais lentos de cada cidade
 
         Parâmetros:
             Input: 
-                - df1: DataFrame com is dados necessários para o cálculo
-                - top_asc: True ou False para a ordenação em ordem ascendente, crescente
-                            - True: retorna os mais rápidos, com menores tempo
-                            - False: retorna os mais lentos, com maiores tempos               
-            Output: DataFrame
+                - df1: DataFrame com is dados necessários para o cálculo (ou SqlView, com o banco embutido)
+            Output: TopCouriers com dois DataFrames, calculados de uma só vez
+                - fastest: os mais rápidos, com menores tempos
+                - slowest: os mais lentos, com maiores tempos
     '''
-    df2 = (df1.loc[:, ['Time_taken(min)', 'City', 'Delivery_person_ID']]
-        .groupby(['City', 'Delivery_person_ID'])
-        .max()
-        .sort_values(['City', 'Time_taken(min)'], ascending= top_asc).reset_index())
-    
-    df_aux1 = df2.loc[ df2['City'] == 'Metropolitian', :].head(10)
-    df_aux2 = df2.loc[ df2['City'] == 'Urban', :].head(10)
-    df_aux3 = df2.loc[ df2['City'] == 'Semi-Urban', :].head(10)
-    df3 = pd.concat([df_aux1, df_aux2,df_aux3]).reset_index(drop=True)
-
-    return df3
-
-
-# limpeza dos dados
-def clean_code(df1):
-  """ Esta função tem a responsabilidade de limpar o dataframe
-  
-      Tipos de limpeza:
-      1. Remoção dos dados NaN
-      2. Mudança do tipo da coluna de dados
-      3. Remoção dos espaços das variáveis de texto
-      4. Formatação coluna de datas
-      5. Limpeza da colun ade tempo (remoção do texto da varoável numérica)
-
-      Input: DataFrame
-      Output: DataFrame
-
-  """
-  # 1 - removendo linhas com NaN
-  linhas_selecionadas = (df1['Delivery_person_Age'] != 'NaN ')
-  df1 = df1.loc[linhas_selecionadas, :].copy()
-  linhas_selecionadas = (df1['multiple_deliveries'] != 'NaN ')
-  df1 = df1.loc[linhas_selecionadas, :].copy()
-  linhas_selecionadas = (df1['Road_traffic_density'] != 'NaN ')
-  df1 = df1.loc[linhas_selecionadas, :].copy()
-  linhas_selecionadas = (df1['City'] != 'NaN ')
-  df1 = df1.loc[linhas_selecionadas, :].copy()
-  linhas_selecionadas = (df1['Festival'] != 'NaN ')
-  df1 = df1.loc[linhas_selecionadas, :].copy()
-
-  # 2 - convertendo o tipo de texto para numero
-  df1['Delivery_person_Age'] = df1['Delivery_person_Age'].astype(int)
-  df1['multiple_deliveries'] = df1['multiple_deliveries'].astype(int)  
-
-  # 3 - convertendo a coluna Ratings de texto para numero decimal (float)
-  df1['Delivery_person_Ratings'] = df1['Delivery_person_Ratings'].astype(float)  
-
-  # 4 - convertendo a coluna order_date de texto para data
-  df1['Order_Date'] = pd.to_datetime(df1['Order_Date'], format='%d-%m-%Y')  
-
-  # 5 - removendo os espaços dentro de strings/texto/object
-  df1.loc[:, 'ID'] = df1.loc[:, 'ID'].str.strip()
-  df1.loc[:, 'Road_traffic_density'] = df1.loc[:, 'Road_traffic_density'].str.strip()
-  df1.loc[:, 'Type_of_order'] = df1.loc[:, 'Type_of_order'].str.strip()
-  df1.loc[:, 'Type_of_vehicle'] = df1.loc[:, 'Type_of_vehicle'].str.strip()
-  df1.loc[:, 'City'] = df1.loc[:, 'City'].str.strip()
-  df1.loc[:, 'Festival'] = df1.loc[:, 'Festival'].str.strip() 
-
-  # 6 - limpando a coluna de Time_taken
-  df1['Time_taken(min)'] = df1['Time_taken(min)'].apply(lambda x: x.split('(min) ')[1])
-  # transformando em numero interiro
-  df1['Time_taken(min)'] = df1['Time_taken(min)'].astype(int)
-
-  return df1
+    return top_k(courier_max(df1))
+
 
 #==================================================================================
 
 #------------------------- Início da Estrutura Lógica do código -------------------
 
-# import dataset
-df = pd.read_csv('train.csv')
-
-# fazer uma copia de df para df1
-df1 = df.copy()
-
-# limpeza do dataframe
-df1 = clean_code(df1)
+# import dataset: DataFrame limpo (só com as colunas da página), índices de data/tráfego e cubo diário,
+# todos da mesma versão dos dados (em cache e compartilhados entre as sessões)
+with timer('carregamento dos dados'):
+    dataset = load_dataset(columns=PAGE_COLUMNS['Visão Entregadores'])
+df1, row_index, cube = dataset.frame, dataset.row_index, dataset.cube
 
 #----------------------------------------------------------------------------------
 
@@ -123,13 +66,17 @@ st.sidebar.markdown('## Fastest Delivery in Town')
 st.sidebar.divider()
 
 # slide de seleção de datas
-st.sidebar.markdown('Selecione uma data limite')
+st.sidebar.markdown('Selecione o período')
 
-date_slider = st.sidebar.slider(
-    'Até qual valor?',
-    value=datetime(2022, 4, 6),
-    min_value=datetime(2022, 2, 11),
-    max_value=datetime(2022, 4, 6),
+# limites vêm dos dados, então acompanham os pedidos acrescentados
+data_inicio, data_fim = date_bounds(row_index)
+
+# período: do início (inclusive) até o fim (exclusive)
+date_range = st.sidebar.slider(
+    'Qual período?',
+    value=(data_inicio, data_fim),
+    min_value=data_inicio,
+    max_value=data_fim,
     format='DD-MM-YYYY')
 
 st.sidebar.divider()
@@ -139,6 +86,16 @@ traffic_options = st.sidebar.multiselect(
     'Quais as condições do trânsito',
     ['Low', 'Medium', 'High', 'Jam'],
     default=['Low', 'Medium', 'High', 'Jam'])
+
+# filtros cruzados (cidade, clima, veículo, tipo de pedido e festival): opções vêm dos dados, resolvidas no índice bitmap
+with st.sidebar.expander('Mais filtros'):
+    selecoes = {}
+    for coluna, rotulo in CROSS_FILTERS.items():
+        valores = column_values(row_index.bitmaps, coluna)
+        selecoes[coluna] = st.multiselect(rotulo, valores, default=valores)
+
+# só os filtros que restringem as linhas (nem todos os valores selecionados)
+filters = active_filters(row_index.bitmaps, selecoes)
 st.sidebar.divider()
 
 
@@ -151,13 +108,30 @@ st.sidebar.markdown('Matheus Maranho Baumguertner')
 # Filtros
 #===============================
 
-# slider de data
-linhas_selecionadas = df1['Order_Date'] < date_slider
-df1 = df1.loc[linhas_selecionadas, :]
+# período e filtros: busca binária nas datas + AND/OR dos bitmaps dos valores selecionados
+with timer('filtro das linhas'):
+    df1 = filter_rows(df1, row_index, date_range, traffic_options, filters)
 
-# filtro de trânsito
-linhas_selecionadas = df1['Road_traffic_density'].isin(traffic_options)
-df1 = df1.loc[linhas_selecionadas, :]
+# mesmos filtros no cubo
+with timer('filtro do cubo'):
+    cube = filter_cube(cube, date_range, traffic_options, filters)
+
+# totais do período por cidade e condição de tráfego: diferença de duas posições das somas acumuladas por dia
+# (as somas não separam as colunas dos filtros cruzados: com eles, os totais saem do cubo filtrado)
+with timer('totais do período'):
+    if filters:
+        totals = cube
+    else:
+        totals = range_totals(dataset.prefix, date_range, traffic_options)
+
+# backend opcional (QUERY_BACKEND=sqlite ou duckdb): as agregações do cubo e dos totais viram consultas
+# no banco embutido, com os mesmos filtros no WHERE
+view = sql_view(dataset, date_range, traffic_options, filters)
+if view is not None:
+    cube = totals = view
+
+# estado dos filtros: chave do cache dos gráficos, compartilhado entre as sessões
+state = filter_state(dataset.version, date_range, traffic_options, filters)
 
 #=================================================================================
 
@@ -172,6 +146,10 @@ with st.container():
 # linha 2
 with st.container():
 
+    # idades e condições dos veículos em uma só chamada (duas reduções vetorizadas)
+    with timer('métricas gerais'):
+        kpis = courier_kpis(df1)
+
     col1, col2 = st.columns(2)
     
     # linha 2, coluna 1
@@ -182,13 +160,11 @@ with st.container():
 
         with col3:
             # maior idade
-            maior_idade = df1.loc[:, 'Delivery_person_Age'].max()
-            col3.metric('Maior idade', maior_idade)
+            col3.metric('Maior idade', kpis.max_age)
         
         with col4:
             # menor idade
-            menor_idade = df1.loc[:, 'Delivery_person_Age'].min()
-            col4.metric('Menor idade', menor_idade)
+            col4.metric('Menor idade', kpis.min_age)
 
     # linha 2, coluna 2
     col2 = col2.container()
@@ -198,13 +174,11 @@ with st.container():
         
         with col5:
             # melhor condição 
-            melhor_consicao = df1.loc[:, 'Vehicle_condition'].max()
-            col5.metric('Melhor condição', melhor_consicao)
+            col5.metric('Melhor condição', kpis.best_condition)
             
         with col6:
             # pior condição
-            pior_condicao = df1.loc[:, 'Vehicle_condition'].min()
-            col6.metric('Pior condição', pior_condicao)
+            col6.metric('Pior condição', kpis.worst_condition)
 
 st.divider()
 
@@ -218,28 +192,26 @@ with st.container():
      # linha 3, coluna 1
     with col1:
         st.markdown('##### Avaliação média por entregador')
-        df_aux = df1.loc[:, ['Delivery_person_Ratings', 'Delivery_person_ID']].groupby(['Delivery_person_ID']).mean().round(2).reset_index()
+        with timer('avaliação por entregador'):
+            df_aux = df1.loc[:, ['Delivery_person_Ratings', 'Delivery_person_ID']].groupby(['Delivery_person_ID'], observed=True).mean().round(2).reset_index()
         # exibindo o dataframe
         st.dataframe(df_aux, column_config={'Delivery_person_ID': 'ID do entregador', 'Delivery_person_Ratings':'Avaliação média'}, use_container_width=True, height=525)
 
     # linha 3, coluna 2
     with col2:
         st.markdown('##### Avaliação média e desvio padrão por condição de tráfego')
-        df_alt = df1.loc[:, ['Delivery_person_Ratings', 'Road_traffic_density']].groupby(['Road_traffic_density']).agg({'Delivery_person_Ratings': ['mean', 'std']})
+        # média e desvio padrão combinando os acumuladores diários do cubo
+        df_alt = rating_rollup(totals, ['Road_traffic_density'])
         # renomeando as colunas
-        df_alt.columns = ['delivery_mean', 'delivery_std']
-        # reset do index
-        df_alt = df_alt.reset_index()
+        df_alt = df_alt.drop(columns='rating_count').rename(columns={'rating_mean': 'delivery_mean', 'rating_std': 'delivery_std'})
         # exibindo o dataframe
         st.dataframe(df_alt, column_config={'Road_traffic_density':'Condição de tráfego', 'delivery_mean': 'Avaliação Média', 'delivery_std':'Devio padrão'}, use_container_width=True)
 
 
         st.markdown('##### Avaliação média e desvio padrão por condição climática')
-        df_aux = df1.loc[:, ['Delivery_person_Ratings', 'Weatherconditions']].groupby(['Weatherconditions']).agg({'Delivery_person_Ratings': ['mean', 'std']})
+        df_aux = rating_rollup(cube, ['Weatherconditions'])
         # renomeando as colunas
-        df_aux.columns = ['delivery_mean', 'delivery_std']
-        # reset do index
-        df_aux = df_aux.reset_index()
+        df_aux = df_aux.drop(columns='rating_count').rename(columns={'rating_mean': 'delivery_mean', 'rating_std': 'delivery_std'})
         # exibindo o dataframe
         st.dataframe(df_aux, column_config={'Weatherconditions':'Condição Climática', 'delivery_mean':'Avaliação Média', 'delivery_std':'Desvio Padrão'}, use_container_width=True)
 
@@ -252,16 +224,24 @@ with st.container():
     # criando colunas da linha 4
     col1, col2 = st.columns(2)
 
+    # mais rápidos e mais lentos de todas as cidades em uma única passada; sem filtros restringindo as linhas,
+    # o ranking sai do maior tempo por entregador mantido a cada lote de pedidos, sem agrupar as linhas
+    if view is None and selects_all(row_index, date_range, traffic_options, filters):
+        top = cached_chart(top_k, state, dataset.courier_max)
+    else:
+        top = cached_chart(top_delivers, state, df1 if view is None else view)
+
     # linha 4, colun 1
     with col1:
         st.markdown('##### Entregadores mais rápidos')
-        df3 = top_delivers(df1, top_asc=True)
-        st.dataframe(df3, column_config={'Delivery_person_ID':'ID do entregador', 'Time_taken(min)':'Tempo (min)'}, use_container_width=True)
+        st.dataframe(top.fastest, column_config={'Delivery_person_ID':'ID do entregador', 'Time_taken(min)':'Tempo (min)'}, use_container_width=True)
 
     # linha 4, coluna 2
     with col2:
         st.markdown('##### Entregadores mais lentos')
-        df3 = top_delivers(df1, top_asc=False)
-        st.dataframe(df3, column_config={'Delivery_person_ID':'ID do entregador', 'Time_taken(min)':'Tempo (min)'}, use_container_width=True)
+        st.dataframe(top.slowest, column_config={'Delivery_person_ID':'ID do entregador', 'Time_taken(min)':'Tempo (min)'}, use_container_width=True)
+
+#=================================================================================
 
-#=================================================================================
\ No newline at end of file
+# painel de diagnóstico (escondido, aparece com ?diagnostics=1 na URL)
+diagnostics_panel('Visão Entregadores')
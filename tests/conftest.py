@@ -0,0 +1,42 @@
+''' Dados sintéticos compartilhados pelos testes (benchmarks/synthetic.py), no formato do train.csv.
+
+    Os testes conferem cada parte do carregamento e das agregações contra o cálculo direto no pandas;
+    os que recebem a fixture `benchmark` também medem a etapa (pytest-benchmark).
+
+    Uso (a partir da raiz do projeto, com as dependências de requirements-dev.txt):
+        python -m pytest tests
+        python -m pytest tests --benchmark-disable      (só os resultados, sem medir)
+'''
+#==============================
+# Bibliotecas
+#==============================
+import os
+import sys
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, 'benchmarks'))
+from synthetic import generate_orders
+from utils.data import apply_schema
+from utils.index import sort_by_date
+from utils.pipeline import run_pipeline
+#----------------------------------------------------------------------------------
+
+# quantidade de linhas geradas para os testes
+N_ROWS = 20_000
+
+#==============================
+# Fixtures
+#==============================
+
+@pytest.fixture(scope='session')
+def raw():
+    ''' Pedidos sintéticos ainda sem limpeza (textos com espaços, 'NaN ', '(min) 24', ...). '''
+    return generate_orders(N_ROWS, seed=7)
+
+
+@pytest.fixture(scope='session')
+def df1(raw):
+    ''' Os mesmos pedidos limpos como no carregamento: run_pipeline, SCHEMA e ordenação por data. '''
+    return sort_by_date(apply_schema(run_pipeline(raw.copy())))
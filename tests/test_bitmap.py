@@ -0,0 +1,70 @@
+''' Índice bitmap das colunas dos filtros (utils.bitmap). '''
+#==============================
+# Bibliotecas
+#==============================
+import numpy as np
+from utils.bitmap import active_filters, build_bitmap_index, column_values, extend_bitmap_index, select_rows
+#----------------------------------------------------------------------------------
+
+#==============================
+# Funções
+#==============================
+
+def _expected_rows(df1, inicio, fim, selecoes):
+    ''' Posições selecionadas calculadas com máscaras isin sobre as linhas inicio:fim. '''
+    linhas = np.zeros(len(df1), dtype=bool)
+    linhas[inicio:fim] = True
+    for coluna, valores in selecoes.items():
+        linhas &= df1[coluna].isin(valores).to_numpy()
+
+    return np.flatnonzero(linhas)
+
+
+def test_selecao_igual_as_mascaras(df1):
+    index = build_bitmap_index(df1)
+    rng = np.random.default_rng(3)
+
+    for _ in range(30):
+        inicio, fim = np.sort(rng.integers(0, len(df1) + 1, 2))
+        selecoes = {}
+        for coluna in rng.choice(list(index.bitmaps), rng.integers(1, 4), replace=False):
+            valores = column_values(index, coluna)
+            selecoes[coluna] = list(rng.choice(valores, rng.integers(0, len(valores) + 1), replace=False))
+
+        np.testing.assert_array_equal(select_rows(index, inicio, fim, selecoes), _expected_rows(df1, inicio, fim, selecoes))
+
+
+def test_sem_filtros_devolve_o_periodo(df1):
+    index = build_bitmap_index(df1)
+
+    np.testing.assert_array_equal(select_rows(index, 13, 1000, {}), np.arange(13, 1000))
+
+
+def test_filtros_ativos(df1):
+    index = build_bitmap_index(df1)
+    cidades = column_values(index, 'City')
+
+    assert active_filters(index, {'City': cidades}) == {}
+    assert active_filters(index, {'City': cidades[::-1][:1]}) == {'City': (cidades[-1],)}
+
+
+def test_extend_igual_ao_indice_completo(df1):
+    # corte fora do limite de um byte, para juntar o último byte pela metade
+    corte = len(df1) // 2 + 3
+    estendido = extend_bitmap_index(build_bitmap_index(df1.iloc[:corte]), df1.iloc[corte:])
+    completo = build_bitmap_index(df1)
+
+    assert estendido.n_rows == completo.n_rows
+    for coluna, por_valor in completo.bitmaps.items():
+        assert set(estendido.bitmaps[coluna]) == set(por_valor)
+        for valor, bitmap in por_valor.items():
+            np.testing.assert_array_equal(estendido.bitmaps[coluna][valor], bitmap)
+
+
+def test_benchmark_select_rows(benchmark, df1):
+    index = build_bitmap_index(df1)
+    selecoes = {'Road_traffic_density': ['Low', 'Jam'], 'City': ['Urban', 'Semi-Urban'], 'Type_of_vehicle': ['scooter']}
+
+    posicoes = benchmark(select_rows, index, 0, len(df1), selecoes)
+
+    np.testing.assert_array_equal(posicoes, _expected_rows(df1, 0, len(df1), selecoes))
@@ -0,0 +1,101 @@
+''' Cubo diário (utils.cube): medidas, pares de entregadores, filtros e lotes acrescentados. '''
+#==============================
+# Bibliotecas
+#==============================
+import numpy as np
+import pandas as pd
+from utils.cube import _courier_pairs, append_to_cube, build_cube, counts, distinct_couriers, filter_cube, rollup, weekly_couriers
+#----------------------------------------------------------------------------------
+
+#==============================
+# Funções
+#==============================
+
+def _linhas(df1, date_range, traffic_options, filters=None):
+    ''' Linhas que os filtros da barra lateral selecionam, calculadas direto no DataFrame. '''
+    linhas = (df1['Order_Date'] >= date_range[0]) & (df1['Order_Date'] < date_range[1]) & df1['Road_traffic_density'].isin(traffic_options)
+    for coluna, valores in (filters or {}).items():
+        linhas &= df1[coluna].isin(valores)
+
+    return df1.loc[linhas]
+
+
+def _periodo(df1, primeiro, ultimo):
+    ''' Período (início, fim) do dia `primeiro` até o dia `ultimo` (exclusive) das datas do DataFrame. '''
+    dias = np.sort(df1['Order_Date'].unique())
+
+    return pd.Timestamp(dias[primeiro]), pd.Timestamp(dias[ultimo])
+
+
+def test_pares_distintos_das_linhas():
+    rng = np.random.default_rng(1)
+    celula, entregador = rng.integers(0, 50, 3000), rng.integers(0, 29, 3000)
+
+    esperado = np.unique(np.stack([celula, entregador], axis=1), axis=0)
+
+    np.testing.assert_array_equal(_courier_pairs(celula, entregador, 29), esperado)
+    assert _courier_pairs(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), 0).shape == (0, 2)
+
+
+def test_medidas_iguais_as_do_pandas(df1):
+    cube = build_cube(df1)
+    esperado = df1.groupby(['City', 'Road_traffic_density'], observed=True)['Time_taken(min)'].agg(['size', 'mean', 'std']).reset_index()
+    obtido = rollup(cube, ['City', 'Road_traffic_density'])
+
+    np.testing.assert_array_equal(obtido['count'], esperado['size'])
+    np.testing.assert_allclose(obtido['avg_time'], esperado['mean'], rtol=1e-12)
+    np.testing.assert_allclose(obtido['std_time'], esperado['std'], rtol=1e-9)
+
+
+def test_filtro_compartilha_os_pares(df1):
+    cube = build_cube(df1)
+    filtrado = filter_cube(cube, _periodo(df1, 3, 20), ['Low', 'Jam'])
+
+    assert filtrado.couriers is cube.couriers
+    assert len(filtrado.courier_rows) == len(filtrado.cells)
+
+
+def test_entregadores_distintos_com_filtros(df1):
+    cube = build_cube(df1)
+    cenarios = [(_periodo(df1, 0, -1), ['Low', 'Medium', 'High', 'Jam'], None),
+                (_periodo(df1, 5, 12), ['Jam'], None),
+                (_periodo(df1, 0, 30), ['Low', 'High'], {'City': ['Urban'], 'Type_of_vehicle': ['scooter', 'motorcycle']})]
+
+    for date_range, traffic_options, filters in cenarios:
+        linhas = _linhas(df1, date_range, traffic_options, filters)
+        filtrado = filter_cube(cube, date_range, traffic_options, filters)
+
+        assert distinct_couriers(filtrado) == linhas['Delivery_person_ID'].nunique()
+        semanas = linhas.groupby('week_of_year')['Delivery_person_ID'].nunique()
+        np.testing.assert_array_equal(weekly_couriers(filtrado).to_numpy(), semanas.to_numpy())
+        assert counts(filtrado, ['City'])['count'].sum() == len(linhas)
+
+
+def test_filtro_de_cubo_filtrado(df1):
+    cube = build_cube(df1)
+    date_range = _periodo(df1, 10, 40)
+
+    duas_vezes = filter_cube(filter_cube(cube, date_range, ['Low', 'Jam', 'High']), date_range, ['Jam'])
+
+    assert distinct_couriers(duas_vezes) == _linhas(df1, date_range, ['Jam'])['Delivery_person_ID'].nunique()
+
+
+def test_append_igual_ao_cubo_completo(df1):
+    metade = len(df1) // 2
+    completo = build_cube(df1)
+    acrescentado = append_to_cube(build_cube(df1.iloc[:metade]), df1.iloc[metade:])
+
+    assert distinct_couriers(acrescentado) == distinct_couriers(completo)
+    np.testing.assert_array_equal(weekly_couriers(acrescentado).to_numpy(), weekly_couriers(completo).to_numpy())
+    por_dia = ['Order_Date', 'Road_traffic_density']
+    pd.testing.assert_frame_equal(counts(acrescentado, por_dia), counts(completo, por_dia))
+
+
+def test_append_nao_copia_os_pares(df1):
+    metade = len(df1) // 2
+    base = build_cube(df1.iloc[:metade])
+    acrescentado = append_to_cube(base, df1.iloc[metade:])
+
+    assert len(acrescentado.couriers) == 2
+    assert acrescentado.couriers[0] is base.couriers[0]
+    assert sum(pares.nbytes for pares in acrescentado.couriers) <= 8 * len(df1)
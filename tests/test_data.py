@@ -0,0 +1,32 @@
+''' Carregamento (utils.data): fingerprint do CSV e cache colunar em disco. '''
+#==============================
+# Bibliotecas
+#==============================
+import hashlib
+import os
+import pandas as pd
+from utils.data import cache_path, load_cleaned, source_fingerprint
+from utils.instrument import LOAD_TIMINGS
+#----------------------------------------------------------------------------------
+
+#==============================
+# Funções
+#==============================
+
+def test_fingerprint_com_o_hash_do_arquivo(raw, tmp_path):
+    path = tmp_path / 'orders.csv'
+    raw.to_csv(path, index=False)
+
+    assert source_fingerprint(str(path))['sha256'] == hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def test_cache_igual_a_limpeza(raw, tmp_path):
+    path = tmp_path / 'orders.csv'
+    raw.to_csv(path, index=False)
+
+    limpo = load_cleaned(str(path))
+    assert os.path.exists(cache_path(str(path)))
+
+    do_cache = load_cleaned(str(path))
+    assert 'leitura do CSV' not in LOAD_TIMINGS
+    pd.testing.assert_frame_equal(do_cache, limpo)
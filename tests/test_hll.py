@@ -0,0 +1,59 @@
+''' Sketches HyperLogLog dos entregadores (utils.hll). '''
+#==============================
+# Bibliotecas
+#==============================
+import numpy as np
+import pandas as pd
+from utils.hll import build_sketches, error_bound, estimate, estimate_distinct, merge_sketches, weekly_distinct
+#----------------------------------------------------------------------------------
+
+# tolerância das estimativas: 4 erros padrão
+DESVIOS = 4
+
+#==============================
+# Funções
+#==============================
+
+def _full_range(df1):
+    ''' Período com todas as datas do DataFrame (fim exclusivo). '''
+    return df1['Order_Date'].min(), df1['Order_Date'].max() + pd.Timedelta(days=1)
+
+
+def test_estimativa_dentro_do_erro():
+    for n in (50, 1_000, 100_000):
+        ids = pd.Series([f'DEL{i}' for i in range(n)])
+        sketches = build_sketches(pd.DataFrame({'Order_Date': pd.Timestamp('2022-03-01'), 'Road_traffic_density': 'Low',
+                                                'Delivery_person_ID': ids}))
+
+        assert abs(estimate(sketches.by_day[0]) - n) <= DESVIOS * error_bound() * n + 1
+
+
+def test_estimativa_com_filtros(df1):
+    sketches = build_sketches(df1)
+    trafego = ['Low', 'Jam']
+    linhas = df1.loc[df1['Road_traffic_density'].isin(trafego)]
+
+    exato = linhas['Delivery_person_ID'].nunique()
+    assert abs(estimate_distinct(sketches, _full_range(df1), trafego) - exato) <= DESVIOS * error_bound() * exato
+
+    semanas = weekly_distinct(sketches, _full_range(df1), trafego)
+    exatos = linhas.groupby('week_of_year')['Delivery_person_ID'].nunique()
+    np.testing.assert_array_equal(semanas.index, exatos.index)
+    assert (np.abs(semanas.to_numpy() - exatos.to_numpy()) <= DESVIOS * error_bound() * exatos.to_numpy()).all()
+
+
+def test_merge_igual_ao_sketch_completo(df1):
+    metade = len(df1) // 2
+    combinado = merge_sketches(build_sketches(df1.iloc[:metade]), build_sketches(df1.iloc[metade:]))
+    completo = build_sketches(df1)
+
+    np.testing.assert_array_equal(combinado.days, completo.days)
+    np.testing.assert_array_equal(combinado.by_day, completo.by_day)
+    colunas = combinado.traffic.get_indexer(completo.traffic)
+    np.testing.assert_array_equal(combinado.by_day_traffic[:, colunas], completo.by_day_traffic)
+
+
+def test_benchmark_build_sketches(benchmark, df1):
+    sketches = benchmark(build_sketches, df1)
+
+    assert sketches.by_day.shape == (df1['Order_Date'].nunique(), 2 ** 12)
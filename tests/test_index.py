@@ -0,0 +1,67 @@
+''' Índices de linhas (utils.index) e os limites do slider de datas. '''
+#==============================
+# Bibliotecas
+#==============================
+import pandas as pd
+from utils.cube import filter_cube
+from utils.data import LiveDataset, load_cleaned
+from utils.hll import estimate_distinct
+from utils.index import date_bounds, filter_rows
+from utils.prefix import range_totals
+#----------------------------------------------------------------------------------
+
+# condições de tráfego do filtro da barra lateral
+TRAFEGO = ['Low', 'Medium', 'High', 'Jam']
+
+#==============================
+# Funções
+#==============================
+
+def _assert_todas_as_linhas(state):
+    ''' Com o slider nos limites de date_bounds, todos os caminhos dos filtros enxergam todos os pedidos. '''
+    date_range = date_bounds(state.row_index)
+    n_rows = len(state.frame)
+
+    assert len(filter_rows(state.frame, state.row_index, date_range, TRAFEGO)) == n_rows
+    assert filter_cube(state.cube, date_range, TRAFEGO).cells['count'].sum() == n_rows
+    assert range_totals(state.prefix, date_range, TRAFEGO).cells['count'].sum() == n_rows
+    assert estimate_distinct(state.sketches, date_range, TRAFEGO) > 0
+
+
+def test_limites_incluem_o_ultimo_dia(df1):
+    state = LiveDataset(df1, ('synthetic',)).state
+
+    inicio, fim = date_bounds(state.row_index)
+    assert inicio == df1['Order_Date'].min()
+    assert fim == df1['Order_Date'].max() + pd.Timedelta(days=1)
+    _assert_todas_as_linhas(state)
+
+
+def test_dia_acrescentado_aparece(raw, df1):
+    ultimo = df1['Order_Date'].max()
+    datas = pd.to_datetime(raw['Order_Date'], format='%d-%m-%Y')
+
+    dataset = LiveDataset(df1.loc[df1['Order_Date'] < ultimo].reset_index(drop=True), ('synthetic',))
+    dataset.append(raw.loc[datas == ultimo])
+    state = dataset.state
+
+    assert state.row_index.days[-1] == ultimo
+    assert len(state.frame) == len(df1)
+    _assert_todas_as_linhas(state)
+
+
+def test_lote_fica_com_as_colunas_carregadas(raw, tmp_path):
+    path = tmp_path / 'orders.csv'
+    raw.to_csv(path, index=False)
+    df1 = load_cleaned(str(path))
+    ultimo = df1['Order_Date'].max()
+    datas = pd.to_datetime(raw['Order_Date'], format='%d-%m-%Y')
+
+    dataset = LiveDataset(df1.loc[df1['Order_Date'] < ultimo].reset_index(drop=True), ('synthetic',))
+    dataset.append(raw.loc[datas == ultimo])
+    frame = dataset.state.frame
+
+    assert list(frame.columns) == list(df1.columns)
+    assert len(frame) == len(df1)
+    assert not frame.drop(columns='Delivery_person_Ratings').isna().any().any()
+    _assert_todas_as_linhas(dataset.state)
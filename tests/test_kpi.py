@@ -0,0 +1,38 @@
+''' Métricas gerais das páginas (utils.kpi). '''
+#==============================
+# Bibliotecas
+#==============================
+from utils.cube import build_cube
+from utils.kpi import CourierKpis, courier_kpis, restaurant_kpis
+#----------------------------------------------------------------------------------
+
+#==============================
+# Funções
+#==============================
+
+def test_metricas_dos_restaurantes(df1):
+    kpis = restaurant_kpis(build_cube(df1), df1)
+    tempos = df1.groupby('Festival', observed=True)['Time_taken(min)'].agg(['mean', 'std'])
+
+    assert kpis.couriers == df1['Delivery_person_ID'].nunique()
+    assert kpis.avg_distance == round(float(df1['distance'].astype(float).mean()), 2)
+    assert (kpis.festival_avg_time, kpis.festival_std_time) == tuple(round(valor, 2) for valor in tempos.loc['Yes'])
+    assert (kpis.regular_avg_time, kpis.regular_std_time) == tuple(round(valor, 2) for valor in tempos.loc['No'])
+    assert restaurant_kpis(build_cube(df1), df1, exact_couriers=False).couriers is None
+
+
+def test_metricas_sem_festival(df1):
+    sem_festival = df1.loc[df1['Festival'] == 'No']
+    kpis = restaurant_kpis(build_cube(sem_festival), sem_festival)
+
+    assert kpis.festival_avg_time is None and kpis.festival_std_time is None
+    assert kpis.regular_avg_time is not None
+
+
+def test_metricas_dos_entregadores(df1):
+    kpis = courier_kpis(df1)
+
+    assert kpis == CourierKpis(int(df1['Delivery_person_Age'].max()), int(df1['Delivery_person_Age'].min()),
+                               int(df1['Vehicle_condition'].max()), int(df1['Vehicle_condition'].min()))
+    assert all(isinstance(valor, int) for valor in kpis)
+    assert courier_kpis(df1.iloc[:0]) == CourierKpis(None, None, None, None)
@@ -0,0 +1,46 @@
+''' Limpeza e agregações em paralelo (utils.parallel) e a escolha da quantidade de processos. '''
+#==============================
+# Bibliotecas
+#==============================
+import threading
+import pandas as pd
+import pytest
+from utils.data import WORKERS_ENV, load_workers
+from utils.parallel import parallel_clean, safe_start_method
+#----------------------------------------------------------------------------------
+
+#==============================
+# Funções
+#==============================
+
+def test_workers_da_variavel_de_ambiente(monkeypatch):
+    monkeypatch.delenv(WORKERS_ENV, raising=False)
+    assert load_workers() == 1
+
+    monkeypatch.setenv(WORKERS_ENV, ' 4 ')
+    assert load_workers() == 4
+
+    for valor in ('0', '-2', 'dois'):
+        monkeypatch.setenv(WORKERS_ENV, valor)
+        with pytest.raises(ValueError, match=WORKERS_ENV):
+            load_workers()
+
+
+def test_limpeza_em_paralelo_igual_a_um_processo(raw):
+    um_processo = parallel_clean(raw, 1)
+
+    pd.testing.assert_frame_equal(parallel_clean(raw, 2, start_method='fork'), um_processo)
+
+    # como no app: o pool é criado de uma thread que não é a principal, com o método seguro
+    resultado = {}
+    thread = threading.Thread(target=lambda: resultado.update(df1=parallel_clean(raw, 2)))
+    thread.start()
+    thread.join()
+
+    assert safe_start_method() in ('forkserver', 'spawn')
+    pd.testing.assert_frame_equal(resultado['df1'], um_processo)
+
+
+def test_metodo_invalido(raw):
+    with pytest.raises(ValueError, match='start_method'):
+        parallel_clean(raw, 2, start_method='thread')
@@ -0,0 +1,124 @@
+''' Limpeza em etapas (utils.pipeline): resultado igual ao clean_code original e tempo de cada etapa.
+
+    Os testes com a fixture `benchmark` (pytest-benchmark) medem cada etapa de PIPELINE_STAGES
+    sobre os pedidos sintéticos. Para só conferir os resultados, sem medir:
+        python -m pytest tests --benchmark-disable
+'''
+#==============================
+# Bibliotecas
+#==============================
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+from bench_clean import clean_code_legacy
+from utils.data import apply_schema, read_orders
+from utils.pipeline import CLEAN_STAGES, PIPELINE_STAGES, calendar_parts, clean_code, run_pipeline
+#----------------------------------------------------------------------------------
+
+# colunas criadas na etapa derive (não existem no clean_code original)
+DERIVED = ['distance', 'week_of_year', 'day_of_week', 'month']
+
+# medidas de cada benchmark (cada uma recebe uma cópia nova da entrada)
+ROUNDS = 20
+
+#==============================
+# Funções
+#==============================
+
+def _stage_input(raw, nome):
+    ''' Entrada de uma etapa: os pedidos sintéticos depois de todas as etapas anteriores. '''
+    nomes = [nome for nome, _ in PIPELINE_STAGES]
+
+    return run_pipeline(raw.copy(), PIPELINE_STAGES[:nomes.index(nome)])
+
+
+def _measure(benchmark, func, entrada):
+    ''' Mede func com uma cópia nova da entrada em cada rodada: as etapas trocam colunas do DataFrame que recebem. '''
+    return benchmark.pedantic(func, setup=lambda: ((entrada.copy(),), {}), rounds=ROUNDS)
+
+
+def test_clean_code_igual_ao_original(raw):
+    pd.testing.assert_frame_equal(clean_code(raw.copy()), clean_code_legacy(raw.copy()))
+
+
+def test_pipeline_igual_ao_original(raw):
+    df1 = run_pipeline(raw.copy())
+    legado = clean_code_legacy(raw.copy())
+
+    pd.testing.assert_frame_equal(df1.drop(columns=DERIVED), legado)
+    assert df1['distance'].notna().all() and (df1['distance'] > 0).all()
+    # valores independentes de calendar_parts: os do strftime('%U') e os do acessor .dt do pandas
+    datas = legado['Order_Date'].dt
+    esperado = {'week_of_year': datas.strftime('%U').astype(int), 'day_of_week': datas.dayofweek, 'month': datas.month}
+    for coluna, valores in esperado.items():
+        np.testing.assert_array_equal(df1[coluna].to_numpy(), valores.to_numpy(), err_msg=coluna)
+
+
+def test_calendario_igual_ao_strftime():
+    # anos começando em dias diferentes da semana, incluindo os dias antes do primeiro domingo (semana 0)
+    datas = pd.Series(pd.date_range('2019-12-01', '2024-01-31', freq='D'))
+    partes = calendar_parts(datas)
+
+    np.testing.assert_array_equal(partes['week_of_year'], datas.dt.strftime('%U').astype(int).to_numpy())
+    np.testing.assert_array_equal(partes['day_of_week'], datas.dt.dayofweek.to_numpy())
+    np.testing.assert_array_equal(partes['month'], datas.dt.month.to_numpy())
+
+
+def test_leitura_com_pyarrow_igual_ao_original(raw, tmp_path):
+    path = tmp_path / 'orders.csv'
+    raw.to_csv(path, index=False)
+
+    # leitura do app (pyarrow, só as colunas usadas) x leitura e limpeza originais (pandas), ambas com o SCHEMA
+    df1 = apply_schema(run_pipeline(read_orders(path)))
+    legado = apply_schema(clean_code_legacy(pd.read_csv(path)))
+
+    pd.testing.assert_frame_equal(df1.drop(columns=DERIVED), legado.loc[:, [coluna for coluna in df1.columns if coluna not in DERIVED]])
+
+
+def test_hook_recebe_todas_as_etapas(raw):
+    chamadas = []
+    run_pipeline(raw.copy(), hook=lambda nome, segundos, df1: chamadas.append((nome, segundos >= 0, len(df1))))
+
+    assert [nome for nome, _, _ in chamadas] == [nome for nome, _ in PIPELINE_STAGES]
+    assert all(positivo for _, positivo, _ in chamadas)
+
+
+def test_sem_copy_on_write_nao_avisa(raw):
+    # utils.data ativa o copy-on-write ao ser importado: a limpeza também é usada sem ele (bench_clean, streaming)
+    with pd.option_context('mode.copy_on_write', False), warnings.catch_warnings():
+        warnings.simplefilter('error', pd.errors.SettingWithCopyWarning)
+        df1 = run_pipeline(raw)
+
+    assert len(df1) < len(raw)
+
+
+def test_validate_exige_colunas(raw):
+    with pytest.raises(ValueError, match='colunas obrigatórias ausentes'):
+        run_pipeline(raw.drop(columns=['City']), CLEAN_STAGES)
+
+
+@pytest.mark.parametrize('nome', [nome for nome, _ in PIPELINE_STAGES])
+def test_benchmark_etapa(benchmark, raw, nome):
+    entrada = _stage_input(raw, nome)
+    etapa = dict(PIPELINE_STAGES)[nome]
+
+    df1 = _measure(benchmark, etapa, entrada)
+
+    assert len(df1) == len(_stage_input(raw, 'parse'))
+
+
+def test_benchmark_schema(benchmark, raw):
+    df1 = _measure(benchmark, apply_schema, run_pipeline(raw.copy()))
+
+    assert df1['City'].dtype == 'category'
+
+
+def test_benchmark_pipeline_completo(benchmark, raw):
+    df1 = _measure(benchmark, run_pipeline, raw)
+
+    assert list(df1.columns[-len(DERIVED):]) == DERIVED
+
+
+def test_benchmark_clean_code_original(benchmark, raw):
+    _measure(benchmark, clean_code_legacy, raw)
@@ -0,0 +1,61 @@
+''' Somas acumuladas por dia (utils.prefix): totais de um período iguais aos do cubo filtrado. '''
+#==============================
+# Bibliotecas
+#==============================
+import numpy as np
+import pandas as pd
+from utils.cube import append_to_cube, build_cube, counts, filter_cube, rating_rollup, rollup
+from utils.prefix import build_prefix, range_totals
+#----------------------------------------------------------------------------------
+
+# agrupamento dos totais de um período
+POR_CIDADE_E_TRAFEGO = ['City', 'Road_traffic_density']
+
+#==============================
+# Funções
+#==============================
+
+def _assert_same_totals(totals, cube):
+    ''' Contagens, tempos e avaliações por cidade e tráfego iguais nos dois caminhos. '''
+    pd.testing.assert_frame_equal(counts(totals, POR_CIDADE_E_TRAFEGO), counts(cube, POR_CIDADE_E_TRAFEGO), check_dtype=False)
+    pd.testing.assert_frame_equal(rollup(totals, POR_CIDADE_E_TRAFEGO), rollup(cube, POR_CIDADE_E_TRAFEGO), check_dtype=False, rtol=1e-9)
+    pd.testing.assert_frame_equal(rating_rollup(totals, POR_CIDADE_E_TRAFEGO), rating_rollup(cube, POR_CIDADE_E_TRAFEGO),
+                                  check_dtype=False, rtol=1e-6)
+
+
+def test_periodos_iguais_ao_cubo(df1):
+    cube = build_cube(df1)
+    prefix = build_prefix(cube)
+    dias = [pd.Timestamp(dia) for dia in prefix.days]
+    rng = np.random.default_rng(5)
+
+    for _ in range(10):
+        inicio, fim = np.sort(rng.integers(0, len(dias), 2))
+        date_range = (dias[inicio], dias[fim])
+        trafego = list(rng.choice(['Low', 'Medium', 'High', 'Jam'], rng.integers(1, 5), replace=False))
+
+        _assert_same_totals(range_totals(prefix, date_range, trafego), filter_cube(cube, date_range, trafego))
+
+
+def test_periodo_vazio(df1):
+    prefix = build_prefix(build_cube(df1))
+    dia = pd.Timestamp(prefix.days[3])
+
+    assert range_totals(prefix, (dia, dia), ['Low']).cells.empty
+
+
+def test_somas_refeitas_depois_do_append(df1):
+    metade = len(df1) // 2
+    cube = append_to_cube(build_cube(df1.iloc[:metade]), df1.iloc[metade:])
+    date_range = (df1['Order_Date'].min(), df1['Order_Date'].max() + pd.Timedelta(days=1))
+
+    _assert_same_totals(range_totals(build_prefix(cube), date_range, ['Low', 'Jam']), filter_cube(cube, date_range, ['Low', 'Jam']))
+
+
+def test_benchmark_range_totals(benchmark, df1):
+    prefix = build_prefix(build_cube(df1))
+    date_range = (pd.Timestamp(prefix.days[2]), pd.Timestamp(prefix.days[-2]))
+
+    totals = benchmark(range_totals, prefix, date_range, ['Low', 'Medium', 'High', 'Jam'])
+
+    assert totals.cells['count'].sum() == ((df1['Order_Date'] >= date_range[0]) & (df1['Order_Date'] < date_range[1])).sum()
@@ -0,0 +1,65 @@
+''' Backend de consultas no banco embutido (utils.sqldb): mesmos resultados do cubo e do DataFrame em memória. '''
+#==============================
+# Bibliotecas
+#==============================
+import numpy as np
+import pytest
+from bench_sql import assert_same
+from utils import queries
+from utils.cube import filter_cube
+from utils.data import LiveDataset
+from utils.index import date_bounds, filter_rows
+from utils.sqldb import SqlView, open_store
+#----------------------------------------------------------------------------------
+
+# agregações comparadas: (nome, função que recebe o cubo filtrado ou o SqlView, usa o DataFrame filtrado no pandas)
+AGREGACOES = [
+    ('counts', lambda fonte: queries.counts(fonte, ['Order_Date', 'City']), False),
+    ('rollup', lambda fonte: queries.rollup(fonte, ['City', 'Road_traffic_density']), False),
+    ('rating_rollup', lambda fonte: queries.rating_rollup(fonte, ['Weatherconditions']), False),
+    ('distinct_couriers', queries.distinct_couriers, False),
+    ('weekly_couriers', queries.weekly_couriers, False),
+    ('courier_max', queries.courier_max, True),
+]
+
+#==============================
+# Fixtures
+#==============================
+
+@pytest.fixture(scope='module')
+def sqlite(df1, tmp_path_factory):
+    ''' Retrato do dataset e o banco SQLite montado com ele. '''
+    state = LiveDataset(df1, ('synthetic',)).state
+    store = open_store(state.frame, (str(tmp_path_factory.mktemp('sqldb') / 'orders.csv'), len(df1), 0), 'sqlite')
+    yield state, store
+    store.con.close()
+
+#==============================
+# Funções
+#==============================
+
+def _cenarios(state):
+    ''' Filtros da barra lateral: (período, condições de tráfego, filtros cruzados). '''
+    dias = state.row_index.days
+
+    return [(date_bounds(state.row_index), ['Low', 'Medium', 'High', 'Jam'], {}),
+            ((dias[0], dias[len(dias) // 4]), ['Low', 'Jam'], {}),
+            (date_bounds(state.row_index), ['Low', 'High', 'Jam'], {'City': ['Urban', 'Semi-Urban'], 'Festival': ['No']})]
+
+
+@pytest.mark.parametrize('nome, func, usa_linhas', AGREGACOES, ids=[nome for nome, _, _ in AGREGACOES])
+def test_sqlite_igual_ao_pandas(sqlite, nome, func, usa_linhas):
+    state, store = sqlite
+
+    for date_range, traffic_options, filters in _cenarios(state):
+        if usa_linhas:
+            esperado = func(filter_rows(state.frame, state.row_index, date_range, traffic_options, filters))
+        else:
+            esperado = func(filter_cube(state.cube, date_range, traffic_options, filters))
+        view = SqlView(store, tuple(date_range), tuple(traffic_options),
+                       tuple((coluna, tuple(valores)) for coluna, valores in filters.items()))
+
+        if np.isscalar(esperado):
+            assert func(view) == esperado, nome
+        else:
+            assert_same(esperado, func(view), f'{nome} {filters}')
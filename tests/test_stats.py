@@ -0,0 +1,110 @@
+''' Acumuladores de Welford (utils.stats) e as agregações de avaliações que dependem deles. '''
+#==============================
+# Bibliotecas
+#==============================
+import numpy as np
+import pandas as pd
+from utils.cube import append_to_cube, build_cube, rating_moments, rating_rollup
+from utils.parallel import parallel_aggregate
+from utils.prefix import build_prefix, range_totals
+from utils.stats import Moments, accumulate, finalize, merge_moments, subtract_moments
+from utils.streaming import ingest_csv
+#----------------------------------------------------------------------------------
+
+#==============================
+# Funções
+#==============================
+
+def _expected_ratings(df1, by):
+    ''' Média e desvio padrão das avaliações calculados direto nas linhas, como o pandas faz (NaN ignorados). '''
+    df_aux = df1.loc[:, by].assign(rating=df1['Delivery_person_Ratings'].astype(np.float64))
+    df_aux = df_aux.groupby(by, observed=True)['rating'].agg(['count', 'mean', 'std']).reset_index()
+
+    return df_aux.rename(columns={'count': 'rating_count', 'mean': 'rating_mean', 'std': 'rating_std'})
+
+
+def _assert_ratings(result, df1, by, rtol=1e-9):
+    ''' Confere rating_count, rating_mean e rating_std de um agrupamento contra as linhas. '''
+    esperado = _expected_ratings(df1, by)
+    result = result.loc[:, list(esperado.columns)].sort_values(by).reset_index(drop=True)
+
+    pd.testing.assert_frame_equal(result, esperado, check_dtype=False, check_categorical=False, rtol=rtol)
+
+
+def test_accumulate_ignora_ausentes():
+    moments = accumulate(pd.Series([4.5, np.nan, 4.0]), np.array([0, 0, 0]), 1)
+
+    assert moments.count.tolist() == [2]
+    np.testing.assert_allclose(moments.mean, [4.25])
+    np.testing.assert_allclose(moments.m2, [0.125])
+
+
+def test_accumulate_grupo_so_com_ausentes():
+    moments = accumulate(np.array([np.nan, 3.0, np.nan]), np.array([0, 1, 0]), 2)
+    media, desvio = finalize(moments)
+
+    assert moments.count.tolist() == [0, 1]
+    assert np.isnan(media[0]) and media[1] == 3.0
+    assert np.isnan(desvio).all()
+
+
+def test_merge_de_moments_com_grupos_vazios():
+    # grupo 0: {4.5, 4.0} + {5.0}; grupo 1: vazio nas duas partes; grupo 2: só na primeira parte
+    a = Moments(np.array([2, 0, 1]), np.array([4.25, 0.0, 3.0]), np.array([0.125, 0.0, 0.0]))
+    b = Moments(np.array([1, 0, 0]), np.array([5.0, 0.0, 0.0]), np.array([0.0, 0.0, 0.0]))
+
+    total = merge_moments(a, b)
+
+    assert total.count.tolist() == [3, 0, 1]
+    np.testing.assert_allclose(total.mean, [4.5, 0.0, 3.0])
+    np.testing.assert_allclose(total.m2, [0.5, 0.0, 0.0])
+
+
+def test_merge_e_subtract_sao_inversos():
+    rng = np.random.default_rng(0)
+    valores = rng.normal(4.6, 0.3, 1000)
+    valores[rng.random(1000) < 0.05] = np.nan
+    grupos = rng.integers(0, 5, 1000)
+    a, b = accumulate(valores[:600], grupos[:600], 5), accumulate(valores[600:], grupos[600:], 5)
+
+    total = merge_moments(a, b)
+    direto = accumulate(valores, grupos, 5)
+    for obtido, esperado in zip(total, direto):
+        np.testing.assert_allclose(obtido, esperado, rtol=1e-9)
+    for obtido, esperado in zip(subtract_moments(total, b), a):
+        np.testing.assert_allclose(obtido, esperado, rtol=1e-9, atol=1e-9)
+
+
+def test_cubo_com_avaliacoes_ausentes(df1):
+    assert df1['Delivery_person_Ratings'].isna().any()
+
+    cube = build_cube(df1)
+    for by in (['Road_traffic_density'], ['Weatherconditions'], ['City', 'Road_traffic_density']):
+        _assert_ratings(rating_rollup(cube, by), df1, by)
+
+
+def test_append_com_avaliacoes_ausentes(df1):
+    metade = len(df1) // 2
+    cube = append_to_cube(build_cube(df1.iloc[:metade]), df1.iloc[metade:])
+
+    _assert_ratings(rating_rollup(cube, ['Weatherconditions']), df1, ['Weatherconditions'])
+
+
+def test_somas_acumuladas_com_avaliacoes_ausentes(df1):
+    prefix = build_prefix(build_cube(df1))
+    dias = prefix.days
+    periodo = (pd.Timestamp(dias[5]), pd.Timestamp(dias[30]))
+    trafego = ['Low', 'Jam']
+
+    totals = range_totals(prefix, periodo, trafego)
+    linhas = df1.loc[(df1['Order_Date'] >= periodo[0]) & (df1['Order_Date'] < periodo[1]) & df1['Road_traffic_density'].isin(trafego)]
+    _assert_ratings(rating_rollup(totals, ['Road_traffic_density']), linhas, ['Road_traffic_density'])
+
+
+def test_lotes_e_particoes_com_avaliacoes_ausentes(raw, df1, tmp_path):
+    path = tmp_path / 'orders.csv'
+    raw.to_csv(path, index=False)
+
+    # a leitura com o pandas deixa as avaliações em float64 e o SCHEMA em float32: a diferença fica no arredondamento
+    for agregado in (ingest_csv(path, chunksize=7_000), parallel_aggregate(path, workers=1)):
+        _assert_ratings(rating_moments(agregado.cells, ['Road_traffic_density']), df1, ['Road_traffic_density'], rtol=1e-6)
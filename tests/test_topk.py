@@ -0,0 +1,62 @@
+''' Ranking dos entregadores (utils.topk) e o maior tempo por entregador mantido no DatasetState. '''
+#==============================
+# Bibliotecas
+#==============================
+import pandas as pd
+from utils.data import LiveDataset
+from utils.index import date_bounds, selects_all
+from utils.topk import TOP_K, TOPK_KEYS, TOPK_MEASURE, courier_max, merge_courier_max, top_k
+#----------------------------------------------------------------------------------
+
+# condições de tráfego do filtro da barra lateral
+TRAFEGO = ['Low', 'Medium', 'High', 'Jam']
+
+#==============================
+# Funções
+#==============================
+
+def _texto(df):
+    ''' Colunas categóricas como texto: compara tabelas cujas categorias foram montadas em ordens diferentes. '''
+    return df.astype({coluna: str for coluna in TOPK_KEYS}).reset_index(drop=True)
+
+
+def _assert_maximos_iguais(state):
+    ''' A tabela mantida no estado é igual ao courier_max de todas as linhas. '''
+    pd.testing.assert_frame_equal(_texto(state.courier_max), _texto(courier_max(state.frame)))
+
+
+def test_top_k_igual_ao_sort(df1):
+    top = top_k(courier_max(df1))
+    maximos = _texto(courier_max(df1))
+
+    for tabela, crescente in ((top.fastest, True), (top.slowest, False)):
+        esperado = (maximos.sort_values(['City', TOPK_MEASURE], ascending=[True, crescente], kind='stable')
+                    .groupby('City').head(TOP_K).reset_index(drop=True))
+        pd.testing.assert_frame_equal(_texto(tabela), esperado)
+
+
+def test_merge_das_partes(df1):
+    metade = len(df1) // 2
+    partes = [courier_max(df1.iloc[:metade]), courier_max(df1.iloc[metade:])]
+
+    pd.testing.assert_frame_equal(_texto(merge_courier_max(*partes)), _texto(courier_max(df1)))
+
+
+def test_maximos_mantidos_no_append(raw, df1):
+    ultimo = df1['Order_Date'].max()
+    datas = pd.to_datetime(raw['Order_Date'], format='%d-%m-%Y')
+
+    dataset = LiveDataset(df1.loc[df1['Order_Date'] < ultimo].reset_index(drop=True), ('synthetic',))
+    _assert_maximos_iguais(dataset.state)
+    dataset.append(raw.loc[datas == ultimo])
+    _assert_maximos_iguais(dataset.state)
+
+
+def test_selects_all(df1):
+    state = LiveDataset(df1, ('synthetic',)).state
+    inicio, fim = date_bounds(state.row_index)
+
+    assert selects_all(state.row_index, (inicio, fim), TRAFEGO)
+    assert not selects_all(state.row_index, (inicio, fim), ['Low', 'Jam'])
+    assert not selects_all(state.row_index, (inicio + pd.Timedelta(days=1), fim), TRAFEGO)
+    assert not selects_all(state.row_index, (inicio, fim), TRAFEGO, {'City': ['Metropolitian']})
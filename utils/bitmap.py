@@ -0,0 +1,128 @@
+#==============================
+# Bibliotecas
+#==============================
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+#----------------------------------------------------------------------------------
+
+# colunas categóricas com um bitmap por valor: as dos filtros da barra lateral
+BITMAP_COLUMNS = ['Road_traffic_density', 'City', 'Weatherconditions', 'Type_of_vehicle', 'Type_of_order', 'Festival']
+
+# filtros cruzados da barra lateral, além das condições de tráfego: coluna -> rótulo
+CROSS_FILTERS = {'City': 'Cidades', 'Weatherconditions': 'Condições climáticas', 'Type_of_vehicle': 'Tipos de veículo',
+                 'Type_of_order': 'Tipos de pedido', 'Festival': 'Festival'}
+
+#==============================
+# Estruturas
+#==============================
+
+class BitmapIndex(NamedTuple):
+    ''' Índice bitmap das linhas do DataFrame limpo: um bitmap por valor de cada coluna de BITMAP_COLUMNS.
+
+        n_rows: quantidade de linhas indexadas
+        bitmaps: {coluna: {valor: bitmap}}. Cada bitmap tem um bit por linha, compactado com np.packbits
+                 (uint8, 8 linhas por byte): o bit i é 1 quando a linha i tem o valor. Os valores de uma
+                 mesma coluna se combinam com OR e as colunas entre si com AND.
+    '''
+    n_rows: int
+    bitmaps: dict
+
+#==============================
+# Funções
+#==============================
+
+def _value_bitmaps(coluna):
+    ''' Um bitmap compactado para cada valor observado da coluna. '''
+    codigos, valores = pd.factorize(coluna, sort=True)
+
+    return {valor: np.packbits(codigos == i) for i, valor in enumerate(np.asarray(valores, dtype=object))}
+
+
+def build_bitmap_index(df1):
+    ''' Esta função monta o índice bitmap das colunas de BITMAP_COLUMNS presentes no DataFrame.
+
+        Input: DataFrame limpo e ordenado por Order_Date
+        Output: BitmapIndex
+    '''
+    return BitmapIndex(len(df1), {coluna: _value_bitmaps(df1[coluna]) for coluna in BITMAP_COLUMNS if coluna in df1.columns})
+
+
+def _append_bits(bitmap, n_rows, bits):
+    ''' Acrescenta bits (bool) depois dos n_rows primeiros bits de um bitmap compactado. '''
+    resto = n_rows % 8
+    if resto == 0:
+        return np.concatenate([bitmap[:n_rows // 8], np.packbits(bits)])
+
+    # o último byte está pela metade: seus bits são juntados aos novos antes de compactar
+    inicio = np.unpackbits(bitmap[n_rows // 8:n_rows // 8 + 1])[:resto].astype(bool)
+
+    return np.concatenate([bitmap[:n_rows // 8], np.packbits(np.concatenate([inicio, bits]))])
+
+
+def extend_bitmap_index(index, batch):
+    ''' Esta função acrescenta ao índice as linhas de um lote colocado no fim do DataFrame.
+
+        Ações realizadas:
+        1 - Para cada valor já indexado, acrescenta ao bitmap os bits das linhas do lote
+        2 - Os valores que só aparecem no lote ganham um bitmap com zeros nas linhas antigas
+
+        O custo depende do tamanho do lote e da quantidade de valores, não do total de linhas.
+
+        Input: BitmapIndex e lote (DataFrame) acrescentado no fim
+        Output: BitmapIndex atualizado (o índice recebido não é alterado)
+    '''
+    vazio = np.zeros(-(-index.n_rows // 8), dtype=np.uint8)
+    bitmaps = {}
+    for coluna, por_valor in index.bitmaps.items():
+        valores = batch[coluna].astype(object).to_numpy()
+        novos = pd.unique(valores[pd.notna(valores)])
+        bitmaps[coluna] = {valor: _append_bits(por_valor.get(valor, vazio), index.n_rows, valores == valor)
+                           for valor in [*por_valor, *(valor for valor in novos if valor not in por_valor)]}
+
+    return BitmapIndex(index.n_rows + len(batch), bitmaps)
+
+
+def column_values(index, coluna):
+    ''' Valores indexados de uma coluna, em ordem (opções do filtro na barra lateral). '''
+    return sorted(index.bitmaps[coluna])
+
+
+def active_filters(index, selecoes):
+    ''' Filtros que de fato restringem as linhas: as colunas em que nem todos os valores indexados foram selecionados.
+
+        Input: BitmapIndex e {coluna: valores selecionados}
+        Output: {coluna: tupla ordenada dos valores selecionados}, hashable item a item (chave de cache)
+    '''
+    return {coluna: tuple(sorted(valores)) for coluna, valores in selecoes.items()
+            if not set(valores) >= set(index.bitmaps[coluna])}
+
+
+def select_rows(index, inicio, fim, selecoes):
+    ''' Esta função resolve uma combinação de filtros em posições de linhas, só com operações sobre os bitmaps.
+
+        Ações realizadas:
+        1 - Recorta os bitmaps nos bytes das linhas inicio:fim (o período, já que as linhas estão ordenadas por data)
+        2 - Faz o OR dos bitmaps dos valores selecionados de cada coluna
+        3 - Faz o AND entre as colunas
+        4 - Descompacta o resultado em posições e descarta as das bordas fora de inicio:fim
+
+        Input: BitmapIndex, primeira e última + 1 linhas do período e {coluna: valores selecionados}
+        Output: posições (ordenadas) das linhas selecionadas
+    '''
+    primeiro, ultimo = inicio // 8, -(-fim // 8)
+    selecao = None
+    for coluna, valores in selecoes.items():
+        por_valor = index.bitmaps[coluna]
+        bits = np.zeros(ultimo - primeiro, dtype=np.uint8)
+        for valor in valores:
+            if valor in por_valor:
+                bits |= por_valor[valor][primeiro:ultimo]
+        selecao = bits if selecao is None else np.bitwise_and(selecao, bits, out=selecao)
+
+    if selecao is None:
+        return np.arange(inicio, fim)
+
+    posicoes = np.flatnonzero(np.unpackbits(selecao)) + primeiro * 8
+
+    return posicoes[np.searchsorted(posicoes, inicio):np.searchsorted(posicoes, fim)]
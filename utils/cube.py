@@ -0,0 +1,306 @@
+#==============================
+# Bibliotecas
+#==============================
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+from utils.pipeline import calendar_parts
+from utils.stats import Moments, accumulate, assign_moments, finalize, frame_moments, merge_moments, moment_columns, reduce_moments, take_moments
+#----------------------------------------------------------------------------------
+
+# dimensões do cubo: a data e todas as categorias usadas nos gráficos e nos filtros da barra lateral
+CUBE_DIMENSIONS = ['Order_Date', 'Road_traffic_density', 'City', 'Festival', 'Type_of_order', 'Weatherconditions', 'Type_of_vehicle']
+
+# medidas aditivas de cada célula: quantidade de pedidos, soma e soma dos quadrados do tempo de entrega
+MEASURES = ['count', 'time_sum', 'time_sumsq']
+
+# atributo de calendário de cada célula, derivado da data (não é dimensão: não entra no agrupamento)
+CELL_CALENDAR = 'week_of_year'
+
+# acumuladores de Welford das avaliações de cada célula (combinados com utils.stats, não somados)
+RATING_MOMENTS = moment_columns('rating')
+
+#==============================
+# Estruturas
+#==============================
+
+class DailyCube(NamedTuple):
+    ''' Pré-agregação diária dos pedidos.
+
+        cells: uma linha por combinação observada de CUBE_DIMENSIONS com as medidas
+               count, time_sum e time_sumsq (tempo de entrega em minutos), os acumuladores
+               rating_count, rating_mean e rating_m2 (avaliação dos entregadores) e a semana
+               do ano da data (week_of_year, int8), que permite agregar por semana sem voltar às linhas
+        couriers: pares distintos (célula, entregador) de cada parte do cubo (a montagem e cada lote acrescentado),
+                  em int32 com forma (n, 2): o par [c, e] marca que o entregador courier_ids[e] fez entregas na
+                  célula c do cubo completo. É exato e ocupa 8 bytes por par (no máximo um por pedido), sem
+                  depender da quantidade de entregadores; um lote novo só acrescenta a sua parte à tupla.
+        courier_ids: Delivery_person_ID de cada número de entregador dos pares
+        courier_rows: posição no cubo completo de cada linha de cells. None no cubo completo; o cubo filtrado
+                      guarda só as posições e compartilha os pares, sem cópia.
+    '''
+    cells: pd.DataFrame
+    couriers: tuple
+    courier_ids: pd.Index
+    courier_rows: np.ndarray = None
+
+#==============================
+# Funções
+#==============================
+
+def _with_week(cells):
+    ''' Acrescenta às células a semana do ano da data (calculada sobre as células, não sobre as linhas). '''
+    cells[CELL_CALENDAR] = calendar_parts(cells['Order_Date'])['week_of_year']
+
+    return cells
+
+
+def _cells_and_codes(df1):
+    ''' Células (dimensões + medidas) de um DataFrame e o número da célula de cada linha. '''
+    grupos = df1.groupby(CUBE_DIMENSIONS, observed=True, sort=True)
+    celula = grupos.ngroup().to_numpy()
+    n_celulas = grupos.ngroups
+
+    # as somas ficam em int64: são exatas e a variância é derivada delas sem erro de arredondamento
+    tempo = df1['Time_taken(min)'].to_numpy(dtype=np.int64)
+    cells = grupos.size().index.to_frame(index=False)
+    cells['count'] = np.bincount(celula, minlength=n_celulas)
+    cells['time_sum'] = np.bincount(celula, weights=tempo, minlength=n_celulas).astype(np.int64)
+    cells['time_sumsq'] = np.bincount(celula, weights=tempo * tempo, minlength=n_celulas).astype(np.int64)
+    cells = assign_moments(cells, accumulate(df1['Delivery_person_Ratings'], celula, n_celulas), 'rating')
+
+    return _with_week(cells), celula
+
+
+def _courier_pairs(celula, entregador, n_entregadores):
+    ''' Pares distintos (célula, entregador) das linhas, ordenados por célula (int32, forma (n, 2)). '''
+    n_entregadores = max(n_entregadores, 1)
+    pares = np.unique(np.asarray(celula, dtype=np.int64) * n_entregadores + entregador)
+
+    return np.stack(np.divmod(pares, n_entregadores), axis=1).astype(np.int32)
+
+
+def _courier_rows(cube):
+    ''' Posição no cubo completo de cada célula do cubo (filtrado ou não). '''
+    return np.arange(len(cube.cells)) if cube.courier_rows is None else cube.courier_rows
+
+
+def _courier_presence(cube, rotulos, n_rotulos):
+    ''' Esta função marca quais entregadores aparecem em cada grupo de células do cubo.
+
+        Ações realizadas:
+        1 - Monta o rótulo de cada célula do cubo completo (-1 nas células fora do cubo filtrado)
+        2 - Percorre os pares (célula, entregador) de cada parte e marca os entregadores das células rotuladas
+
+        O custo é proporcional à quantidade de pares; a matriz tem uma linha por grupo (ex.: semanas).
+
+        Input: DailyCube (filtrado ou não), rótulo (0 a n_rotulos - 1) de cada linha de cube.cells e quantidade de rótulos
+        Output: np.ndarray bool com forma (n_rotulos, entregadores)
+    '''
+    posicoes = _courier_rows(cube)
+    # a última posição fica sempre com -1: células além dela (np.take com mode='clip') não estão selecionadas
+    rotulo_celula = np.full(int(posicoes.max()) + 2 if len(posicoes) else 1, -1, dtype=np.int64)
+    rotulo_celula[posicoes] = rotulos
+
+    presenca = np.zeros((n_rotulos, len(cube.courier_ids)), dtype=bool)
+    for pares in cube.couriers:
+        rotulo = np.take(rotulo_celula, pares[:, 0], mode='clip')
+        selecionados = rotulo >= 0
+        presenca[rotulo[selecionados], pares[selecionados, 1]] = True
+
+    return presenca
+
+
+def build_cube(df1):
+    ''' Esta função monta o cubo diário a partir do DataFrame limpo.
+
+        Ações realizadas:
+        1 - Numera as combinações observadas das dimensões (uma célula por combinação)
+        2 - Soma contagem, tempo e tempo ao quadrado e acumula as avaliações de cada célula
+        3 - Guarda os pares distintos (célula, entregador) das linhas
+
+        Input: DataFrame limpo
+        Output: DailyCube
+    '''
+    cells, celula = _cells_and_codes(df1)
+
+    entregador, ids = pd.factorize(df1['Delivery_person_ID'])
+    courier_ids = pd.Index(np.asarray(ids, dtype=object))
+
+    return DailyCube(cells, (_courier_pairs(celula, entregador, len(courier_ids)),), courier_ids)
+
+
+def append_to_cube(cube, batch):
+    ''' Esta função soma um lote de pedidos novos ao cubo, sem recalcular as células antigas.
+
+        Ações realizadas:
+        1 - Agrega o lote em células (mesmas dimensões e medidas do cubo)
+        2 - Numera os entregadores que ainda não existiam (depois dos atuais)
+        3 - Soma as medidas e combina as avaliações nas células que já existiam
+        4 - Acrescenta no fim as células novas
+        5 - Acrescenta os pares (célula, entregador) do lote como uma nova parte, já nas posições do cubo
+
+        O custo depende do tamanho do lote e da quantidade de células, não do total de pedidos: os pares
+        das partes anteriores não são copiados.
+        As categorias das colunas categóricas do lote precisam incluir as do cubo.
+
+        Input: DailyCube completo (não filtrado) e DataFrame limpo com os pedidos novos
+        Output: DailyCube atualizado (o cubo recebido não é alterado)
+    '''
+    if cube.courier_rows is not None:
+        raise ValueError('append_to_cube recebe o cubo completo, não um cubo filtrado')
+
+    cells_lote, celula = _cells_and_codes(batch)
+
+    # entregadores do lote: os novos ganham os próximos números
+    ids_lote = batch['Delivery_person_ID'].astype(object)
+    courier_ids = cube.courier_ids.append(pd.Index(ids_lote.unique()).difference(cube.courier_ids, sort=False))
+    entregador = courier_ids.get_indexer(ids_lote)
+
+    # células do lote que já existem no cubo; as novas ficam nas posições depois das atuais
+    posicao = pd.MultiIndex.from_frame(cube.cells[CUBE_DIMENSIONS]).get_indexer(pd.MultiIndex.from_frame(cells_lote[CUBE_DIMENSIONS]))
+    existentes = posicao >= 0
+    posicao_final = np.where(existentes, posicao, len(cube.cells) + np.cumsum(~existentes) - 1)
+    couriers = cube.couriers + (_courier_pairs(posicao_final[celula], entregador, len(courier_ids)),)
+
+    cells = cube.cells.copy()
+    # o lote pode trazer categorias novas (cidade, clima, ...): as células antigas passam a usar as mesmas
+    for coluna in CUBE_DIMENSIONS:
+        if isinstance(cells_lote[coluna].dtype, pd.CategoricalDtype) and cells[coluna].dtype != cells_lote[coluna].dtype:
+            cells[coluna] = cells[coluna].cat.set_categories(cells_lote[coluna].cat.categories)
+
+    medidas = cells[MEASURES].to_numpy(copy=True)
+    medidas[posicao[existentes]] += cells_lote.loc[existentes, MEASURES].to_numpy()
+    cells[MEASURES] = medidas
+    avaliacoes = Moments(*(valores.copy() for valores in frame_moments(cells, 'rating')))
+    novas = merge_moments(take_moments(avaliacoes, posicao[existentes]), frame_moments(cells_lote.loc[existentes], 'rating'))
+    for antigos, combinados in zip(avaliacoes, novas):
+        antigos[posicao[existentes]] = combinados
+    cells = assign_moments(cells, avaliacoes, 'rating')
+
+    cells = pd.concat([cells, cells_lote.loc[~existentes]], ignore_index=True)
+
+    return DailyCube(cells, couriers, courier_ids)
+
+
+def filter_cube(cube, date_range, traffic_options, filters=None):
+    ''' Aplica os filtros da barra lateral no cubo: datas do período (início inclusive, fim exclusive),
+        condições de tráfego e filtros cruzados ({coluna: valores selecionados}, todas dimensões do cubo).
+
+        O custo é proporcional ao número de células, não ao número de pedidos. Os pares de entregadores
+        não são copiados: o cubo filtrado guarda as posições das células selecionadas (courier_rows).
+
+        Input: DailyCube, período (início, fim), lista de condições de tráfego e filtros cruzados
+        Output: DailyCube só com as células selecionadas
+    '''
+    cells = cube.cells
+    inicio, fim = date_range
+    linhas_selecionadas = ((cells['Order_Date'] >= inicio) & (cells['Order_Date'] < fim)
+                           & cells['Road_traffic_density'].isin(traffic_options))
+    for coluna, valores in (filters or {}).items():
+        linhas_selecionadas &= cells[coluna].isin(valores)
+    linhas_selecionadas = linhas_selecionadas.to_numpy()
+
+    return DailyCube(cells.loc[linhas_selecionadas, :].reset_index(drop=True), cube.couriers, cube.courier_ids,
+                     _courier_rows(cube)[linhas_selecionadas])
+
+
+def counts(cube, by):
+    ''' Quantidade de pedidos por grupo das células do cubo (só a medida count).
+
+        counts, rollup e rating_rollup só usam cube.cells: também aceitam os totais de um período
+        (utils.prefix.RangeTotals), agrupando por cidade e condição de tráfego.
+    '''
+    return cube.cells.groupby(by, observed=True)['count'].sum().reset_index()
+
+
+def moments(cells, by):
+    ''' Agrupa células pré-agregadas (count, time_sum, time_sumsq) e calcula quantidade, média e desvio padrão do tempo.
+
+        O desvio padrão é o amostral (ddof=1), o mesmo do pandas: var = (sumsq - sum²/n) / (n - 1).
+
+        Input: DataFrame de células e lista de colunas para agrupar
+        Output: DataFrame com as colunas de by, count, avg_time e std_time
+    '''
+    df_aux = cells.groupby(by, observed=True)[MEASURES].sum().reset_index()
+
+    n = df_aux['count']
+    df_aux['avg_time'] = df_aux['time_sum'] / n
+    variancia = (df_aux['time_sumsq'] - df_aux['time_sum'] ** 2 / n) / (n - 1)
+    df_aux['std_time'] = np.sqrt(variancia.clip(lower=0).where(n > 1))
+
+    return df_aux.drop(columns=['time_sum', 'time_sumsq'])
+
+
+def rating_moments(cells, by):
+    ''' Agrupa células pré-agregadas e calcula quantidade, média e desvio padrão (ddof=1) das avaliações.
+
+        Os acumuladores das células são combinados (reduce_moments): o custo depende do número de células.
+
+        Input: DataFrame de células e lista de colunas para agrupar
+        Output: DataFrame com as colunas de by, rating_count, rating_mean e rating_std
+    '''
+    grupos = cells.groupby(by, observed=True, sort=True)
+    avaliacoes = reduce_moments(frame_moments(cells, 'rating'), grupos.ngroup().to_numpy(), grupos.ngroups)
+
+    df_aux = grupos.size().index.to_frame(index=False)
+    df_aux['rating_count'] = avaliacoes.count
+    df_aux['rating_mean'], df_aux['rating_std'] = finalize(avaliacoes)
+
+    return df_aux
+
+
+def rollup(cube, by):
+    ''' Agrupa as células do cubo e calcula quantidade, tempo médio e desvio padrão do tempo (ver moments).
+
+        Input: DailyCube e lista de colunas para agrupar
+        Output: DataFrame com as colunas de by, count, avg_time e std_time
+    '''
+    return moments(cube.cells, by)
+
+
+def rating_rollup(cube, by):
+    ''' Agrupa as células do cubo e calcula quantidade, média e desvio padrão das avaliações (ver rating_moments). '''
+    return rating_moments(cube.cells, by)
+
+
+def aggregate_cells(df1):
+    ''' Células do cubo (só as medidas, sem os pares de entregadores).
+
+        Usada para agregar partes do dataset (lotes, partições) que depois são combinadas com merge_cells.
+
+        Input: DataFrame limpo
+        Output: DataFrame com CUBE_DIMENSIONS + MEASURES + RATING_MOMENTS + week_of_year
+    '''
+    return _cells_and_codes(df1)[0]
+
+
+def merge_cells(*partes):
+    ''' Combina células de partes diferentes do dataset: as medidas são somadas e as avaliações combinadas. '''
+    df_aux = pd.concat(partes, ignore_index=True)
+    grupos = df_aux.groupby(CUBE_DIMENSIONS, observed=True, sort=True)
+    avaliacoes = reduce_moments(frame_moments(df_aux, 'rating'), grupos.ngroup().to_numpy(), grupos.ngroups)
+
+    return _with_week(assign_moments(grupos[MEASURES].sum().reset_index(), avaliacoes, 'rating'))
+
+
+def distinct_couriers(cube):
+    ''' Quantidade exata de entregadores distintos nas células do cubo (pares das células selecionadas). '''
+    return int(_courier_presence(cube, 0, 1).sum())
+
+
+def weekly_couriers(cube):
+    ''' Esta função conta os entregadores distintos de cada semana do ano, de forma exata.
+
+        Ações realizadas:
+        1 - Numera as semanas das células
+        2 - Marca os entregadores dos pares das células de cada semana (uma linha por semana)
+        3 - Conta os entregadores marcados em cada linha
+
+        Input: DailyCube (já filtrado)
+        Output: Series com a quantidade de entregadores, indexada pela semana (week_of_year)
+    '''
+    semanas, rotulos = np.unique(cube.cells[CELL_CALENDAR].to_numpy(), return_inverse=True)
+    presenca = _courier_presence(cube, rotulos, len(semanas))
+
+    return pd.Series(presenca.sum(axis=1), index=pd.Index(semanas, name=CELL_CALENDAR), name='entregadores')
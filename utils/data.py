@@ -0,0 +1,504 @@
+#==============================
+# Bibliotecas
+#==============================
+import hashlib
+import json
+import os
+import threading
+from typing import NamedTuple
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.feather as feather
+import streamlit as st
+from utils.bitmap import BITMAP_COLUMNS
+from utils.cube import CUBE_DIMENSIONS, DailyCube, append_to_cube, build_cube
+from utils.geo import COLUNAS_COORDENADAS
+from utils.hll import CourierSketches, build_sketches, merge_sketches
+from utils.instrument import LOAD_TIMINGS, load_timer, pipeline_hook
+from utils.index import RowIndex, build_row_index, extend_row_index, sort_by_date
+from utils.pipeline import COLUNAS_OBRIGATORIAS, run_pipeline
+from utils.prefix import DailyPrefix, build_prefix
+from utils.topk import TOPK_KEYS, courier_max, merge_courier_max
+#----------------------------------------------------------------------------------
+
+# com o copy-on-write ativo as páginas podem filtrar e criar colunas nos seus
+# DataFrames sem alterar a cópia compartilhada que fica no cache
+pd.set_option('mode.copy_on_write', True)
+
+# caminho padrão do dataset
+DATA_PATH = 'train.csv'
+
+# schema do DataFrame limpo: tipos compactos para reduzir a memória residente
+# (categorias para textos repetitivos, inteiros pequenos e float32)
+SCHEMA = {
+    'ID': 'string[pyarrow]',
+    'Delivery_person_ID': 'category',
+    'Delivery_person_Age': 'int8',
+    'Delivery_person_Ratings': 'float32',
+    'Restaurant_latitude': 'float32',
+    'Restaurant_longitude': 'float32',
+    'Delivery_location_latitude': 'float32',
+    'Delivery_location_longitude': 'float32',
+    'Time_Orderd': 'category',
+    'Time_Order_picked': 'category',
+    'Weatherconditions': 'category',
+    'Road_traffic_density': 'category',
+    'Vehicle_condition': 'int8',
+    'Type_of_order': 'category',
+    'Type_of_vehicle': 'category',
+    'multiple_deliveries': 'int8',
+    'Festival': 'category',
+    'City': 'category',
+    'Time_taken(min)': 'int16',
+    'distance': 'float32',
+    'week_of_year': 'int8',
+    'day_of_week': 'int8',
+    'month': 'int8',
+}
+
+# tipos (Arrow) de cada coluna do train.csv na leitura: textos repetitivos já chegam como categorias
+# (dictionary) e Order_Date já chega como data; as colunas numéricas com 'NaN ' ficam em texto até a limpeza
+CSV_TYPES = {
+    'ID': pa.string(),
+    'Delivery_person_ID': pa.dictionary(pa.int32(), pa.string()),
+    'Delivery_person_Age': pa.dictionary(pa.int32(), pa.string()),
+    'Delivery_person_Ratings': pa.dictionary(pa.int32(), pa.string()),
+    'Restaurant_latitude': pa.float64(),
+    'Restaurant_longitude': pa.float64(),
+    'Delivery_location_latitude': pa.float64(),
+    'Delivery_location_longitude': pa.float64(),
+    'Order_Date': pa.timestamp('ns'),
+    'Time_Orderd': pa.dictionary(pa.int32(), pa.string()),
+    'Time_Order_picked': pa.dictionary(pa.int32(), pa.string()),
+    'Weatherconditions': pa.dictionary(pa.int32(), pa.string()),
+    'Road_traffic_density': pa.dictionary(pa.int32(), pa.string()),
+    'Vehicle_condition': pa.int64(),
+    'Type_of_order': pa.dictionary(pa.int32(), pa.string()),
+    'Type_of_vehicle': pa.dictionary(pa.int32(), pa.string()),
+    'multiple_deliveries': pa.dictionary(pa.int32(), pa.string()),
+    'Festival': pa.dictionary(pa.int32(), pa.string()),
+    'City': pa.dictionary(pa.int32(), pa.string()),
+    'Time_taken(min)': pa.dictionary(pa.int32(), pa.string()),
+}
+
+# formato das datas do CSV
+DATE_FORMAT = '%d-%m-%Y'
+
+# colunas que cada página usa do DataFrame limpo (o cubo, os índices e os sketches têm as suas, abaixo)
+PAGE_COLUMNS = {
+    'Visão Empresa': ['City', 'Road_traffic_density', *COLUNAS_COORDENADAS],
+    'Visão Entregadores': ['Delivery_person_ID', 'Delivery_person_Age', 'Delivery_person_Ratings', 'Vehicle_condition', 'City', 'Time_taken(min)'],
+    'Visão Restaurantes': ['City', 'distance'],
+}
+
+# colunas lidas do CSV: as das páginas, as da limpeza (validação e distância) e as do cubo, índices e sketches
+# (Time_Orderd e Time_Order_picked não são usadas e ficam de fora)
+LOAD_COLUMNS = [coluna for coluna in CSV_TYPES
+                if coluna in {*COLUNAS_OBRIGATORIAS, *COLUNAS_COORDENADAS, *CUBE_DIMENSIONS, *BITMAP_COLUMNS, 'Delivery_person_ID',
+                              'Delivery_person_Ratings', *(c for colunas in PAGE_COLUMNS.values() for c in colunas)}]
+
+# colunas de texto do Arrow viram string[pyarrow], sem criar um objeto Python por linha
+ARROW_TEXT_TYPES = {pa.string(): pd.StringDtype('pyarrow'), pa.large_string(): pd.StringDtype('pyarrow')}
+
+# tipos que essas colunas teriam sem o schema (usados no relatório de memória)
+LEGACY_TYPES = {'category': object, 'string[pyarrow]': object, 'int8': 'int64', 'int16': 'int64', 'float32': 'float64'}
+
+# versão do conteúdo do cache em disco: deve ser incrementada quando a limpeza mudar
+CACHE_VERSION = 7
+
+# sufixo do arquivo colunar (Arrow/Feather) salvo ao lado do CSV
+CACHE_SUFFIX = '.cleaned.feather'
+
+# chave dos metadados do arquivo de cache que identifica o CSV de origem e o schema
+CACHE_METADATA_KEY = b'cache_key'
+
+# bytes lidos por vez no hash do CSV (a memória usada não depende do tamanho do arquivo)
+HASH_CHUNK = 1 << 20
+
+# variável de ambiente com a quantidade de processos da limpeza quando o cache precisa ser refeito
+WORKERS_ENV = 'LOAD_WORKERS'
+
+#==============================
+# Funções
+#==============================
+
+def load_workers():
+    ''' Processos usados na limpeza, lidos da variável LOAD_WORKERS (1 quando não definida: no próprio processo, sem pool). '''
+    valor = os.environ.get(WORKERS_ENV, '1').strip() or '1'
+    if not valor.isdigit() or int(valor) < 1:
+        raise ValueError(f'{WORKERS_ENV} deve ser um inteiro maior ou igual a 1: {valor!r}')
+
+    return int(valor)
+
+
+def apply_schema(df1):
+    ''' Converte as colunas do DataFrame limpo para os tipos declarados em SCHEMA.
+
+        Colunas que já chegam como categorias (leitura com o pyarrow) ficam só com as categorias
+        presentes, em ordem alfabética, como na conversão a partir do texto.
+
+        Input: DataFrame limpo
+        Output: DataFrame com os tipos compactos e índice sequencial
+    '''
+    for coluna in df1.columns:
+        if SCHEMA.get(coluna) == 'category' and isinstance(df1[coluna].dtype, pd.CategoricalDtype):
+            serie = df1[coluna].cat.remove_unused_categories()
+            df1[coluna] = serie.cat.reorder_categories(serie.cat.categories.sort_values())
+
+    df1 = df1.astype({coluna: tipo for coluna, tipo in SCHEMA.items() if coluna in df1.columns})
+
+    return df1.reset_index(drop=True)
+
+
+def _parse_minutes(coluna):
+    ''' Converte '(min) 24' -> 24 só nos valores distintos (dicionário) de cada bloco lido pelo Arrow. '''
+    blocos = []
+    for bloco in coluna.chunks:
+        minutos = pc.cast(pc.replace_substring(bloco.dictionary, '(min) ', ''), pa.int16())
+        blocos.append(pc.take(minutos, bloco.indices))
+
+    return pa.chunked_array(blocos, pa.int16())
+
+
+def read_orders(path, columns=LOAD_COLUMNS):
+    ''' Esta função lê o CSV de pedidos com o leitor multithread do pyarrow, só com as colunas pedidas.
+
+        Ações realizadas:
+        1 - Lê só as colunas pedidas, com os tipos explícitos de CSV_TYPES (sem inferência)
+        2 - Converte Order_Date para data durante a leitura ('%d-%m-%Y')
+        3 - Converte Time_taken(min) para inteiro nos valores distintos do dicionário
+        4 - Entrega um DataFrame com categorias nos textos repetitivos e string[pyarrow] no ID
+
+        As linhas com 'NaN ' continuam no resultado: a limpeza (utils.pipeline) é a mesma da leitura com o pandas.
+
+        Input: caminho do CSV e colunas (padrão: LOAD_COLUMNS, a soma das páginas com a limpeza e o cubo)
+        Output: DataFrame
+    '''
+    colunas = [coluna for coluna in CSV_TYPES if coluna in columns]
+    table = pacsv.read_csv(path,
+                           read_options=pacsv.ReadOptions(use_threads=True),
+                           convert_options=pacsv.ConvertOptions(column_types={coluna: CSV_TYPES[coluna] for coluna in colunas},
+                                                                include_columns=colunas,
+                                                                timestamp_parsers=[DATE_FORMAT]))
+    if 'Time_taken(min)' in colunas:
+        table = table.set_column(table.schema.get_field_index('Time_taken(min)'), 'Time_taken(min)', _parse_minutes(table['Time_taken(min)']))
+
+    return table.to_pandas(types_mapper=ARROW_TEXT_TYPES.get)
+
+
+def cache_path(path):
+    ''' Caminho do cache colunar correspondente a um CSV (train.csv -> train.cleaned.feather). '''
+    return os.path.splitext(path)[0] + CACHE_SUFFIX
+
+
+def source_fingerprint(path):
+    ''' Identifica a versão do CSV de origem pelo tamanho, data de modificação e hash do conteúdo.
+
+        Input: caminho do CSV
+        Output: dicionário com size, mtime_ns e sha256
+    '''
+    stat = os.stat(path)
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(HASH_CHUNK), b''):
+            sha256.update(bloco)
+
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha256.hexdigest()}
+
+
+def _cache_key(fingerprint):
+    ''' Chave gravada no cache: versão do CSV de origem, schema e versão da limpeza. '''
+    return {'source': fingerprint, 'schema': SCHEMA, 'version': CACHE_VERSION}
+
+
+def read_cache(path, fingerprint):
+    ''' Lê o cache colunar se ele existir e tiver sido gerado a partir da mesma versão do CSV.
+
+        O arquivo (Feather comprimido com lz4, o padrão do write_feather) é lido inteiro: todas as colunas
+        são descomprimidas e convertidas para o DataFrame. O ganho em relação ao CSV vem de pular a
+        leitura do texto e a limpeza, não de ler só parte do arquivo.
+
+        Input: caminho do CSV e fingerprint atual dele
+        Output: DataFrame limpo ou None se o cache não existir ou estiver desatualizado
+                (CSV diferente, schema diferente ou outra versão da limpeza)
+    '''
+    caminho = cache_path(path)
+    if not os.path.exists(caminho):
+        return None
+
+    try:
+        table = feather.read_table(caminho)
+    except (OSError, pa.ArrowInvalid):
+        # arquivo corrompido ou gravado pela metade: será refeito
+        return None
+
+    metadata = table.schema.metadata or {}
+    if json.loads(metadata.get(CACHE_METADATA_KEY, b'null')) != _cache_key(fingerprint):
+        return None
+
+    # colunas de texto voltam como string[pyarrow], sem criar um objeto Python por linha
+    # (os tipos vêm do próprio schema Arrow: dictionary -> category, int8 -> int8, ...)
+    return table.to_pandas(ignore_metadata=True, types_mapper=ARROW_TEXT_TYPES.get)
+
+
+def write_cache(df1, path, fingerprint):
+    ''' Salva o DataFrame limpo no cache colunar, junto com o fingerprint do CSV de origem.
+
+        A escrita é feita em um arquivo temporário e depois renomeada, para que outro processo
+        nunca leia um cache incompleto. Se a pasta não permitir escrita o cache é ignorado.
+
+        Input: DataFrame limpo, caminho do CSV e fingerprint dele
+        Output: None
+    '''
+    caminho = cache_path(path)
+    table = pa.Table.from_pandas(df1, preserve_index=False)
+    metadata = {**(table.schema.metadata or {}), CACHE_METADATA_KEY: json.dumps(_cache_key(fingerprint)).encode()}
+    table = table.replace_schema_metadata(metadata)
+
+    temporario = f'{caminho}.{os.getpid()}.tmp'
+    try:
+        feather.write_feather(table, temporario)
+        os.replace(temporario, caminho)
+    except OSError:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+    return None
+
+
+def load_cleaned(path):
+    ''' Carrega o DataFrame limpo, usando o cache colunar em disco sempre que ele estiver válido.
+
+        Se o CSV mudou (tamanho, data de modificação ou conteúdo) o CSV é lido (read_orders: só as
+        colunas usadas, com o leitor do pyarrow), passa pelas
+        etapas de utils.pipeline (limpeza e colunas derivadas), é convertido para os tipos compactos, ordenado por Order_Date
+        (o que permite filtrar as datas por busca binária) e o cache é refeito.
+        Com a variável LOAD_WORKERS > 1 a limpeza é dividida por faixas de datas entre processos
+        (iniciados por forkserver ou spawn, seguros dentro do servidor do Streamlit; ver utils.parallel).
+        Cada etapa fica medida em utils.instrument.LOAD_TIMINGS (painel de diagnóstico).
+
+        Input: caminho do CSV
+        Output: DataFrame limpo
+    '''
+    LOAD_TIMINGS.clear()
+    with load_timer('fingerprint do CSV'):
+        fingerprint = source_fingerprint(path)
+
+    with load_timer('leitura do cache'):
+        df1 = read_cache(path, fingerprint)
+    if df1 is None:
+        workers = load_workers()
+        with load_timer('leitura do CSV'):
+            raw = read_orders(path)
+        if workers > 1:
+            # import local: utils.parallel importa este módulo
+            from utils.parallel import parallel_clean
+            with load_timer('limpeza em paralelo'):
+                df1 = parallel_clean(raw, workers)
+        else:
+            df1 = run_pipeline(raw, hook=pipeline_hook('limpeza'))
+            with load_timer('schema'):
+                df1 = apply_schema(df1)
+        with load_timer('ordenação por data'):
+            df1 = sort_by_date(df1)
+        with load_timer('gravação do cache'):
+            write_cache(df1, path, fingerprint)
+
+    return df1
+
+
+def file_version(path=DATA_PATH):
+    ''' Versão do arquivo de dados: (caminho, tamanho em bytes, mtime em ns). Muda sempre que o arquivo muda. '''
+    stat = os.stat(path)
+
+    return (path, stat.st_size, stat.st_mtime_ns)
+
+
+class DatasetState(NamedTuple):
+    ''' Retrato do dataset em memória: tudo que as páginas usam, sempre de uma mesma versão.
+
+        frame: DataFrame limpo, ordenado por Order_Date
+        row_index: índices de data e de tráfego do frame (utils.index.RowIndex)
+        cube: cubo diário pré-agregado (utils.cube.DailyCube)
+        prefix: somas acumuladas por dia, tráfego e cidade, para os totais de um período (utils.prefix.DailyPrefix)
+        sketches: sketches HyperLogLog dos entregadores por dia e por (dia, tráfego) (utils.hll.CourierSketches)
+        courier_max: maior tempo de entrega de cada entregador em cada cidade em todo o dataset
+                     (utils.topk.courier_max), base do ranking quando nenhum filtro restringe as linhas
+        version: (caminho, tamanho, mtime, lotes acrescentados): chave dos caches derivados
+    '''
+    frame: pd.DataFrame
+    row_index: RowIndex
+    cube: DailyCube
+    prefix: DailyPrefix
+    sketches: CourierSketches
+    courier_max: pd.DataFrame
+    version: tuple
+
+
+class LiveDataset:
+    ''' Dataset em memória compartilhado entre as sessões, que aceita lotes de pedidos novos.
+
+        Cada lote gera um novo DatasetState que substitui o anterior de uma vez: quem já pegou
+        o retrato antigo continua com dados consistentes até a próxima execução da página.
+    '''
+
+    def __init__(self, df1, version):
+        self._lock = threading.Lock()
+        with load_timer('índices de data/tráfego'):
+            row_index = build_row_index(df1)
+        with load_timer('cubo diário'):
+            cube = build_cube(df1)
+        with load_timer('somas acumuladas por dia'):
+            prefix = build_prefix(cube)
+        with load_timer('sketches de entregadores'):
+            sketches = build_sketches(df1)
+        with load_timer('maior tempo por entregador'):
+            maximos = courier_max(df1)
+        self.state = DatasetState(df1, row_index, cube, prefix, sketches, maximos, version + (0,))
+
+    def append(self, raw):
+        ''' Esta função acrescenta um lote de pedidos (no formato do train.csv) ao dataset.
+
+            Ações realizadas:
+            1 - Limpa o lote com as mesmas etapas do carregamento (run_pipeline e SCHEMA) e fica só com
+                as colunas do DataFrame atual (o carregamento lê só LOAD_COLUMNS do CSV)
+            2 - Junta as categorias novas do lote às do DataFrame
+            3 - Acrescenta o lote ao DataFrame; se ele só tem datas iguais ou posteriores à última,
+                o índice de datas é apenas estendido, senão o DataFrame é reordenado e o índice refeito
+            4 - Soma o lote ao cubo diário (contagens, somas, somas dos quadrados e entregadores),
+                refaz as somas acumuladas a partir do cubo e combina os sketches de entregadores do lote com os atuais
+            5 - Combina o maior tempo por entregador do lote com o atual (vale o maior), sem voltar às linhas antigas
+
+            Input: DataFrame com as linhas novas, ainda sem limpeza
+            Output: quantidade de linhas válidas acrescentadas
+        '''
+        batch = sort_by_date(apply_schema(run_pipeline(raw)))
+        if batch.empty:
+            return 0
+
+        with self._lock:
+            atual = self.state
+            # sem a projeção, colunas fora do DataFrame (ex.: Time_Orderd) voltariam com NaN nas linhas antigas
+            batch = batch.loc[:, list(atual.frame.columns)]
+            frame, batch = _align_categories(atual.frame.copy(deep=False), batch)
+            n_rows = len(frame)
+            frame = pd.concat([frame, batch], ignore_index=True)
+
+            if len(atual.row_index.days) == 0 or batch['Order_Date'].iloc[0] >= atual.row_index.days[-1]:
+                row_index = extend_row_index(atual.row_index, batch, n_rows)
+            else:
+                frame = sort_by_date(frame)
+                row_index = build_row_index(frame)
+
+            cube = append_to_cube(atual.cube, batch)
+            prefix = build_prefix(cube)
+            sketches = merge_sketches(atual.sketches, build_sketches(batch))
+            # as categorias do DataFrame incluem as novas do lote: a tabela atual passa a usar as mesmas
+            maximos = atual.courier_max.astype({coluna: frame[coluna].dtype for coluna in TOPK_KEYS})
+            maximos = merge_courier_max(maximos, courier_max(batch))
+            version = atual.version[:-1] + (atual.version[-1] + 1,)
+            self.state = DatasetState(frame, row_index, cube, prefix, sketches, maximos, version)
+
+        return len(batch)
+
+
+def _align_categories(frame, batch):
+    ''' Faz as colunas categóricas do DataFrame e do lote usarem as mesmas categorias (as atuais + as novas do lote). '''
+    for coluna in frame.columns:
+        if isinstance(frame[coluna].dtype, pd.CategoricalDtype):
+            atuais = frame[coluna].cat.categories
+            novas = pd.Index(batch[coluna].astype(object).unique()).difference(atuais, sort=False)
+            if len(novas):
+                frame[coluna] = frame[coluna].cat.add_categories(novas)
+            batch[coluna] = pd.Categorical(batch[coluna].astype(object), categories=frame[coluna].cat.categories)
+
+    return frame, batch
+
+
+@st.cache_resource(show_spinner='Carregando os dados...', max_entries=1)
+def _live_dataset(path, size, mtime):
+    ''' Carrega os dados limpos (do cache em disco ou do CSV) uma única vez por processo.
+
+        O tamanho e a data de modificação do arquivo fazem parte da chave do cache,
+        então uma nova versão do arquivo gera uma nova entrada e descarta a antiga.
+        Por ser um cache_resource, todas as sessões recebem o mesmo objeto em memória.
+
+        Input: caminho, tamanho (bytes) e mtime (ns) do arquivo
+        Output: LiveDataset
+    '''
+    return LiveDataset(load_cleaned(path), (path, size, mtime))
+
+
+def live_dataset(path=DATA_PATH):
+    ''' Dataset em memória (LiveDataset) correspondente à versão atual do arquivo. '''
+    return _live_dataset(*file_version(path))
+
+
+def load_dataset(path=DATA_PATH, columns=None):
+    ''' Esta função entrega para as páginas o retrato atual do dataset (DatasetState).
+
+        O DataFrame em cache é compartilhado por todas as sessões, por isso a página recebe
+        uma cópia rasa: com o copy-on-write, nenhuma alteração feita pela página chega ao cache
+        e os dados só são duplicados se alguma coluna for de fato modificada.
+        Com columns (ex.: PAGE_COLUMNS da página) o DataFrame vem só com essas colunas, também sem cópia.
+
+        Input: caminho do arquivo CSV e colunas usadas pela página (None = todas)
+        Output: DatasetState
+    '''
+    state = live_dataset(path).state
+    frame = state.frame if columns is None else state.frame.loc[:, list(columns)]
+
+    return state._replace(frame=frame.copy(deep=False))
+
+
+def data_version(path=DATA_PATH):
+    ''' Versão dos dados em memória: a do arquivo mais a quantidade de lotes acrescentados. '''
+    return live_dataset(path).state.version
+
+
+def append_orders(raw, path=DATA_PATH):
+    ''' Esta função acrescenta pedidos novos ao dataset em memória, sem recarregar o arquivo.
+
+        Os DataFrames, índices, cubo e limites do slider de todas as sessões passam a incluir
+        os pedidos novos na próxima execução das páginas; o cache de gráficos é invalidado pela versão.
+
+        Input: DataFrame com as linhas novas no formato do train.csv e caminho do arquivo
+        Output: quantidade de linhas válidas acrescentadas
+    '''
+    return live_dataset(path).append(raw)
+
+
+def memory_report(df1):
+    ''' Esta função compara a memória de cada coluna com os tipos do SCHEMA e com os tipos originais.
+
+        Input: DataFrame limpo (já com o SCHEMA aplicado)
+        Output: DataFrame com bytes por coluna antes, depois e a redução em %
+    '''
+    depois = df1.memory_usage(index=False, deep=True)
+    antes = pd.Series({coluna: df1[coluna].astype(LEGACY_TYPES.get(SCHEMA.get(coluna), df1[coluna].dtype)).memory_usage(index=False, deep=True)
+                       for coluna in df1.columns})
+
+    df_aux = pd.DataFrame({'antes': antes, 'depois': depois})
+    df_aux.loc['Total'] = df_aux.sum()
+    df_aux['reducao_%'] = ((1 - df_aux['depois'] / df_aux['antes']) * 100).round(1)
+
+    return df_aux.rename_axis('coluna').reset_index()
+
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def _memory_report(version, _frame):
+    ''' Relatório de memória calculado uma vez por versão dos dados. '''
+    return memory_report(_frame)
+
+
+def load_memory_report(path=DATA_PATH):
+    ''' Esta função entrega o relatório de memória do DataFrame em cache para o painel de diagnóstico.
+
+        Input: caminho do arquivo CSV
+        Output: DataFrame com bytes por coluna antes e depois do SCHEMA
+    '''
+    state = live_dataset(path).state
+
+    return _memory_report(state.version, state.frame)
@@ -0,0 +1,72 @@
+#==============================
+# Bibliotecas
+#==============================
+import pandas as pd
+import streamlit as st
+from utils.data import load_memory_report
+from utils.instrument import LOAD_TIMINGS, finish_run
+from utils.memo import get_chart_cache
+#----------------------------------------------------------------------------------
+
+# parâmetro da URL que habilita o painel (ex.: .../Visão_Empresa?diagnostics=1)
+QUERY_PARAM = 'diagnostics'
+
+#==============================
+# Funções
+#==============================
+
+def diagnostics_enabled():
+    ''' O painel de diagnóstico fica escondido e só aparece com ?diagnostics=1 na URL. '''
+    return st.query_params.get(QUERY_PARAM) == '1'
+
+
+def timings_frame(medicoes):
+    ''' Medições ({etapa: {ms, mem_mb, calls}}) em um DataFrame para exibição. '''
+    df_aux = pd.DataFrame.from_dict(medicoes, orient='index', columns=['ms', 'mem_mb', 'calls'], dtype=float)
+
+    return df_aux.round(2).rename_axis('etapa').reset_index()
+
+
+def diagnostics_panel(page):
+    ''' Esta função fecha as medições da execução e mostra na barra lateral o painel de diagnóstico da página.
+
+        Deve ser chamada no fim da página, depois de todos os blocos medidos com timer. As medições
+        são sempre retiradas da sessão; com o painel aberto (ou DIAGNOSTICS_LOG definida) a execução
+        também é registrada no log JSON-lines.
+
+        Conteúdo:
+        1 - Tempos (ms) e variação de memória (MB) medidos nesta execução
+        2 - Tempos do último carregamento dos dados (leitura, etapas da limpeza, índices)
+        3 - Contadores do cache de gráficos (compartilhado entre as sessões)
+        4 - Memória ocupada por coluna do DataFrame em cache, antes e depois do SCHEMA
+
+        Input: nome da página (vai para o log)
+        Output: None
+    '''
+    enabled = diagnostics_enabled()
+    registro = finish_run(page, log=enabled)
+    if not enabled:
+        return None
+
+    colunas = {'etapa': 'Etapa', 'ms': 'Tempo (ms)', 'mem_mb': 'Memória (MB)', 'calls': 'Chamadas'}
+    with st.sidebar.expander('Diagnóstico', expanded=True):
+        st.markdown('##### Tempos desta execução')
+        st.dataframe(timings_frame(registro['timings']), column_config=colunas, hide_index=True, use_container_width=True)
+        if registro['rss_mb'] is not None:
+            st.caption(f"Memória residente do processo: {registro['rss_mb']:,.0f} MB")
+
+        st.markdown('##### Último carregamento dos dados')
+        st.dataframe(timings_frame(dict(LOAD_TIMINGS)), column_config=colunas, hide_index=True, use_container_width=True)
+
+        st.markdown('##### Cache dos gráficos')
+        stats = get_chart_cache().stats()
+        col1, col2 = st.columns(2)
+        col1.metric('Hits', stats['hits'])
+        col2.metric('Misses', stats['misses'])
+        st.caption(f"{stats['entradas']} entradas, {stats['bytes'] / 1024 ** 2:.1f} MB")
+
+        st.markdown('##### Memória por coluna (bytes)')
+        df_aux = load_memory_report()
+        st.dataframe(df_aux, column_config={'coluna': 'Coluna', 'antes': 'Antes', 'depois': 'Depois', 'reducao_%': 'Redução (%)'}, hide_index=True, use_container_width=True)
+
+    return None
@@ -0,0 +1,41 @@
+#==============================
+# Bibliotecas
+#==============================
+import numpy as np
+#----------------------------------------------------------------------------------
+
+# raio médio da Terra em km (o mesmo usado pelo pacote haversine)
+EARTH_RADIUS_KM = 6371.0088
+
+# colunas com as coordenadas do restaurante e do local da entrega
+COLUNAS_COORDENADAS = ['Restaurant_latitude', 'Restaurant_longitude', 'Delivery_location_latitude', 'Delivery_location_longitude']
+
+#==============================
+# Funções
+#==============================
+
+def haversine_np(lat1, lon1, lat2, lon2):
+    ''' Distância de grande círculo (km) entre pares de pontos, calculada de uma vez para arrays inteiros.
+
+        Equivalente a chamar haversine((lat1, lon1), (lat2, lon2)) linha a linha, mas sem loop em Python.
+
+        Input: arrays (ou Series) de latitude e longitude em graus
+        Output: array float64 com as distâncias em km
+    '''
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(coord, dtype=np.float64)) for coord in (lat1, lon1, lat2, lon2))
+
+    d = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(d))
+
+
+def add_distance(df1):
+    ''' Esta função cria a coluna distance: distância (km) entre o restaurante e o local da entrega.
+
+        Input: DataFrame com as colunas de coordenadas
+        Output: DataFrame com a coluna distance (float32)
+    '''
+    distancia = haversine_np(*(df1[coluna] for coluna in COLUNAS_COORDENADAS))
+    df1['distance'] = distancia.astype(np.float32)
+
+    return df1
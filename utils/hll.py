@@ -0,0 +1,152 @@
+#==============================
+# Bibliotecas
+#==============================
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+from utils.index import date_range_days
+from utils.pipeline import calendar_parts
+#----------------------------------------------------------------------------------
+
+# precisão dos sketches: 2^12 = 4096 registradores de 1 byte por sketch (erro padrão de ~1,6%)
+HLL_PRECISION = 12
+
+#==============================
+# Estruturas
+#==============================
+
+class CourierSketches(NamedTuple):
+    ''' Sketches HyperLogLog dos entregadores (Delivery_person_ID) de cada dia.
+
+        days: datas distintas (datetime64[ns]) em ordem crescente
+        traffic: condições de tráfego de cada coluna de by_day_traffic
+        by_day: registradores (uint8) por dia, shape (dias, 2^precisão)
+        by_day_traffic: registradores por dia e condição de tráfego, shape (dias, condições, 2^precisão)
+
+        Sketches são combinados pelo máximo dos registradores: qualquer conjunto de dias e
+        condições de tráfego vira um único sketch sem voltar às linhas.
+    '''
+    days: np.ndarray
+    traffic: pd.Index
+    by_day: np.ndarray
+    by_day_traffic: np.ndarray
+
+#==============================
+# Funções
+#==============================
+
+def error_bound(precision=HLL_PRECISION):
+    ''' Erro padrão relativo da estimativa do HyperLogLog: 1,04 / raiz(quantidade de registradores). '''
+    return 1.04 / np.sqrt(2 ** precision)
+
+
+def _bit_length(valores):
+    ''' Quantidade de bits significativos de cada valor (uint64), calculada por busca binária. '''
+    valores = valores.copy()
+    bits = np.zeros(len(valores), dtype=np.int64)
+    for deslocamento in (32, 16, 8, 4, 2, 1):
+        alto = valores >= (np.uint64(1) << np.uint64(deslocamento))
+        bits[alto] += deslocamento
+        valores[alto] >>= np.uint64(deslocamento)
+
+    return bits + (valores > 0)
+
+
+def _registers(ids, precision):
+    ''' Registrador e posto (rank) de cada id: os primeiros bits do hash escolhem o registrador e
+        a quantidade de zeros à esquerda dos bits restantes (+1) é o valor guardado nele.
+    '''
+    # o hash é calculado só nos ids distintos
+    codigos, distintos = pd.factorize(ids)
+    hashes = pd.util.hash_array(np.asarray(distintos, dtype=object))[codigos]
+
+    resto = np.uint64(64 - precision)
+    registrador = (hashes >> resto).astype(np.int64)
+    posto = (64 - precision) - _bit_length(hashes & ((np.uint64(1) << resto) - np.uint64(1))) + 1
+
+    return registrador, posto.astype(np.uint8)
+
+
+def build_sketches(df1, precision=HLL_PRECISION):
+    ''' Esta função monta os sketches dos entregadores por dia e por (dia, condição de tráfego).
+
+        Ações realizadas:
+        1 - Numera os dias e as condições de tráfego de cada linha
+        2 - Calcula o registrador e o posto do hash de cada Delivery_person_ID
+        3 - Guarda o maior posto de cada registrador em cada (dia, condição)
+        4 - Combina as condições de tráfego para ter também o sketch de cada dia
+
+        Input: DataFrame limpo e precisão dos sketches
+        Output: CourierSketches
+    '''
+    dia, days = pd.factorize(df1['Order_Date'], sort=True)
+    trafego, traffic = pd.factorize(df1['Road_traffic_density'], sort=True)
+    registrador, posto = _registers(df1['Delivery_person_ID'], precision)
+
+    n_registradores = 2 ** precision
+    by_day_traffic = np.zeros((len(days), len(traffic), n_registradores), dtype=np.uint8)
+    np.maximum.at(by_day_traffic, (dia, trafego, registrador), posto)
+
+    return CourierSketches(np.asarray(days, dtype='datetime64[ns]'), pd.Index(np.asarray(traffic, dtype=object)),
+                           by_day_traffic.max(axis=1), by_day_traffic)
+
+
+def merge_sketches(a, b):
+    ''' Combina os sketches de duas partes do dataset (ex.: pedidos novos): dias e condições são unidos. '''
+    days = np.union1d(a.days, b.days)
+    traffic = a.traffic.append(b.traffic.difference(a.traffic, sort=False))
+
+    by_day_traffic = np.zeros((len(days), len(traffic), a.by_day.shape[1]), dtype=np.uint8)
+    for parte in (a, b):
+        posicao = np.ix_(np.searchsorted(days, parte.days), traffic.get_indexer(parte.traffic))
+        by_day_traffic[posicao] = np.maximum(by_day_traffic[posicao], parte.by_day_traffic)
+
+    return CourierSketches(days, traffic, by_day_traffic.max(axis=1), by_day_traffic)
+
+
+def estimate(registers):
+    ''' Estimativa do HyperLogLog para um sketch (com a correção por contagem linear para poucos valores). '''
+    n_registradores = len(registers)
+    alpha = 0.7213 / (1 + 1.079 / n_registradores)
+    bruta = alpha * n_registradores ** 2 / np.sum(np.ldexp(1.0, -registers.astype(np.int64)))
+
+    vazios = int(np.count_nonzero(registers == 0))
+    if bruta <= 2.5 * n_registradores and vazios:
+        return n_registradores * np.log(n_registradores / vazios)
+
+    return bruta
+
+
+def _selected_days(sketches, date_range, traffic_options):
+    ''' Sketches dos dias do período, já combinados nas condições de tráfego selecionadas. '''
+    inicio, fim = date_range_days(sketches.days, date_range)
+    if set(traffic_options) >= set(sketches.traffic):
+        return sketches.days[inicio:fim], sketches.by_day[inicio:fim]
+
+    colunas = sketches.traffic.get_indexer(list(traffic_options))
+    colunas = colunas[colunas >= 0]
+    registradores = sketches.by_day_traffic[inicio:fim][:, colunas]
+    if registradores.shape[1] == 0:
+        return sketches.days[inicio:fim], np.zeros((fim - inicio, registradores.shape[2]), dtype=np.uint8)
+
+    return sketches.days[inicio:fim], registradores.max(axis=1)
+
+
+def estimate_distinct(sketches, date_range, traffic_options):
+    ''' Estimativa da quantidade de entregadores distintos no período (início, fim) nas condições de tráfego selecionadas. '''
+    _, registradores = _selected_days(sketches, date_range, traffic_options)
+    if len(registradores) == 0:
+        return 0
+
+    return int(round(estimate(registradores.max(axis=0))))
+
+
+def weekly_distinct(sketches, date_range, traffic_options):
+    ''' Estimativa de entregadores distintos por semana do ano (mesma week_of_year da Visão Empresa), com os filtros da barra lateral. '''
+    dias, registradores = _selected_days(sketches, date_range, traffic_options)
+    semana, semanas = pd.factorize(calendar_parts(dias)['week_of_year'], sort=True)
+
+    por_semana = np.zeros((len(semanas), registradores.shape[1]), dtype=np.uint8)
+    np.maximum.at(por_semana, semana, registradores)
+
+    return pd.Series([int(round(estimate(linha))) for linha in por_semana], index=semanas, name='entregadores')
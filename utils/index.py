@@ -0,0 +1,128 @@
+#==============================
+# Bibliotecas
+#==============================
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+from utils.bitmap import BitmapIndex, active_filters, build_bitmap_index, extend_bitmap_index, select_rows
+#----------------------------------------------------------------------------------
+
+#==============================
+# Estruturas
+#==============================
+
+class RowIndex(NamedTuple):
+    ''' Índices de linhas do DataFrame limpo, que fica ordenado por Order_Date.
+
+        days: datas distintas em ordem crescente (datetime64[ns])
+        day_offsets: posição da primeira linha de cada data; tem len(days) + 1 posições e a última
+                     é o total de linhas, então as linhas de days[i] são day_offsets[i]:day_offsets[i + 1]
+        bitmaps: índice bitmap das colunas dos filtros (condições de tráfego, cidade, clima, ...) (utils.bitmap.BitmapIndex)
+    '''
+    days: np.ndarray
+    day_offsets: np.ndarray
+    bitmaps: BitmapIndex
+
+#==============================
+# Funções
+#==============================
+
+def sort_by_date(df1):
+    ''' Ordena o DataFrame por Order_Date (ordenação estável) e refaz o índice sequencial. '''
+    return df1.sort_values('Order_Date', kind='stable', ignore_index=True)
+
+
+def build_row_index(df1):
+    ''' Esta função monta o índice de datas e o índice bitmap das colunas dos filtros.
+
+        Input: DataFrame limpo e ordenado por Order_Date
+        Output: RowIndex
+    '''
+    datas = df1['Order_Date'].to_numpy()
+    days, inicios = np.unique(datas, return_index=True)
+    day_offsets = np.append(inicios, len(datas))
+
+    return RowIndex(days, day_offsets, build_bitmap_index(df1))
+
+
+def extend_row_index(index, batch, n_rows):
+    ''' Acrescenta ao índice as linhas de um lote colocado no fim do DataFrame.
+
+        Só vale quando o lote está ordenado por Order_Date e começa na última data do índice
+        ou depois dela; nesse caso o custo depende apenas do tamanho do lote.
+
+        Input: RowIndex, lote (DataFrame) e quantidade de linhas antes do lote
+        Output: RowIndex atualizado
+    '''
+    datas = batch['Order_Date'].to_numpy()
+    days, inicios = np.unique(datas, return_index=True)
+    inicios = inicios + n_rows
+
+    # a primeira data do lote pode continuar a última data já indexada
+    if len(index.days) and len(days) and days[0] == index.days[-1]:
+        days, inicios = days[1:], inicios[1:]
+
+    days = np.concatenate([index.days, days])
+    day_offsets = np.concatenate([index.day_offsets[:-1], inicios, [n_rows + len(batch)]])
+
+    return RowIndex(days, day_offsets, extend_bitmap_index(index.bitmaps, batch))
+
+
+def date_bounds(index):
+    ''' Limites do slider de datas (datetime): a primeira data do índice e o dia seguinte à última.
+
+        O fim do período é exclusivo em todos os filtros, então o limite superior é o dia depois da
+        última data: com o slider no máximo, os pedidos do dia mais recente (ex.: acabaram de chegar) aparecem.
+    '''
+    return pd.Timestamp(index.days[0]).to_pydatetime(), (pd.Timestamp(index.days[-1]) + pd.Timedelta(days=1)).to_pydatetime()
+
+
+def date_range_days(days, date_range):
+    ''' Posições (início, fim) em days das datas do período: de date_range[0] (inclusive) até date_range[1] (exclusive).
+
+        Busca binária nas datas distintas; com início depois do fim o período fica vazio.
+    '''
+    inicio, fim = np.searchsorted(days, np.array(date_range, dtype='datetime64[ns]'), side='left')
+
+    return int(min(inicio, fim)), int(fim)
+
+
+def date_range_rows(index, date_range):
+    ''' Primeira e última + 1 posições das linhas do período (as linhas ficam ordenadas por Order_Date). '''
+    inicio, fim = date_range_days(index.days, date_range)
+
+    return int(index.day_offsets[inicio]), int(index.day_offsets[fim])
+
+
+def selects_all(index, date_range, traffic_options, filters=None):
+    ''' True quando os filtros da barra lateral não restringem nenhuma linha: o período cobre todas as datas
+        e todos os valores estão selecionados (os agregados de todo o dataset podem ser usados direto).
+    '''
+    selecoes = active_filters(index.bitmaps, {'Road_traffic_density': traffic_options, **(filters or {})})
+
+    return date_range_rows(index, date_range) == (0, int(index.day_offsets[-1])) and not selecoes
+
+
+def filter_rows(df1, index, date_range, traffic_options, filters=None):
+    ''' Esta função aplica os filtros da barra lateral usando os índices, sem máscaras sobre o DataFrame inteiro.
+
+        Ações realizadas:
+        1 - Encontra por busca binária onde começam e terminam as linhas do período
+        2 - Se nenhum filtro restringe as linhas (todos os valores selecionados), devolve só a fatia [início:fim] (sem cópia)
+        3 - Senão combina os bitmaps dos valores selecionados (OR em cada coluna, AND entre as colunas) dentro da fatia
+
+        Input:
+            - df1: DataFrame limpo e ordenado
+            - index: RowIndex
+            - date_range: período (início, fim)
+            - traffic_options: lista de condições de tráfego
+            - filters: filtros cruzados {coluna: valores selecionados} (ex.: City, Weatherconditions, Type_of_vehicle)
+        Output: DataFrame filtrado
+    '''
+    inicio, fim = date_range_rows(index, date_range)
+
+    selecoes = active_filters(index.bitmaps, {'Road_traffic_density': traffic_options, **(filters or {})})
+    if not selecoes:
+        return df1.iloc[inicio:fim]
+
+    return df1.take(select_rows(index.bitmaps, inicio, fim, selecoes))
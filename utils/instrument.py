@@ -0,0 +1,120 @@
+#==============================
+# Bibliotecas
+#==============================
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+import streamlit as st
+#----------------------------------------------------------------------------------
+
+# chave da sessão onde ficam as medições da execução atual da página
+TIMINGS_KEY = '_diagnostics_timings'
+
+# variável de ambiente com o caminho do log JSON-lines; definida, toda execução de página é registrada
+LOG_ENV = 'DIAGNOSTICS_LOG'
+
+# log usado quando a variável não está definida (só com o painel aberto, ?diagnostics=1)
+LOG_PATH = 'diagnostics.jsonl'
+
+# medições do último carregamento dos dados (compartilhado pelo processo, não por sessão)
+LOAD_TIMINGS = {}
+
+_LOG_LOCK = threading.Lock()
+
+#==============================
+# Funções
+#==============================
+
+def rss_mb():
+    ''' Memória residente atual do processo em MB (Linux, /proc/self/statm); None onde não existe. '''
+    try:
+        with open('/proc/self/statm') as arquivo:
+            paginas = int(arquivo.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+
+    return paginas * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+
+
+def _add(medicoes, nome, segundos, memoria):
+    ''' Soma uma medição em {nome: {ms, mem_mb, calls}}; o mesmo nome repetido na execução é acumulado. '''
+    atual = medicoes.setdefault(nome, {'ms': 0.0, 'mem_mb': None, 'calls': 0})
+    atual['ms'] += segundos * 1000
+    atual['calls'] += 1
+    if memoria is not None:
+        atual['mem_mb'] = (atual['mem_mb'] or 0.0) + memoria
+
+    return None
+
+
+@contextmanager
+def _measure(medicoes, nome):
+    ''' Mede o tempo e a variação da memória residente do bloco e guarda em medicoes. '''
+    inicio, memoria = time.perf_counter(), rss_mb()
+    try:
+        yield
+    finally:
+        fim = rss_mb()
+        _add(medicoes, nome, time.perf_counter() - inicio, None if memoria is None or fim is None else fim - memoria)
+
+
+def timer(nome):
+    ''' Mede o bloco (ms e variação de memória) e guarda na sessão, para o painel e o log da execução.
+
+        Uso:
+            with timer('filtros'):
+                df1 = filter_rows(...)
+    '''
+    return _measure(st.session_state.setdefault(TIMINGS_KEY, {}), nome)
+
+
+def load_timer(nome):
+    ''' Igual ao timer, mas para o carregamento dos dados: fica em LOAD_TIMINGS, visível para todas as sessões. '''
+    return _measure(LOAD_TIMINGS, nome)
+
+
+def pipeline_hook(prefixo):
+    ''' Hook para utils.pipeline.run_pipeline que registra cada etapa em LOAD_TIMINGS (tempo e memória desde a etapa anterior). '''
+    anterior = [rss_mb()]
+
+    def hook(nome, segundos, df1):
+        memoria = rss_mb()
+        _add(LOAD_TIMINGS, f'{prefixo}: {nome}', segundos, None if memoria is None or anterior[0] is None else memoria - anterior[0])
+        anterior[0] = memoria
+
+    return hook
+
+
+def plotly_chart(fig, **kwargs):
+    ''' st.plotly_chart medido: o tempo é o da serialização da figura para o navegador. '''
+    with timer('plotly (serialização)'):
+        return st.plotly_chart(fig, **kwargs)
+
+
+def finish_run(page, log=False):
+    ''' Esta função fecha as medições da execução da página.
+
+        Ações realizadas:
+        1 - Retira da sessão as medições desta execução (a próxima começa vazia)
+        2 - Monta o registro: data/hora, página, memória residente e medições
+        3 - Acrescenta o registro no log JSON-lines quando log=True ou a variável DIAGNOSTICS_LOG existe
+
+        Input: nome da página e se o log deve ser gravado
+        Output: dicionário com o registro da execução
+    '''
+    registro = {'ts': datetime.now().isoformat(timespec='milliseconds'), 'page': page, 'rss_mb': rss_mb(),
+                'timings': st.session_state.pop(TIMINGS_KEY, {})}
+
+    caminho = os.environ.get(LOG_ENV) or (LOG_PATH if log else None)
+    if caminho:
+        # o log nunca pode derrubar a página: sem permissão de escrita, o registro só não é gravado
+        try:
+            with _LOG_LOCK, open(caminho, 'a', encoding='utf-8') as arquivo:
+                arquivo.write(json.dumps(registro, ensure_ascii=False) + '\n')
+        except OSError:
+            pass
+
+    return registro
@@ -0,0 +1,96 @@
+#==============================
+# Bibliotecas
+#==============================
+from typing import NamedTuple, Optional
+import numpy as np
+from utils.queries import distinct_couriers, rollup
+#----------------------------------------------------------------------------------
+
+# colunas das métricas por linha da Visão Entregadores, reduzidas juntas em uma matriz
+COURIER_COLUMNS = ['Delivery_person_Age', 'Vehicle_condition']
+
+#==============================
+# Estruturas
+#==============================
+
+class RestaurantKpis(NamedTuple):
+    ''' Métricas gerais da Visão Restaurantes (linha "Overall Metrics"), já arredondadas como exibidas.
+
+        Os campos ficam None quando os filtros não deixam entregas para a métrica.
+
+        couriers: entregadores únicos (contagem exata; None quando a página usa a estimativa HyperLogLog)
+        avg_distance: distância média das entregas (km)
+        festival_avg_time, festival_std_time: tempo médio e desvio padrão do tempo de entrega com festival (min)
+        regular_avg_time, regular_std_time: tempo médio e desvio padrão do tempo de entrega sem festival (min)
+    '''
+    couriers: Optional[int]
+    avg_distance: Optional[float]
+    festival_avg_time: Optional[float]
+    festival_std_time: Optional[float]
+    regular_avg_time: Optional[float]
+    regular_std_time: Optional[float]
+
+
+class CourierKpis(NamedTuple):
+    ''' Métricas gerais da Visão Entregadores (None quando os filtros não deixam entregas).
+
+        max_age, min_age: maior e menor idade dos entregadores
+        best_condition, worst_condition: melhor e pior condição dos veículos
+    '''
+    max_age: Optional[int]
+    min_age: Optional[int]
+    best_condition: Optional[int]
+    worst_condition: Optional[int]
+
+#==============================
+# Funções
+#==============================
+
+def _rounded(valor):
+    ''' Valor arredondado em 2 casas, ou None para um valor ausente (grupo sem entregas ou desvio de uma entrega só). '''
+    return None if valor is None or np.isnan(valor) else round(float(valor), 2)
+
+
+def restaurant_kpis(cube, df1, exact_couriers=True):
+    ''' Esta função calcula de uma vez todas as métricas gerais da Visão Restaurantes.
+
+        Ações realizadas:
+        1 - Agrupa o cubo (ou o SqlView) uma única vez por Festival: tempo médio e desvio padrão com e sem festival
+        2 - Calcula a distância média em uma passada sobre a coluna distance das linhas filtradas
+        3 - Conta os entregadores únicos pelos pares (célula, entregador) do cubo (ou no banco), se a contagem for exata
+
+        Input:
+            - cube: Cubo diário (DailyCube) já filtrado, ou SqlView
+            - df1: DataFrame filtrado (coluna distance)
+            - exact_couriers: False deixa couriers como None (a página usa a estimativa HyperLogLog)
+        Output: RestaurantKpis
+    '''
+    por_festival = rollup(cube, ['Festival'])
+    tempos = {festival: (avg, std) for festival, avg, std in zip(por_festival['Festival'].astype(str), por_festival['avg_time'], por_festival['std_time'])}
+    com_festival, sem_festival = tempos.get('Yes', (None, None)), tempos.get('No', (None, None))
+
+    # a coluna é float32: a soma é acumulada em float64, sem converter a coluna
+    distancia = df1['distance'].to_numpy()
+
+    return RestaurantKpis(couriers=distinct_couriers(cube) if exact_couriers else None,
+                          avg_distance=_rounded(distancia.mean(dtype=np.float64)) if len(distancia) else None,
+                          festival_avg_time=_rounded(com_festival[0]), festival_std_time=_rounded(com_festival[1]),
+                          regular_avg_time=_rounded(sem_festival[0]), regular_std_time=_rounded(sem_festival[1]))
+
+
+def courier_kpis(df1):
+    ''' Esta função calcula de uma vez as métricas gerais da Visão Entregadores.
+
+        As colunas de idade e de condição do veículo (int8) viram uma matriz de duas colunas, reduzida
+        com um max e um min ao longo das linhas: as quatro métricas saem de duas operações vetorizadas.
+
+        Input: DataFrame filtrado (Delivery_person_Age e Vehicle_condition)
+        Output: CourierKpis
+    '''
+    if df1.empty:
+        return CourierKpis(None, None, None, None)
+
+    valores = df1.loc[:, COURIER_COLUMNS].to_numpy()
+    maiores, menores = valores.max(axis=0), valores.min(axis=0)
+
+    return CourierKpis(max_age=int(maiores[0]), min_age=int(menores[0]), best_condition=int(maiores[1]), worst_condition=int(menores[1]))
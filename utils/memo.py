@@ -0,0 +1,120 @@
+#==============================
+# Bibliotecas
+#==============================
+import pickle
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+import pandas as pd
+import streamlit as st
+from utils.instrument import timer
+#----------------------------------------------------------------------------------
+
+# orçamento de memória do cache de gráficos, compartilhado por todas as sessões
+CHART_CACHE_MAX_BYTES = 64 * 1024 ** 2
+
+#==============================
+# Estruturas
+#==============================
+
+class FilterState(NamedTuple):
+    ''' Estado dos filtros que determina o resultado de um gráfico.
+
+        version: versão dos dados (DatasetState.version)
+        date_range: período do slider (início, fim)
+        traffic: condições de tráfego selecionadas, ordenadas
+        filters: filtros cruzados que restringem as linhas, como pares (coluna, valores) ordenados
+    '''
+    version: tuple
+    date_range: tuple
+    traffic: tuple
+    filters: tuple = ()
+
+
+class ChartCache:
+    ''' Cache LRU de resultados de gráficos (figuras e DataFrames) com limite de memória.
+
+        As entradas menos usadas recentemente são descartadas quando o total passa de max_bytes.
+        É seguro para várias sessões ao mesmo tempo (as sessões do Streamlit rodam em threads).
+    '''
+
+    def __init__(self, max_bytes=CHART_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        ''' Devolve o valor em cache para key ou calcula com compute() e guarda o resultado. '''
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+
+        # o cálculo fica fora do lock para não bloquear as outras sessões
+        value = compute()
+        size = _size_of(value)
+
+        with self._lock:
+            if size <= self.max_bytes and key not in self._entries:
+                self._entries[key] = (value, size)
+                self.bytes += size
+                while self.bytes > self.max_bytes:
+                    _, (_, removido) = self._entries.popitem(last=False)
+                    self.bytes -= removido
+
+        return value
+
+    def stats(self):
+        ''' Contadores do cache para o painel de diagnóstico. '''
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entradas': len(self._entries), 'bytes': self.bytes}
+
+#==============================
+# Funções
+#==============================
+
+def _size_of(value):
+    ''' Estimativa da memória ocupada por um resultado: DataFrames pelo memory_usage, o resto serializado. '''
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+
+    return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+@st.cache_resource(show_spinner=False)
+def get_chart_cache():
+    ''' Instância única do ChartCache no processo, compartilhada por todas as sessões. '''
+    return ChartCache()
+
+
+def filter_state(version, date_range, traffic_options, filters=None):
+    ''' Monta o FilterState da execução atual a partir da versão dos dados e dos filtros da barra lateral. '''
+    filtros = tuple(sorted((coluna, tuple(sorted(valores))) for coluna, valores in (filters or {}).items()))
+
+    return FilterState(version, tuple(date_range), tuple(sorted(traffic_options)), filtros)
+
+
+def cached_chart(func, state, data, *args):
+    ''' Esta função executa func(data, *args) com memoização pelo estado dos filtros.
+
+        A chave é (versão do dataset, período, condições de tráfego, função, args): como os dados
+        filtrados dependem só dos filtros, mudar outro widget ou de aba reaproveita o resultado.
+
+        Input:
+            - func: função do gráfico (ex.: order_metrics)
+            - state: FilterState da execução
+            - data: dados já filtrados que a função recebe
+            - args: demais parâmetros da função (precisam ser hashable)
+        Output: resultado de func
+    '''
+    # as páginas rodam como __main__, então o arquivo de origem diferencia funções de mesmo nome
+    nome = (func.__code__.co_filename, func.__qualname__)
+
+    # medido com o nome da função: na falta no cache é o tempo do cálculo, no acerto só o da busca
+    with timer(func.__name__):
+        return get_chart_cache().get_or_compute((state, nome, args), lambda: func(data, *args))
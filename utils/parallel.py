@@ -0,0 +1,177 @@
+#==============================
+# Bibliotecas
+#==============================
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from utils.cube import aggregate_cells, merge_cells
+from utils.data import apply_schema
+from utils.pipeline import clean_code, run_pipeline
+from utils.streaming import COLUNAS_STREAMING, StreamAggregates, aggregate_couriers, merge_couriers
+from utils.topk import TOP_K, TOPK_KEYS, TOPK_MEASURE, top_k
+#----------------------------------------------------------------------------------
+
+# formas de particionar o dataset entre os processos
+PARTITION_KEYS = ('City', 'date')
+
+# métodos de início dos processos do pool. 'fork' herda as partições sem cópia, mas só é seguro fora
+# do app: um fork feito de dentro do servidor do Streamlit (multithread) pode travar em locks que
+# outras threads seguravam. No app os processos partem de um servidor limpo ('forkserver') ou de um
+# interpretador novo ('spawn') e recebem as partições por pickle.
+START_METHODS = ('fork', 'forkserver', 'spawn')
+
+# partições herdadas pelos processos filhos quando o pool usa fork (preenchido só durante map_partitions)
+_PARTICOES = []
+
+#==============================
+# Funções
+#==============================
+
+def partition_frame(raw, n_parts, by='City'):
+    ''' Esta função divide as linhas do CSV (ainda sem limpeza) em até n_parts partições.
+
+        by='City': cada cidade fica inteira em uma partição; as maiores cidades são distribuídas
+                   primeiro, sempre para a partição com menos linhas (o paralelismo fica limitado
+                   à quantidade de cidades)
+        by='date': faixas contíguas de Order_Date com a mesma quantidade de linhas
+
+        Input: DataFrame lido do CSV, quantidade de partições e chave ('City' ou 'date')
+        Output: lista com as posições (np.ndarray) das linhas de cada partição
+    '''
+    if by not in PARTITION_KEYS:
+        raise ValueError(f'by deve ser um de {PARTITION_KEYS}: {by!r}')
+
+    if by == 'date':
+        # datas convertidas só nos valores distintos; a ordenação estável mantém a ordem do arquivo em cada dia
+        codigos, datas = pd.factorize(raw['Order_Date'])
+        dias = pd.to_datetime(datas, format='%d-%m-%Y').to_numpy()
+        ordem = np.argsort(dias[codigos], kind='stable')
+
+        return [parte for parte in np.array_split(ordem, n_parts) if len(parte)]
+
+    codigos, _ = pd.factorize(raw['City'], use_na_sentinel=False)
+    tamanhos = np.bincount(codigos)
+
+    grupos = [[] for _ in range(n_parts)]
+    cargas = np.zeros(n_parts, dtype=np.int64)
+    for cidade in np.argsort(tamanhos, kind='stable')[::-1]:
+        destino = int(np.argmin(cargas))
+        grupos[destino].append(cidade)
+        cargas[destino] += tamanhos[cidade]
+
+    return [np.flatnonzero(np.isin(codigos, grupo)) for grupo in grupos if grupo]
+
+
+def safe_start_method():
+    ''' Método de início seguro dentro do app: 'forkserver' onde existe (Linux, macOS), senão 'spawn'. '''
+    return 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+def _run_inherited(func, i):
+    ''' Executado no processo filho: aplica func à partição herdada do processo pai. '''
+    return func(_PARTICOES[i])
+
+
+def map_partitions(func, raw, partes, workers, start_method=None):
+    ''' Esta função aplica func a cada partição, em um pool de `workers` processos.
+
+        Com workers=1 tudo roda no próprio processo, sem pool. Com start_method='fork' as partições
+        são herdadas pelos processos filhos e só o resultado de func volta pelo pool: é o modo mais
+        rápido, só para uso offline (benchmarks, scripts), nunca de dentro do servidor do Streamlit.
+        Nos demais métodos (o padrão é safe_start_method) cada partição é enviada ao processo (pickle).
+
+        Input: função de uma partição (definida no nível do módulo), DataFrame, posições das partições,
+               processos e método de início (um de START_METHODS; None = safe_start_method())
+        Output: lista com o resultado de cada partição, na ordem das partições
+    '''
+    global _PARTICOES
+    start_method = start_method or safe_start_method()
+    if start_method not in START_METHODS or start_method not in multiprocessing.get_all_start_methods():
+        raise ValueError(f'start_method indisponível neste sistema: {start_method!r}')
+
+    frames = [raw.iloc[parte] for parte in partes]
+
+    if workers <= 1:
+        return [func(frame) for frame in frames]
+
+    if start_method != 'fork':
+        contexto = multiprocessing.get_context(start_method)
+        if start_method == 'forkserver':
+            # o servidor já importa este módulo (pandas, utils): os processos não repetem os imports
+            contexto.set_forkserver_preload([__name__])
+        with ProcessPoolExecutor(workers, mp_context=contexto) as pool:
+            return list(pool.map(func, frames))
+
+    _PARTICOES = frames
+    try:
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('fork')) as pool:
+            return list(pool.map(_run_inherited, [func] * len(frames), range(len(frames))))
+    finally:
+        _PARTICOES = []
+
+
+def aggregate_partition(raw):
+    ''' Limpa uma partição e calcula suas agregações parciais (células do cubo e estatísticas por entregador). '''
+    df1 = clean_code(raw)
+
+    return StreamAggregates(aggregate_cells(df1), aggregate_couriers(df1), len(df1))
+
+
+def clean_partition(raw):
+    ''' Limpa uma partição com as mesmas etapas do carregamento (run_pipeline e SCHEMA). '''
+    return apply_schema(run_pipeline(raw))
+
+
+def parallel_aggregate(path, workers, by='City', start_method=None):
+    ''' Esta função lê o CSV e calcula as agregações do dataset em paralelo.
+
+        Ações realizadas:
+        1 - Lê o CSV (só as colunas usadas nas agregações)
+        2 - Divide as linhas em partições por cidade ou por faixa de datas
+        3 - Cada processo limpa a sua partição e calcula as agregações parciais:
+            contagem / soma / soma dos quadrados do tempo por célula do cubo e, por entregador,
+            contagem, soma e quantidade de avaliações, tempo mínimo e máximo
+        4 - O processo principal soma as parciais (merge_cells / merge_couriers)
+
+        Input: caminho do CSV, quantidade de processos, chave das partições ('City' ou 'date') e método de início (map_partitions)
+        Output: StreamAggregates (o mesmo resultado de utils.streaming.ingest_csv)
+    '''
+    raw = pd.read_csv(path, usecols=COLUNAS_STREAMING)
+    parciais = map_partitions(aggregate_partition, raw, partition_frame(raw, workers, by), workers, start_method)
+
+    return StreamAggregates(merge_cells(*[parcial.cells for parcial in parciais]),
+                            merge_couriers(*[parcial.couriers for parcial in parciais]),
+                            sum(parcial.rows for parcial in parciais))
+
+
+def parallel_clean(raw, workers, by='date', start_method=None):
+    ''' Esta função limpa o DataFrame lido do CSV em paralelo.
+
+        Cada processo limpa uma partição; as partes voltam já com os tipos compactos do SCHEMA
+        (menos dados para transferir) e são concatenadas. Com by='date' as linhas de cada dia
+        ficam na mesma ordem do arquivo, como na limpeza em um único processo.
+
+        Input: DataFrame lido do CSV, quantidade de processos, chave das partições e método de início (map_partitions)
+        Output: DataFrame limpo com o SCHEMA (ainda não ordenado por data)
+    '''
+    partes = map_partitions(clean_partition, raw, partition_frame(raw, workers, by), workers, start_method)
+
+    # as partes podem ter categorias diferentes: o SCHEMA é aplicado de novo depois de juntar
+    return apply_schema(pd.concat(partes, ignore_index=True))
+
+
+def courier_ratings(couriers):
+    ''' Avaliação média de cada entregador a partir das estatísticas por entregador. '''
+    df_aux = couriers.groupby('Delivery_person_ID', observed=True)[['rating_sum', 'rating_count']].sum()
+
+    return (df_aux['rating_sum'] / df_aux['rating_count']).rename('Delivery_person_Ratings').reset_index()
+
+
+def top_couriers(couriers, k=TOP_K):
+    ''' Os k entregadores mais rápidos e mais lentos de cada cidade (utils.topk), pelo maior tempo de entrega.
+
+        Mesmo critério do top_delivers da Visão Entregadores, calculado a partir do time_max
+        das estatísticas por entregador (que pode ser combinado entre partições).
+    '''
+    return top_k(couriers.loc[:, TOPK_KEYS + ['time_max']].rename(columns={'time_max': TOPK_MEASURE}), k)
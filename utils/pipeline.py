@@ -0,0 +1,170 @@
+#==============================
+# Bibliotecas
+#==============================
+import time
+import numpy as np
+import pandas as pd
+from utils.geo import add_distance
+#----------------------------------------------------------------------------------
+
+# colunas em que o texto 'NaN ' indica linha inválida
+COLUNAS_NAN = ['Delivery_person_Age', 'multiple_deliveries', 'Road_traffic_density', 'City', 'Festival']
+
+# colunas de texto (com poucos valores distintos) que chegam com espaços sobrando
+COLUNAS_TEXTO = ['Road_traffic_density', 'Type_of_order', 'Type_of_vehicle', 'City', 'Festival']
+
+# conversões numéricas feitas na limpeza
+TIPOS_NUMERICOS = {'Delivery_person_Age': int, 'multiple_deliveries': int, 'Delivery_person_Ratings': float}
+
+# colunas que precisam existir no CSV para a limpeza
+COLUNAS_OBRIGATORIAS = sorted({'ID', 'Order_Date', 'Time_taken(min)', *COLUNAS_NAN, *COLUNAS_TEXTO, *TIPOS_NUMERICOS})
+
+#==============================
+# Funções
+#==============================
+
+def _apply_on_uniques(serie, func):
+    ''' Aplica `func` somente nos valores distintos da coluna e espalha o resultado para todas as linhas.
+
+        Colunas como City ou Time_taken(min) têm poucas dezenas de valores diferentes,
+        então o trabalho com strings é feito algumas vezes em vez de uma vez por linha.
+
+        Input: Series e função vetorizada que recebe e devolve uma Series
+        Output: Series com o mesmo índice da original
+    '''
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=False)
+    valores = func(pd.Series(unicos)).to_numpy()
+
+    return pd.Series(valores[codigos], index=serie.index, name=serie.name)
+
+
+def validate(df1):
+    ''' Etapa validate: confere as colunas obrigatórias e remove as linhas com 'NaN ' em COLUNAS_NAN.
+
+        Uma única máscara para todas as colunas. O resultado é uma cópia explícita: as etapas seguintes
+        criam e substituem colunas nele sem SettingWithCopyWarning, com ou sem o copy-on-write ativo.
+    '''
+    faltando = [coluna for coluna in COLUNAS_OBRIGATORIAS if coluna not in df1.columns]
+    if faltando:
+        raise ValueError(f'colunas obrigatórias ausentes no CSV: {faltando}')
+
+    linhas_selecionadas = np.logical_and.reduce([df1[coluna].to_numpy() != 'NaN ' for coluna in COLUNAS_NAN])
+
+    return df1.loc[linhas_selecionadas, :].copy()
+
+
+def parse(df1):
+    ''' Etapa parse: converte os textos de data e de tempo ('(min) 24' -> 24), só nos valores distintos.
+
+        Colunas já convertidas na leitura (utils.data.read_orders) ficam como estão.
+    '''
+    if not pd.api.types.is_datetime64_any_dtype(df1['Order_Date']):
+        df1['Order_Date'] = _apply_on_uniques(df1['Order_Date'], lambda s: pd.to_datetime(s, format='%d-%m-%Y'))
+    if not pd.api.types.is_integer_dtype(df1['Time_taken(min)']):
+        df1['Time_taken(min)'] = _apply_on_uniques(df1['Time_taken(min)'], lambda s: s.str.removeprefix('(min) ').astype(int))
+
+    return df1
+
+
+def cast(df1):
+    ''' Etapa cast: converte as colunas numéricas que chegam como texto (todas as conversões de uma vez).
+
+        Colunas categóricas (leitura com o pyarrow) são convertidas só nas categorias que sobraram
+        depois do validate: a categoria 'NaN ' das linhas removidas não chega à conversão.
+    '''
+    for coluna in TIPOS_NUMERICOS:
+        if isinstance(df1[coluna].dtype, pd.CategoricalDtype):
+            df1[coluna] = df1[coluna].cat.remove_unused_categories()
+
+    return df1.astype(TIPOS_NUMERICOS)
+
+
+def strip(df1):
+    ''' Etapa strip: remove os espaços sobrando do ID e das colunas de texto (estas só nos valores distintos). '''
+    df1['ID'] = df1['ID'].str.strip()
+    for coluna in COLUNAS_TEXTO:
+        df1[coluna] = _apply_on_uniques(df1[coluna], lambda s: s.str.strip())
+
+    return df1
+
+
+def calendar_parts(datas):
+    ''' Esta função calcula as partes de calendário de cada data com aritmética de datas (sem formatar texto).
+
+        week_of_year: semana do ano no critério '%U' (semanas começam no domingo; os dias antes
+                      do primeiro domingo do ano são a semana 0)
+        day_of_week: dia da semana (segunda-feira = 0)
+        month: mês (1 a 12)
+
+        Input: datas (Series ou array datetime64)
+        Output: dicionário {coluna: array int8}
+    '''
+    dias = np.asarray(datas, dtype='datetime64[D]')
+    numero = dias.astype(np.int64)
+    dia_do_ano = (dias - dias.astype('datetime64[Y]')).astype(np.int64)
+
+    # 01/01/1970 (dia 0) foi uma quinta-feira: domingo = 0 para o '%U', segunda = 0 para o day_of_week
+    domingo = (numero + 4) % 7
+
+    return {'week_of_year': ((dia_do_ano + 7 - domingo) // 7).astype(np.int8),
+            'day_of_week': ((numero + 3) % 7).astype(np.int8),
+            'month': (dias.astype('datetime64[M]').astype(np.int64) % 12 + 1).astype(np.int8)}
+
+
+def derive(df1):
+    ''' Etapa derive: cria as colunas calculadas uma única vez no carregamento.
+
+        distance: distância (km) entre o restaurante e o local da entrega (utils.geo)
+        week_of_year, day_of_week, month: partes de calendário de Order_Date em inteiros (calendar_parts)
+    '''
+    df1 = add_distance(df1)
+
+    return df1.assign(**calendar_parts(df1['Order_Date']))
+
+
+# etapas da limpeza, na ordem em que são executadas
+CLEAN_STAGES = [('validate', validate), ('parse', parse), ('cast', cast), ('strip', strip)]
+
+# limpeza completa do carregamento: limpeza + colunas derivadas
+PIPELINE_STAGES = CLEAN_STAGES + [('derive', derive)]
+
+
+def run_pipeline(df1, stages=PIPELINE_STAGES, hook=None):
+    ''' Esta função executa as etapas da limpeza em sequência.
+
+        Etapas (PIPELINE_STAGES):
+        1 - validate: colunas obrigatórias e remoção das linhas com 'NaN '
+        2 - parse: datas e tempo de entrega a partir do texto
+        3 - cast: colunas numéricas
+        4 - strip: espaços sobrando nos textos
+        5 - derive: distance e partes de calendário (week_of_year, day_of_week, month)
+
+        Todas as etapas são vetorizadas e o tratamento de texto das colunas repetitivas é feito
+        apenas sobre os valores distintos.
+
+        Input:
+            - df1: DataFrame lido do CSV
+            - stages: lista de (nome, função) a executar
+            - hook: função opcional chamada ao fim de cada etapa com (nome, segundos, DataFrame)
+        Output: DataFrame limpo
+    '''
+    for nome, etapa in stages:
+        start = time.perf_counter()
+        df1 = etapa(df1)
+        if hook is not None:
+            hook(nome, time.perf_counter() - start, df1)
+
+    return df1
+
+
+# limpeza dos dados
+def clean_code(df1):
+  """ Esta função tem a responsabilidade de limpar o dataframe (etapas CLEAN_STAGES, sem as colunas derivadas)
+
+      Usada na leitura em lotes e nas partições em paralelo, que só precisam das colunas originais.
+
+      Input: DataFrame
+      Output: DataFrame
+
+  """
+  return run_pipeline(df1, CLEAN_STAGES)
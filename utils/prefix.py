@@ -0,0 +1,119 @@
+#==============================
+# Bibliotecas
+#==============================
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+from utils.cube import MEASURES
+from utils.index import date_range_days
+from utils.stats import Moments, frame_moments, merge_moments, moment_columns, reduce_moments, subtract_moments
+#----------------------------------------------------------------------------------
+
+#==============================
+# Estruturas
+#==============================
+
+class DailyPrefix(NamedTuple):
+    ''' Somas acumuladas por dia das medidas do cubo, por condição de tráfego e cidade.
+
+        A posição i dos acumulados guarda o total dos dias days[:i] (a posição 0 é zero), então o
+        total de um período days[i:j] é acumulado[j] - acumulado[i], qualquer que seja o seu tamanho.
+
+        days: datas distintas em ordem crescente (datetime64[ns])
+        traffic: condições de tráfego (Categorical, mesmas categorias do cubo)
+        cities: cidades (Categorical, mesmas categorias do cubo)
+        totals: int64 com forma (len(days) + 1, tráfego, cidade, MEASURES): count, time_sum e time_sumsq acumulados
+        ratings: Moments das avaliações acumulados, cada um com forma (len(days) + 1, tráfego, cidade)
+    '''
+    days: np.ndarray
+    traffic: pd.Categorical
+    cities: pd.Categorical
+    totals: np.ndarray
+    ratings: Moments
+
+
+class RangeTotals(NamedTuple):
+    ''' Totais de um período, com os filtros da barra lateral, em células no formato das do cubo.
+
+        cells: uma linha por (Road_traffic_density, City) com pedidos no período, com MEASURES e
+               os acumuladores das avaliações. As funções de agregação do cubo (utils.cube.counts,
+               rollup e rating_rollup) aceitam RangeTotals no lugar do DailyCube, agrupando só por
+               essas duas colunas.
+    '''
+    cells: pd.DataFrame
+
+#==============================
+# Funções
+#==============================
+
+def build_prefix(cube):
+    ''' Esta função monta as somas acumuladas por dia a partir das células do cubo.
+
+        Ações realizadas:
+        1 - Numera os dias, as condições de tráfego e as cidades das células
+        2 - Soma as medidas e combina as avaliações das células de cada (dia, tráfego, cidade)
+        3 - Acumula dia a dia: soma para as medidas, merge_moments para as avaliações
+
+        O custo depende do número de células do cubo, não do número de pedidos; por isso as somas
+        são refeitas a partir do cubo quando chegam pedidos novos.
+
+        Input: DailyCube
+        Output: DailyPrefix
+    '''
+    cells = cube.cells
+    dia, days = pd.factorize(cells['Order_Date'], sort=True)
+    trafego, traffic = pd.factorize(cells['Road_traffic_density'], sort=True)
+    cidade, cities = pd.factorize(cells['City'], sort=True)
+
+    forma = (len(days), len(traffic), len(cities))
+    grupo = np.ravel_multi_index((dia, trafego, cidade), forma)
+    n_grupos = int(np.prod(forma))
+
+    por_dia = np.stack([np.bincount(grupo, weights=cells[medida].to_numpy(dtype=np.float64), minlength=n_grupos)
+                        for medida in MEASURES], axis=-1).astype(np.int64).reshape(forma + (len(MEASURES),))
+    totals = np.zeros((len(days) + 1,) + por_dia.shape[1:], dtype=np.int64)
+    np.cumsum(por_dia, axis=0, out=totals[1:])
+
+    avaliacoes = reduce_moments(frame_moments(cells, 'rating'), grupo, n_grupos)
+    avaliacoes = Moments(*(valores.reshape(forma) for valores in avaliacoes))
+    acumulado = Moments(*(np.zeros((len(days) + 1,) + forma[1:], dtype=tipo) for tipo in (np.int64, np.float64, np.float64)))
+    for i in range(len(days)):
+        combinados = merge_moments(Moments(*(valores[i].ravel() for valores in acumulado)),
+                                   Moments(*(valores[i].ravel() for valores in avaliacoes)))
+        for valores, novos in zip(acumulado, combinados):
+            valores[i + 1] = novos.reshape(forma[1:])
+
+    return DailyPrefix(np.asarray(days, dtype='datetime64[ns]'), traffic, cities, totals, acumulado)
+
+
+def range_totals(prefix, date_range, traffic_options):
+    ''' Esta função calcula os totais de um período pela diferença de duas posições das somas acumuladas.
+
+        Ações realizadas:
+        1 - Encontra por busca binária as posições do início e do fim do período nos dias
+        2 - Subtrai os acumulados das duas posições (subtract_moments para as avaliações)
+        3 - Mantém as condições de tráfego selecionadas e os grupos com pedidos
+
+        O custo é proporcional ao número de grupos (tráfego x cidade), não ao número de pedidos
+        nem ao tamanho do período.
+
+        Input: DailyPrefix, período (início, fim) e lista de condições de tráfego
+        Output: RangeTotals
+    '''
+    inicio, fim = date_range_days(prefix.days, date_range)
+    forma = prefix.totals.shape[1:3]
+
+    medidas = (prefix.totals[fim] - prefix.totals[inicio]).reshape(-1, len(MEASURES))
+    avaliacoes = subtract_moments(Moments(*(valores[fim].ravel() for valores in prefix.ratings)),
+                                  Moments(*(valores[inicio].ravel() for valores in prefix.ratings)))
+
+    # grupos com pedidos nas condições de tráfego selecionadas
+    trafego, cidade = np.unravel_index(np.arange(medidas.shape[0]), forma)
+    selecionadas = (medidas[:, 0] > 0) & np.isin(trafego, np.flatnonzero(prefix.traffic.isin(list(traffic_options))))
+    trafego, cidade = trafego[selecionadas], cidade[selecionadas]
+
+    colunas = {'Road_traffic_density': prefix.traffic.take(trafego), 'City': prefix.cities.take(cidade)}
+    colunas.update(zip(MEASURES, medidas[selecionadas].T))
+    colunas.update(zip(moment_columns('rating'), (valores[selecionadas] for valores in avaliacoes)))
+
+    return RangeTotals(pd.DataFrame(colunas))
@@ -0,0 +1,46 @@
+#==============================
+# Bibliotecas
+#==============================
+from utils import cube
+from utils import sqldb
+from utils import topk
+from utils.sqldb import SqlView, sql_view
+#----------------------------------------------------------------------------------
+
+# agregações das páginas em qualquer backend: cada função recebe o cubo filtrado (ou o DataFrame
+# filtrado, em courier_max, ou os totais do período, utils.prefix.RangeTotals, em counts, rollup e
+# rating_rollup por cidade e tráfego) no backend 'pandas', ou um utils.sqldb.SqlView nos backends
+# 'sqlite' e 'duckdb', e devolve o mesmo resultado nos dois casos
+
+#==============================
+# Funções
+#==============================
+
+def counts(source, by):
+    ''' Quantidade de pedidos por grupo. '''
+    return sqldb.counts(source, by) if isinstance(source, SqlView) else cube.counts(source, by)
+
+
+def rollup(source, by):
+    ''' Quantidade, tempo médio e desvio padrão do tempo de entrega por grupo. '''
+    return sqldb.rollup(source, by) if isinstance(source, SqlView) else cube.rollup(source, by)
+
+
+def rating_rollup(source, by):
+    ''' Quantidade, média e desvio padrão das avaliações por grupo. '''
+    return sqldb.rating_rollup(source, by) if isinstance(source, SqlView) else cube.rating_rollup(source, by)
+
+
+def weekly_couriers(source):
+    ''' Entregadores distintos de cada semana do ano. '''
+    return sqldb.weekly_couriers(source) if isinstance(source, SqlView) else cube.weekly_couriers(source)
+
+
+def distinct_couriers(source):
+    ''' Quantidade exata de entregadores distintos. '''
+    return sqldb.distinct_couriers(source) if isinstance(source, SqlView) else cube.distinct_couriers(source)
+
+
+def courier_max(source):
+    ''' Maior tempo de entrega de cada entregador em cada cidade (DataFrame filtrado ou SqlView). '''
+    return sqldb.courier_max(source) if isinstance(source, SqlView) else topk.courier_max(source)
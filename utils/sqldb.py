@@ -0,0 +1,294 @@
+#==============================
+# Bibliotecas
+#==============================
+import json
+import os
+import sqlite3
+import threading
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+import streamlit as st
+from utils.cube import moments
+from utils.data import live_dataset
+#----------------------------------------------------------------------------------
+
+# variável de ambiente que escolhe onde as páginas fazem as consultas agregadas
+BACKEND_ENV = 'QUERY_BACKEND'
+
+# 'pandas' (padrão): cubo e DataFrame em memória; os demais usam um banco embutido em arquivo
+BACKENDS = ('pandas', 'sqlite', 'duckdb')
+
+# sufixo do arquivo do banco, salvo ao lado do CSV (como o cache .cleaned.feather)
+DB_SUFFIXES = {'sqlite': '.sqlite', 'duckdb': '.duckdb'}
+
+# versão do conteúdo do banco: deve ser incrementada quando a tabela mudar
+SQL_VERSION = 2
+
+# colunas do DataFrame que podem ser usadas no GROUP BY (Order_Date fica como número do dia)
+SQL_COLUMNS = {'Order_Date': 'order_day', 'week_of_year': 'week_of_year', 'Road_traffic_density': 'Road_traffic_density',
+               'City': 'City', 'Festival': 'Festival', 'Type_of_order': 'Type_of_order',
+               'Weatherconditions': 'Weatherconditions', 'Type_of_vehicle': 'Type_of_vehicle', 'Delivery_person_ID': 'Delivery_person_ID'}
+
+#==============================
+# Estruturas
+#==============================
+
+class SqlStore(NamedTuple):
+    ''' Banco embutido com a tabela orders (uma linha por pedido limpo).
+
+        con: conexão (sqlite3 ou duckdb), compartilhada pelas sessões
+        engine: 'sqlite' ou 'duckdb'
+        lock: as consultas de sessões diferentes passam uma de cada vez pela conexão
+        path: caminho do arquivo do banco
+    '''
+    con: object
+    engine: str
+    lock: threading.Lock
+    path: str
+
+
+class SqlView(NamedTuple):
+    ''' Filtros da barra lateral aplicados às consultas: vão no WHERE de cada consulta (filter pushdown).
+
+        Ocupa o lugar do cubo filtrado (ou do DataFrame filtrado) nas funções das páginas: as funções
+        de utils.queries recebem um ou outro e devolvem os mesmos DataFrames.
+    '''
+    store: SqlStore
+    date_range: tuple
+    traffic_options: tuple
+    filters: tuple = ()
+
+#==============================
+# Funções
+#==============================
+
+def query_backend():
+    ''' Backend das consultas escolhido na variável QUERY_BACKEND ('pandas' quando não definida). '''
+    backend = os.environ.get(BACKEND_ENV, 'pandas').strip().lower() or 'pandas'
+    if backend not in BACKENDS:
+        raise ValueError(f'{BACKEND_ENV} deve ser um de {BACKENDS}: {backend!r}')
+
+    return backend
+
+
+def _connect(path, engine):
+    ''' Abre a conexão com o arquivo do banco; o duckdb é opcional e só é importado quando escolhido. '''
+    if engine == 'sqlite':
+        # as sessões do Streamlit rodam em threads diferentes: o acesso é serializado pelo lock do SqlStore
+        return sqlite3.connect(path, check_same_thread=False)
+
+    try:
+        import duckdb
+    except ImportError as erro:
+        raise ImportError(f'{BACKEND_ENV}=duckdb precisa do pacote duckdb (pip install duckdb)') from erro
+
+    return duckdb.connect(path)
+
+
+def orders_table(df1):
+    ''' Esta função monta as colunas da tabela orders a partir do DataFrame limpo.
+
+        Order_Date vira o número do dia (dias desde 01/01/1970), os textos categóricos viram texto
+        simples e as avaliações ausentes ficam nulas (NULL no banco).
+
+        Input: DataFrame limpo
+        Output: DataFrame com as colunas da tabela
+    '''
+    tabela = pd.DataFrame({
+        'order_day': df1['Order_Date'].to_numpy(dtype='datetime64[D]').astype(np.int64),
+        'week_of_year': df1['week_of_year'].to_numpy(dtype=np.int64),
+    })
+    for coluna in ['Road_traffic_density', 'City', 'Festival', 'Type_of_order', 'Weatherconditions', 'Type_of_vehicle', 'Delivery_person_ID']:
+        tabela[coluna] = df1[coluna].astype(object).to_numpy()
+    tabela['time_taken'] = df1['Time_taken(min)'].to_numpy(dtype=np.int64)
+    tabela['rating'] = df1['Delivery_person_Ratings'].astype('Float64').to_numpy()
+
+    return tabela
+
+
+def _stored_key(con):
+    ''' Chave gravada no banco na última montagem (None se o banco ainda não tem a tabela meta). '''
+    try:
+        return con.execute('SELECT key FROM meta').fetchone()[0]
+    except Exception:
+        return None
+
+
+def _write_database(tabela, path, engine, chave):
+    ''' Grava a tabela orders e a chave em um arquivo novo do banco. '''
+    con = _connect(path, engine)
+    try:
+        if engine == 'sqlite':
+            con.execute('PRAGMA journal_mode = OFF')
+            con.execute('PRAGMA synchronous = OFF')
+            tabela.to_sql('orders', con, index=False, chunksize=100_000)
+            # índice para a busca pelo período e pela condição de tráfego
+            con.execute('CREATE INDEX orders_day_traffic ON orders (order_day, Road_traffic_density)')
+        else:
+            # as linhas já chegam ordenadas por dia: os zone maps do duckdb descartam blocos fora do período
+            con.register('tabela', tabela)
+            con.execute('CREATE TABLE orders AS SELECT * FROM tabela')
+            con.unregister('tabela')
+        con.execute('CREATE TABLE meta (key TEXT)')
+        con.execute('INSERT INTO meta VALUES (?)', [chave])
+        con.commit()
+    finally:
+        con.close()
+
+
+def open_store(df1, version, engine):
+    ''' Esta função abre o banco embutido, montando a tabela quando o arquivo não corresponde aos dados.
+
+        Ações realizadas:
+        1 - Procura o arquivo do banco ao lado do CSV (train.csv.sqlite / train.csv.duckdb)
+        2 - Se a chave gravada nele é a da versão atual dos dados, usa o arquivo como está
+        3 - Senão grava a tabela orders em um arquivo temporário e troca pelo antigo
+        4 - Abre a conexão que fica compartilhada entre as sessões
+
+        Input: DataFrame limpo, versão dos dados (DatasetState.version) e engine ('sqlite' ou 'duckdb')
+        Output: SqlStore
+    '''
+    caminho = f'{version[0]}{DB_SUFFIXES[engine]}'
+    chave = json.dumps([SQL_VERSION, *version[1:]])
+
+    atual = None
+    if os.path.exists(caminho):
+        con = _connect(caminho, engine)
+        try:
+            atual = _stored_key(con)
+        finally:
+            con.close()
+
+    if atual != chave:
+        temporario = f'{caminho}.{os.getpid()}.tmp'
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        _write_database(orders_table(df1), temporario, engine, chave)
+        os.replace(temporario, caminho)
+
+    return SqlStore(_connect(caminho, engine), engine, threading.Lock(), caminho)
+
+
+@st.cache_resource(show_spinner='Montando o banco de consultas...', max_entries=1)
+def _sql_store(engine, version, _frame):
+    ''' Banco embutido de uma versão dos dados, aberto uma vez por processo e compartilhado pelas sessões. '''
+    return open_store(_frame, version, engine)
+
+
+def sql_view(dataset, date_range, traffic_options, filters=None):
+    ''' Esta função entrega para as páginas os filtros da barra lateral ligados ao banco embutido.
+
+        Com QUERY_BACKEND=sqlite ou duckdb as agregações das páginas viram consultas com os filtros
+        no WHERE, e só os resultados (poucas linhas) voltam para o pandas.
+
+        Input: DatasetState, período (início, fim), lista de condições de tráfego e filtros cruzados ({coluna: valores})
+        Output: SqlView; None com o backend 'pandas' (cubo e DataFrame em memória)
+    '''
+    backend = query_backend()
+    if backend == 'pandas':
+        return None
+
+    # o banco é montado com o DataFrame completo (a página recebe só as suas colunas)
+    state = live_dataset(dataset.version[0]).state
+
+    filtros = tuple((coluna, tuple(valores)) for coluna, valores in (filters or {}).items())
+
+    return SqlView(_sql_store(backend, state.version, state.frame), tuple(date_range), tuple(traffic_options), filtros)
+
+
+def _first_day(instante):
+    ''' Número do primeiro dia cuja meia-noite não é anterior ao instante (Order_Date >= instante  <=>  dia >= _first_day). '''
+    return int((np.datetime64(instante, 'ns') - np.timedelta64(1, 'ns')).astype('datetime64[D]').astype(np.int64) + 1)
+
+
+def _where(view):
+    ''' Cláusula WHERE e parâmetros dos filtros: dias do período (início inclusive, fim exclusive),
+        condições de tráfego e filtros cruzados selecionados (IN em cada coluna; sem valores, nenhuma linha).
+    '''
+    condicoes, params = ['order_day >= ?', 'order_day < ?'], [_first_day(instante) for instante in view.date_range]
+    for coluna, valores in (('Road_traffic_density', view.traffic_options), *view.filters):
+        if not valores:
+            condicoes.append('1 = 0')
+            continue
+        condicoes.append(f'"{SQL_COLUMNS[coluna]}" IN ({", ".join("?" * len(valores))})')
+        params.extend(valores)
+
+    return 'WHERE ' + ' AND '.join(condicoes), params
+
+
+def _group(by):
+    ''' Colunas do GROUP BY (nomes do banco) para as colunas do DataFrame em by. '''
+    desconhecidas = [coluna for coluna in by if coluna not in SQL_COLUMNS]
+    if desconhecidas:
+        raise ValueError(f'colunas sem correspondência no banco: {desconhecidas}')
+
+    return ', '.join(f'"{SQL_COLUMNS[coluna]}"' for coluna in by)
+
+
+def _query(view, select, by=(), extra=''):
+    ''' Executa SELECT ... FROM orders WHERE (filtros) [GROUP BY by ORDER BY by] e devolve um DataFrame com os nomes do DataFrame. '''
+    where, params = _where(view)
+    sql = f'SELECT {select} FROM orders {where}'
+    if by:
+        colunas = _group(by)
+        sql = f'SELECT {colunas}, {select} FROM orders {where} GROUP BY {colunas} ORDER BY {colunas}'
+    sql += extra
+
+    store = view.store
+    with store.lock:
+        if store.engine == 'duckdb':
+            df_aux = store.con.execute(sql, params).df()
+        else:
+            df_aux = pd.read_sql_query(sql, store.con, params=params)
+
+    df_aux = df_aux.rename(columns={banco: coluna for coluna, banco in SQL_COLUMNS.items() if coluna in by})
+    if 'Order_Date' in df_aux.columns:
+        df_aux['Order_Date'] = pd.to_datetime(df_aux['Order_Date'].to_numpy(dtype=np.int64), unit='D')
+
+    return df_aux
+
+
+def counts(view, by):
+    ''' Quantidade de pedidos por grupo (mesmo resultado de utils.cube.counts). '''
+    return _query(view, 'COUNT(*) AS "count"', by)
+
+
+def rollup(view, by):
+    ''' Quantidade, tempo médio e desvio padrão do tempo por grupo (mesmo resultado de utils.cube.rollup).
+
+        O banco devolve as somas exatas (inteiras) e a média e o desvio são calculados como no cubo.
+    '''
+    df_aux = _query(view, 'COUNT(*) AS "count", SUM(time_taken) AS time_sum, SUM(time_taken * time_taken) AS time_sumsq', by)
+
+    return moments(df_aux, list(by))
+
+
+def rating_rollup(view, by):
+    ''' Quantidade, média e desvio padrão (ddof=1) das avaliações por grupo (mesmo resultado de utils.cube.rating_rollup). '''
+    df_aux = _query(view, 'COUNT(rating) AS rating_count, SUM(rating) AS rating_sum, SUM(rating * rating) AS rating_sumsq', by)
+
+    n = df_aux['rating_count'].astype(np.float64)
+    soma = df_aux.pop('rating_sum').astype(np.float64)
+    variancia = (df_aux.pop('rating_sumsq').astype(np.float64) - soma ** 2 / n) / (n - 1)
+    df_aux['rating_mean'] = (soma / n).where(n > 0)
+    df_aux['rating_std'] = np.sqrt(variancia.clip(lower=0).where(n > 1))
+
+    return df_aux
+
+
+def weekly_couriers(view):
+    ''' Entregadores distintos de cada semana do ano (mesmo resultado de utils.cube.weekly_couriers). '''
+    df_aux = _query(view, 'COUNT(DISTINCT Delivery_person_ID) AS entregadores', ['week_of_year'])
+
+    return df_aux.set_index('week_of_year')['entregadores']
+
+
+def distinct_couriers(view):
+    ''' Quantidade de entregadores distintos com os filtros (mesmo resultado de utils.cube.distinct_couriers). '''
+    return int(_query(view, 'COUNT(DISTINCT Delivery_person_ID) AS entregadores').iloc[0, 0])
+
+
+def courier_max(view):
+    ''' Maior tempo de entrega de cada entregador em cada cidade (mesmo resultado de utils.topk.courier_max). '''
+    return _query(view, 'MAX(time_taken) AS "Time_taken(min)"', ['City', 'Delivery_person_ID'])
@@ -0,0 +1,118 @@
+#==============================
+# Bibliotecas
+#==============================
+from typing import NamedTuple
+import numpy as np
+#----------------------------------------------------------------------------------
+
+#==============================
+# Estruturas
+#==============================
+
+class Moments(NamedTuple):
+    ''' Acumuladores de Welford de vários grupos (um elemento por grupo em cada array).
+
+        count: quantidade de valores
+        mean: média dos valores (0 quando count = 0)
+        m2: soma dos quadrados dos desvios em relação à média
+
+        Dois acumuladores podem ser combinados (merge_moments) e um pode ser retirado de outro
+        (subtract_moments) sem voltar aos valores originais.
+    '''
+    count: np.ndarray
+    mean: np.ndarray
+    m2: np.ndarray
+
+#==============================
+# Funções
+#==============================
+
+def moment_columns(prefix):
+    ''' Nomes das colunas que guardam os acumuladores de uma medida em um DataFrame. '''
+    return [f'{prefix}_count', f'{prefix}_mean', f'{prefix}_m2']
+
+
+def frame_moments(df, prefix):
+    ''' Lê de um DataFrame os acumuladores salvos com assign_moments. '''
+    count, mean, m2 = moment_columns(prefix)
+
+    return Moments(df[count].to_numpy(dtype=np.int64), df[mean].to_numpy(dtype=np.float64), df[m2].to_numpy(dtype=np.float64))
+
+
+def assign_moments(df, moments, prefix):
+    ''' Grava os acumuladores nas colunas <prefix>_count, <prefix>_mean e <prefix>_m2 (devolve um novo DataFrame). '''
+    return df.assign(**dict(zip(moment_columns(prefix), moments)))
+
+
+def take_moments(moments, posicoes):
+    ''' Acumuladores só dos grupos nas posições indicadas. '''
+    return Moments(*(valores[posicoes] for valores in moments))
+
+
+def _safe_mean(total, count):
+    ''' total / count, com 0 nos grupos sem valores. '''
+    return np.divide(total, count, out=np.zeros(len(count), dtype=np.float64), where=count > 0)
+
+
+def accumulate(values, groups, n_groups):
+    ''' Esta função calcula os acumuladores de cada grupo a partir dos valores.
+
+        A média é calculada primeiro e o m2 depois, sobre os desvios: o mesmo estado do algoritmo
+        de Welford, sem o erro de arredondamento da fórmula soma dos quadrados - quadrado da soma.
+        Valores ausentes (NaN) são ignorados, como no mean/std do pandas e no COUNT/AVG do SQL.
+
+        Input: valores, número do grupo de cada valor (0 .. n_groups - 1) e quantidade de grupos
+        Output: Moments
+    '''
+    values = np.asarray(values, dtype=np.float64)
+    groups = np.asarray(groups)
+    validos = np.isfinite(values)
+
+    # os ausentes entram com peso zero: não contam, nem somam na média ou no m2
+    values = np.where(validos, values, 0.0)
+    count = np.bincount(groups, weights=validos, minlength=n_groups).astype(np.int64)
+    mean = _safe_mean(np.bincount(groups, weights=values, minlength=n_groups), count)
+    desvio = np.where(validos, values - mean[groups], 0.0)
+
+    return Moments(count, mean, np.bincount(groups, weights=desvio * desvio, minlength=n_groups))
+
+
+def merge_moments(a, b):
+    ''' Combina dois acumuladores, grupo a grupo (fórmula de Chan para a variância de duas partes). '''
+    count = a.count + b.count
+    delta = b.mean - a.mean
+    peso_b = _safe_mean(b.count.astype(np.float64), count)
+
+    return Moments(count, a.mean + delta * peso_b, a.m2 + b.m2 + delta * delta * a.count * peso_b)
+
+
+def subtract_moments(total, part):
+    ''' Retira uma parte de um acumulador, grupo a grupo (o inverso de merge_moments). '''
+    count = total.count - part.count
+    mean = _safe_mean(total.count * total.mean - part.count * part.mean, count)
+    delta = part.mean - mean
+    m2 = total.m2 - part.m2 - delta * delta * count * _safe_mean(part.count.astype(np.float64), total.count)
+
+    # o arredondamento pode deixar um resíduo negativo quando a parte é quase todo o total
+    return Moments(count, np.where(count > 0, mean, 0.0), np.where(count > 1, np.maximum(m2, 0.0), 0.0))
+
+
+def reduce_moments(moments, groups, n_groups):
+    ''' Esta função combina vários acumuladores por grupo de uma só vez (o merge de n partes).
+
+        Input: Moments (um elemento por parte), número do grupo de cada parte e quantidade de grupos
+        Output: Moments com um elemento por grupo
+    '''
+    count = np.bincount(groups, weights=moments.count, minlength=n_groups).astype(np.int64)
+    mean = _safe_mean(np.bincount(groups, weights=moments.count * moments.mean, minlength=n_groups), count)
+    desvio = moments.mean - mean[groups]
+
+    return Moments(count, mean, np.bincount(groups, weights=moments.m2 + moments.count * desvio * desvio, minlength=n_groups))
+
+
+def finalize(moments):
+    ''' Média e desvio padrão amostral (ddof=1, o mesmo do pandas) de cada grupo; NaN onde não há valores suficientes. '''
+    media = np.where(moments.count > 0, moments.mean, np.nan)
+    desvio = np.sqrt(_safe_mean(moments.m2, moments.count - 1))
+
+    return media, np.where(moments.count > 1, desvio, np.nan)
@@ -0,0 +1,87 @@
+#==============================
+# Bibliotecas
+#==============================
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+from utils.cube import aggregate_cells, merge_cells
+from utils.pipeline import clean_code
+#----------------------------------------------------------------------------------
+
+# quantidade de linhas lidas do CSV por lote
+CHUNK_SIZE = 100_000
+
+# colunas necessárias para as agregações (as demais nem são lidas)
+COLUNAS_STREAMING = ['ID', 'Delivery_person_ID', 'Delivery_person_Age', 'Delivery_person_Ratings', 'Order_Date',
+                     'Weatherconditions', 'Road_traffic_density', 'Type_of_order', 'Type_of_vehicle',
+                     'multiple_deliveries', 'Festival', 'City', 'Time_taken(min)']
+
+# chave e medidas das estatísticas por entregador
+COURIER_KEYS = ['City', 'Delivery_person_ID']
+COURIER_AGGS = {'count': 'sum', 'rating_sum': 'sum', 'rating_count': 'sum', 'time_min': 'min', 'time_max': 'max'}
+
+#==============================
+# Estruturas
+#==============================
+
+class StreamAggregates(NamedTuple):
+    ''' Resultado da leitura em lotes.
+
+        cells: células do cubo diário (CUBE_DIMENSIONS + MEASURES + RATING_MOMENTS): contagens por dia
+               e momentos do tempo e das avaliações por cidade / tráfego / festival / tipo de pedido / clima
+        couriers: estatísticas por (City, Delivery_person_ID): count, rating_sum, rating_count, time_min e time_max
+        rows: quantidade de linhas válidas lidas
+    '''
+    cells: pd.DataFrame
+    couriers: pd.DataFrame
+    rows: int
+
+#==============================
+# Funções
+#==============================
+
+def aggregate_couriers(df1):
+    ''' Estatísticas parciais por entregador de um lote já limpo. Podem ser combinadas com merge_couriers. '''
+    df_aux = pd.DataFrame({'count': 1,
+                           'rating_sum': df1['Delivery_person_Ratings'].astype(np.float64),
+                           'rating_count': df1['Delivery_person_Ratings'].notna().astype(np.int64),
+                           'time_min': df1['Time_taken(min)'],
+                           'time_max': df1['Time_taken(min)']}, index=df1.index)
+    df_aux[COURIER_KEYS] = df1[COURIER_KEYS]
+
+    return df_aux.groupby(COURIER_KEYS, observed=True).agg(COURIER_AGGS).reset_index()
+
+
+def merge_couriers(*partes):
+    ''' Combina estatísticas parciais por entregador: somas são somadas, mínimos e máximos comparados. '''
+    df_aux = pd.concat(partes, ignore_index=True)
+
+    return df_aux.groupby(COURIER_KEYS, observed=True).agg(COURIER_AGGS).reset_index()
+
+
+def ingest_csv(path, chunksize=CHUNK_SIZE):
+    ''' Esta função lê um CSV em lotes e agrega cada lote, sem nunca carregar o arquivo inteiro na memória.
+
+        Ações realizadas:
+        1 - Lê o CSV em lotes de `chunksize` linhas (só as colunas usadas nas agregações)
+        2 - Limpa cada lote com as mesmas regras do clean_code
+        3 - Agrega o lote (células do cubo e estatísticas por entregador)
+        4 - Soma as agregações do lote com as acumuladas
+
+        O pico de memória depende do tamanho do lote e da quantidade de grupos, não do tamanho do arquivo.
+
+        Input: caminho do CSV e tamanho do lote
+        Output: StreamAggregates
+    '''
+    cells = None
+    couriers = None
+    rows = 0
+
+    for chunk in pd.read_csv(path, usecols=COLUNAS_STREAMING, chunksize=chunksize):
+        df1 = clean_code(chunk)
+        rows += len(df1)
+
+        cells = aggregate_cells(df1) if cells is None else merge_cells(cells, aggregate_cells(df1))
+        couriers = aggregate_couriers(df1) if couriers is None else merge_couriers(couriers, aggregate_couriers(df1))
+
+    return StreamAggregates(cells, couriers, rows)
@@ -0,0 +1,91 @@
+#==============================
+# Bibliotecas
+#==============================
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+#----------------------------------------------------------------------------------
+
+# quantidade de entregadores em cada lista de mais rápidos / mais lentos por cidade
+TOP_K = 10
+
+# chave do ranking: cada entregador é avaliado dentro de cada cidade
+TOPK_KEYS = ['City', 'Delivery_person_ID']
+
+# medida do ranking: o maior tempo de entrega do entregador
+TOPK_MEASURE = 'Time_taken(min)'
+
+#==============================
+# Estruturas
+#==============================
+
+class TopCouriers(NamedTuple):
+    ''' Ranking dos entregadores por cidade (colunas City, Delivery_person_ID e Time_taken(min)).
+
+        fastest: os k com os menores tempos de cada cidade, do mais rápido para o mais lento
+        slowest: os k com os maiores tempos de cada cidade, do mais lento para o mais rápido
+    '''
+    fastest: pd.DataFrame
+    slowest: pd.DataFrame
+
+#==============================
+# Funções
+#==============================
+
+def courier_max(df1):
+    ''' Maior tempo de entrega de cada entregador em cada cidade, ordenado por cidade e entregador. '''
+    return df1.groupby(TOPK_KEYS, observed=True)[TOPK_MEASURE].max().reset_index()
+
+
+def merge_courier_max(*partes):
+    ''' Combina resultados de courier_max de partes diferentes do dataset (ex.: pedidos novos): vale o maior tempo.
+
+        O custo depende da quantidade de entregadores das partes, não da quantidade de pedidos. As colunas
+        categóricas das partes precisam ter as mesmas categorias (senão o resultado fica em texto).
+    '''
+    return courier_max(pd.concat(partes, ignore_index=True))
+
+
+def _select(tempos, k, maiores):
+    ''' Posições dos k menores (ou maiores) tempos em ordem; empates ficam na ordem em que aparecem.
+
+        np.partition encontra o k-ésimo valor sem ordenar tudo: só os candidatos até ele são ordenados.
+    '''
+    if len(tempos) > k:
+        posicao = len(tempos) - k if maiores else k - 1
+        corte = np.partition(tempos, posicao)[posicao]
+        candidatos = np.flatnonzero(tempos >= corte if maiores else tempos <= corte)
+    else:
+        candidatos = np.arange(len(tempos))
+
+    ordem = np.argsort(-tempos[candidatos] if maiores else tempos[candidatos], kind='stable')
+
+    return candidatos[ordem[:k]]
+
+
+def top_k(maxima, k=TOP_K):
+    ''' Esta função monta as listas de entregadores mais rápidos e mais lentos de todas as cidades de uma vez.
+
+        Ações realizadas:
+        1 - Separa as linhas de cada cidade presente nos dados (uma única ordenação dos códigos das cidades)
+        2 - Em cada cidade seleciona os k menores e os k maiores tempos por seleção parcial
+        3 - Junta as cidades, na ordem das categorias, nos dois DataFrames de saída
+
+        Input: DataFrame no formato de courier_max e quantidade de entregadores por cidade
+        Output: TopCouriers
+    '''
+    codigos, cidades = pd.factorize(maxima['City'], sort=True)
+    tempos = maxima[TOPK_MEASURE].to_numpy()
+
+    ordem = np.argsort(codigos, kind='stable')
+    limites = np.searchsorted(codigos[ordem], np.arange(len(cidades) + 1))
+
+    rapidos = [np.zeros(0, dtype=np.int64)]
+    lentos = [np.zeros(0, dtype=np.int64)]
+    for inicio, fim in zip(limites[:-1], limites[1:]):
+        posicoes = ordem[inicio:fim]
+        rapidos.append(posicoes[_select(tempos[posicoes], k, maiores=False)])
+        lentos.append(posicoes[_select(tempos[posicoes], k, maiores=True)])
+
+    return TopCouriers(maxima.iloc[np.concatenate(rapidos)].reset_index(drop=True),
+                       maxima.iloc[np.concatenate(lentos)].reset_index(drop=True))